@@ -1,2 +1,4 @@
 from .file_format import FileFormat
-from .logging_class import LoggingClass
+from .logging_class import LazyHex, LoggingClass
+from .mapped_file import MappedFile
+from .layout import Field, Layout
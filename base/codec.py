@@ -0,0 +1,79 @@
+import lzma
+import zlib
+from abc import ABC, abstractmethod
+from typing import Dict, Optional
+
+
+class Codec(ABC):
+    """
+    Block compression codec, codecs are stateless so they can be shared between threads and sent to worker processes
+    """
+
+    #: Name the codec is registered under
+    name: str = None
+
+    @abstractmethod
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
+        pass
+
+    @abstractmethod
+    def decompress(self, data: bytes, decompressed_size: int) -> bytes:
+        """
+        Decompresses a single block
+
+        Args:
+            data: compressed block
+            decompressed_size: expected size of the decompressed block
+
+        Returns:
+            decompressed block
+        """
+        pass
+
+
+class ZlibCodec(Codec):
+    name: str = 'zlib'
+
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
+        return zlib.compress(data, zlib.Z_DEFAULT_COMPRESSION if level is None else level)
+
+    def decompress(self, data: bytes, decompressed_size: int) -> bytes:
+        return zlib.decompress(data, zlib.MAX_WBITS, max(decompressed_size, 1))
+
+
+class LzmaCodec(Codec):
+    """
+    LZMA blocks in the legacy .lzma (LZMA_Alone) container, properties and size header followed by the raw stream
+    """
+    name: str = 'lzma'
+
+    def compress(self, data: bytes, level: Optional[int] = None) -> bytes:
+        return lzma.compress(data, format=lzma.FORMAT_ALONE, preset=6 if level is None else level)
+
+    def decompress(self, data: bytes, decompressed_size: int) -> bytes:
+        return lzma.LZMADecompressor(format=lzma.FORMAT_ALONE).decompress(data, decompressed_size)
+
+
+#: Registered codecs by name
+CODECS: Dict[str, Codec] = {}
+
+
+def register_codec(codec: Codec) -> None:
+    CODECS[codec.name] = codec
+
+
+def get_codec(name: str) -> Optional[Codec]:
+    """
+    Finds a registered codec
+
+    Args:
+        name: codec name
+
+    Returns:
+        codec, None if no codec is registered under the name
+    """
+    return CODECS.get(name)
+
+
+register_codec(ZlibCodec())
+register_codec(LzmaCodec())
@@ -0,0 +1,93 @@
+from abc import abstractmethod
+from array import array
+from typing import Generic, Iterable, Iterator, List, Sequence, TypeVar, Union
+
+T = TypeVar('T')
+
+
+class NameTable(object):
+    """
+    Names interned in a single UTF-8 buffer, decoded on access
+    """
+
+    def __init__(self):
+        #: Every name encoded back to back
+        self.data: bytearray = bytearray()
+
+        #: Start offset of every name in data, followed by the end offset of the last one
+        self.offsets: array = array('Q', [0])
+
+    def append(self, name: str) -> None:
+        self.data += name.encode('utf-8', 'surrogateescape')
+        self.offsets.append(len(self.data))
+
+    def append_encoded(self, name: bytes) -> None:
+        """Appends a name which is already UTF-8 encoded, skipping the decode and encode round trip"""
+        self.data += name
+        self.offsets.append(len(self.data))
+
+    def extend(self, names: Iterable[str]) -> None:
+        for name in names:
+            self.append(name)
+
+    def __getitem__(self, index: int) -> str:
+        return self.data[self.offsets[index]:self.offsets[index + 1]].decode('utf-8', 'surrogateescape')
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+class EntryTable(Sequence, Generic[T]):
+    """
+    Columnar entry table, every field is kept in its own array and entries are handed out as views built on access
+    """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def entry(self, index: int) -> T:
+        """
+        Builds the view of a single entry
+
+        Args:
+            index: entry index, already bounds checked
+
+        Returns:
+            entry view
+        """
+        pass
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[T, List[T]]:
+        if isinstance(index, slice):
+            return [self.entry(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('entry table index out of range')
+        return self.entry(index)
+
+    def __iter__(self) -> Iterator[T]:
+        for index in range(len(self)):
+            yield self.entry(index)
+
+
+def columns(records: Sequence[tuple], typecodes: str) -> List[array]:
+    """
+    Transposes unpacked records into one array per field
+
+    Args:
+        records: unpacked records
+        typecodes: array typecode of every field
+
+    Returns:
+        field columns
+    """
+    if len(records) == 0:
+        return [array(typecode) for typecode in typecodes]
+    return [array(typecode, column) for typecode, column in zip(typecodes, zip(*records))]
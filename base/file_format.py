@@ -4,16 +4,20 @@ from typing import IO, TypeVar, Generic, Type
 from .errors import EmptyFileException, InvalidFileHashException
 from .header import MagicFileHeader
 from .logging_class import LoggingClass
+from .mapped_file import MappedFile
 
 
 class FileFormat(LoggingClass):
 
-    def __init__(self, path: str, verify: bool = False):
+    def __init__(self, path: str, verify: bool = False, use_mmap: bool = False):
         super().__init__()
 
         #: File Path
         self.path: str = path
-        self.logger.info(f'Parsing file: {self.path}')
+        self.logger.info('Parsing file: %s', self.path)
+
+        #: Use a memory mapped file handle (see :class:`MappedFile`)
+        self.use_mmap: bool = use_mmap
 
         if os.stat(self.path).st_size == 0:
             raise EmptyFileException()
@@ -29,6 +33,8 @@ class FileFormat(LoggingClass):
                 raise InvalidFileHashException()
 
     def get_file_handle(self) -> IO:
+        if self.use_mmap:
+            return MappedFile(self.path)
         return open(self.path, 'rb')
 
     # noinspection PyMethodMayBeStatic
@@ -46,8 +52,8 @@ T = TypeVar('T', bound=MagicFileHeader)
 
 class FileFormatWithMagic(FileFormat, Generic[T]):
 
-    def __init__(self, path: str, header_class: Type[T], verify: bool = False):
-        super().__init__(path, verify)
+    def __init__(self, path: str, header_class: Type[T], verify: bool = False, use_mmap: bool = False):
+        super().__init__(path, verify, use_mmap)
         self.__header_class = header_class
         self.__header = self.__header_class(self.file_handle)
 
@@ -11,7 +11,7 @@ class MagicFileHeader(FileHeader):
 
         #: Magic
         self._magic: bytes = f.read(self.__magic_length)
-        self.logger.info(f'Magic: {self._magic}')
+        self.logger.info('Magic: %s', self._magic)
 
         if self._magic != self.magic:
             self.logger.error('Error, invalid magic')
@@ -0,0 +1,114 @@
+import struct
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional, Tuple, Type
+
+
+class Field(object):
+    """Single named field of a binary layout.
+
+    Args:
+        name: Attribute name the parsed value is stored under
+        format: ``struct`` format code of the raw value (without byte order)
+        parse: Converter applied to the raw unpacked value, ``None`` keeps it as is
+        serialize: Converter applied to the attribute value before packing, ``None`` keeps it as is
+    """
+
+    def __init__(self, name: str, format: str, parse: Optional[Callable[[Any], Any]] = None,
+                 serialize: Optional[Callable[[Any], Any]] = None):
+        self.name: str = name
+        self.format: str = format
+        self.parse: Optional[Callable[[Any], Any]] = parse
+        self.serialize: Optional[Callable[[Any], Any]] = serialize
+
+    @staticmethod
+    def enum(name: str, format: str, enum_class: Type) -> 'Field':
+        """Field holding an enum member, stored as the member value."""
+        return Field(name, format, parse=enum_class, serialize=lambda member: member.value)
+
+    @staticmethod
+    def string(name: str, size: int, encoding: str = 'utf-8') -> 'Field':
+        """Fixed size string field."""
+        return Field(
+            name, f'{size}s',
+            parse=lambda data: data.decode(encoding),
+            serialize=lambda value: value.encode(encoding)
+        )
+
+    @staticmethod
+    def uint(name: str, size: int, byteorder: str = 'big') -> 'Field':
+        """Unsigned integer of a width ``struct`` has no code for (ex. 24 or 40-bit)."""
+        return Field(
+            name, f'{size}s',
+            parse=lambda data: int.from_bytes(data, byteorder),
+            serialize=lambda value: value.to_bytes(size, byteorder)
+        )
+
+
+class Layout(object):
+    """Declarative binary layout compiled once into a ``struct.Struct`` plus per field converters.
+
+    Args:
+        endianess: Byte order of the whole layout (see ``utils.utils.Endianess``)
+        fields: Fields in on-disk order
+    """
+
+    def __init__(self, endianess: str, fields: List[Field]):
+        #: Fields in on-disk order
+        self.fields: List[Field] = fields
+
+        #: Compiled struct of the whole layout
+        self.struct: struct.Struct = struct.Struct(endianess + ''.join(field.format for field in fields))
+
+        #: Field names in on-disk order
+        self.names: Tuple[str, ...] = tuple(field.name for field in fields)
+
+        #: (index, name, converter) of fields that need converting after unpacking
+        self.parsers: List[Tuple[int, str, Callable[[Any], Any]]] = [
+            (index, field.name, field.parse) for index, field in enumerate(fields) if field.parse is not None
+        ]
+
+    @property
+    def size(self) -> int:
+        return self.struct.size
+
+    def convert(self, values: Tuple[Any, ...]) -> Dict[str, Any]:
+        """Converts a raw unpacked record into a name -> value dictionary."""
+        result: Dict[str, Any] = dict(zip(self.names, values))
+        for index, name, parse in self.parsers:
+            result[name] = parse(values[index])
+        return result
+
+    def unpack(self, data: bytes, offset: int = 0) -> Dict[str, Any]:
+        return self.convert(self.struct.unpack_from(data, offset))
+
+    def read(self, f: IO) -> Dict[str, Any]:
+        """Reads and parses a single record from the current position of ``f``."""
+        return self.unpack(f.read(self.struct.size))
+
+    def read_into(self, target: Any, f: IO) -> None:
+        """Reads a single record from ``f`` and sets every field as an attribute of ``target``."""
+        Layout.assign(target, self.read(f))
+
+    @staticmethod
+    def assign(target: Any, values: Dict[str, Any]) -> None:
+        for name, value in values.items():
+            setattr(target, name, value)
+
+    def iter_unpack(self, data: bytes) -> Iterator[Dict[str, Any]]:
+        """Parses a packed array of records in bulk."""
+        for values in self.struct.iter_unpack(data):
+            yield self.convert(values)
+
+    def iter_unpack_raw(self, data: bytes) -> Iterator[Tuple[Any, ...]]:
+        """Unpacks a packed array of records in bulk without running the converters."""
+        return self.struct.iter_unpack(data)
+
+    def pack(self, source: Any) -> bytes:
+        """Packs the attributes of ``source`` named after the fields."""
+        values: List[Any] = []
+        for field in self.fields:
+            value: Any = getattr(source, field.name)
+            values.append(value if field.serialize is None else field.serialize(value))
+        return self.struct.pack(*values)
+
+    def write(self, source: Any, f: IO) -> None:
+        f.write(self.pack(source))
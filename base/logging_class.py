@@ -1,20 +1,51 @@
 import logging
 from abc import ABC
+from binascii import hexlify
+
+
+class ClassLogger(object):
+    """
+    Logger of a class, created on first access and cached on that class instead of being created per instance.
+    Creating it lazily keeps the logger class set by utils.utils in effect for classes defined before its import.
+    """
+    __slots__ = ()
+
+    def __get__(self, instance, owner) -> logging.Logger:
+        logger: logging.Logger = vars(owner).get('_class_logger')
+        if logger is None:
+            logger = logging.getLogger(LoggingClass.create_logger_name(owner.__name__))
+            owner._class_logger = logger
+        return logger
 
 
 class LoggingClass(ABC):
-    def __init__(self):
-        self.logger: logging.Logger = logging.getLogger(self.logger_name)
+    __slots__ = ()
+
+    #: Class logger
+    logger: logging.Logger = ClassLogger()
 
     @property
     def logger_name(self) -> str:
-        return self.__create_logger_name_from_class_name()
+        return self.logger.name
 
-    def __create_logger_name_from_class_name(self) -> str:
-        class_name: str = self.__class__.__name__
+    @staticmethod
+    def create_logger_name(class_name: str) -> str:
         logger_name: str = ""
         for i in range(len(class_name)):
             logger_name += class_name[i]
             if i + 2 < len(class_name) and class_name[i + 1].isupper() and class_name[i + 2].islower():
                 logger_name += " "
         return logger_name
+
+
+class LazyHex(object):
+    """Hex dump of binary data for log messages, only built if the message is actually emitted."""
+    __slots__ = ('data', 'decode')
+
+    def __init__(self, data: bytes, decode: bool = False):
+        self.data: bytes = data
+        #: Plain hex digits instead of the bytes representation
+        self.decode: bool = decode
+
+    def __str__(self) -> str:
+        return hexlify(self.data).decode('ASCII') if self.decode else str(hexlify(self.data))
@@ -0,0 +1,95 @@
+import io
+import mmap
+from typing import Optional
+
+from .logging_class import LoggingClass
+
+
+class MappedFile(io.RawIOBase, LoggingClass):
+    """
+    Read only, memory mapped file handle.
+
+    Behaves like a regular binary file handle, but every read is a slice of the mapped pages instead of a read
+    syscall. The whole mapping is also exposed as a :class:`memoryview` through :attr:`view` for zero-copy access.
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+
+        #: Underlying file handle, kept open for the lifetime of the mapping
+        self.file_handle = open(path, 'rb')
+
+        #: Read only memory map of the whole file
+        self.mapping: mmap.mmap = mmap.mmap(self.file_handle.fileno(), 0, access=mmap.ACCESS_READ)
+
+        #: Current position
+        self.position: int = 0
+
+        self.__view: Optional[memoryview] = None
+
+    @property
+    def view(self) -> memoryview:
+        """
+        Zero-copy view of the whole file, slices of it stay valid until the file is closed
+        :return: memoryview of the mapping
+        """
+        if self.__view is None:
+            self.__view = memoryview(self.mapping)
+        return self.__view
+
+    def __len__(self) -> int:
+        return len(self.mapping)
+
+    def fileno(self) -> int:
+        return self.file_handle.fileno()
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self.position = offset
+        elif whence == io.SEEK_CUR:
+            self.position += offset
+        elif whence == io.SEEK_END:
+            self.position = len(self.mapping) + offset
+        else:
+            raise ValueError(f'Invalid whence ({whence})')
+        if self.position < 0:
+            raise ValueError(f'Negative seek position {self.position}')
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def read(self, size: int = -1) -> bytes:
+        end: int = len(self.mapping) if size is None or size < 0 else min(self.position + size, len(self.mapping))
+        data: bytes = self.mapping[self.position:end]
+        self.position += len(data)
+        return data
+
+    def readall(self) -> bytes:
+        return self.read()
+
+    def readinto(self, b) -> int:
+        with memoryview(b) as target, self.view[self.position:self.position + len(target)] as data:
+            size: int = len(data)
+            target[:size] = data
+        self.position += size
+        return size
+
+    def close(self) -> None:
+        if not self.closed:
+            if self.__view is not None:
+                self.__view.release()
+                self.__view = None
+            try:
+                self.mapping.close()
+            except BufferError:
+                #: Someone still holds a slice of the view, the mapping is released once it is garbage collected
+                self.logger.debug('Memory map still in use, leaving it to the garbage collector')
+            self.file_handle.close()
+        super().close()
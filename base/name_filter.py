@@ -0,0 +1,71 @@
+import fnmatch
+import re
+from typing import Iterable, List, Pattern
+
+
+class NameFilter(object):
+    """
+    Selects archive entries by name using include and exclude patterns.
+
+    Patterns are globs matching the whole name (``*`` also matches path separators) or regular expressions searched
+    in the name. Names are matched with forward slashes and without a leading slash, so the same patterns work for
+    every archive format.
+    """
+
+    def __init__(self, include: Iterable[str] = (), exclude: Iterable[str] = (), regex: bool = False,
+                 ignore_case: bool = False):
+        """
+        Init
+
+        Args:
+            include: patterns of the names to select, every name is selected if empty
+            exclude: patterns of the names to skip, applied after the include patterns
+            regex: the patterns are regular expressions instead of globs
+            ignore_case: match the patterns case insensitively
+        """
+        #: Patterns are regular expressions searched in the name instead of globs matching it
+        self.regex: bool = regex
+
+        #: Include patterns, every name is included if empty
+        self.include: List[Pattern] = NameFilter.compile(include, regex, ignore_case)
+
+        #: Exclude patterns, nothing is excluded if empty
+        self.exclude: List[Pattern] = NameFilter.compile(exclude, regex, ignore_case)
+
+    @staticmethod
+    def compile(patterns: Iterable[str], regex: bool, ignore_case: bool) -> List[Pattern]:
+        """
+        Compiles every pattern on its own, so inline flags and alternations of one pattern do not affect the others
+
+        Args:
+            patterns: globs or regular expressions
+            regex: the patterns are regular expressions
+            ignore_case: match case insensitively
+
+        Returns:
+            compiled patterns
+        """
+        flags: int = re.IGNORECASE if ignore_case else 0
+        return [re.compile(pattern if regex else fnmatch.translate(pattern), flags) for pattern in patterns]
+
+    @property
+    def selects_all(self) -> bool:
+        return not self.include and not self.exclude
+
+    def matches(self, name: str) -> bool:
+        """
+        Is the name selected
+
+        Args:
+            name: entry name
+
+        Returns:
+            True if the name matches an include pattern (or there are none) and no exclude pattern
+        """
+        name = name.replace('\\', '/').lstrip('/')
+        if self.include and not self.find(self.include, name):
+            return False
+        return not self.find(self.exclude, name)
+
+    def find(self, patterns: List[Pattern], name: str) -> bool:
+        return any((pattern.search(name) if self.regex else pattern.match(name)) is not None for pattern in patterns)
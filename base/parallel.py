@@ -0,0 +1,40 @@
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Callable, Deque, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def imap_ordered(function: Callable[[T], R], iterable: Iterable[T], executor: Optional[Executor] = None,
+                 window: int = 1) -> Iterator[R]:
+    """
+    Maps function over iterable using the executor, results are yielded in input order.
+    Unlike Executor.map the input is consumed lazily, at most window items are in flight at once which bounds the
+    memory use when the items are large (ex. compressed blocks).
+
+    Args:
+        function: function to apply
+        iterable: inputs, consumed from the calling thread
+        executor: executor to run function on, if None everything runs in the calling thread
+        window: maximum number of submitted but not yet yielded items
+
+    Returns:
+        results in input order
+    """
+    if executor is None:
+        for item in iterable:
+            yield function(item)
+        return
+
+    pending: Deque[Future] = deque()
+    try:
+        for item in iterable:
+            pending.append(executor.submit(function, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,66 @@
+from typing import Callable, Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+#: Largest read small items are coalesced into
+DEFAULT_MAX_READ_SIZE: int = 4 * 1024 * 1024
+
+#: Largest hole between two items which is read over instead of starting a new read
+DEFAULT_MAX_GAP: int = 64 * 1024
+
+
+class PlannedRead(Generic[T]):
+    """
+    Single sequential read covering one or more items stored next to each other
+    """
+    __slots__ = ('offset', 'size', 'items')
+
+    def __init__(self, offset: int):
+        #: Offset of the read
+        self.offset: int = offset
+
+        #: Size of the read, including the holes between the items
+        self.size: int = 0
+
+        #: (item, offset relative to the read offset, size) of every item covered by the read, in offset order
+        self.items: List[Tuple[T, int, int]] = []
+
+    @property
+    def end(self) -> int:
+        return self.offset + self.size
+
+    def add(self, item: T, offset: int, size: int) -> None:
+        self.items.append((item, offset - self.offset, size))
+        self.size = max(self.size, offset + size - self.offset)
+
+    def __repr__(self) -> str:
+        return f'PlannedRead(offset={self.offset:#x}, size={self.size:#x}, items={len(self.items)})'
+
+
+def plan_reads(items: Iterable[T], offset: Callable[[T], int], size: Callable[[T], int],
+               max_read_size: int = DEFAULT_MAX_READ_SIZE, max_gap: int = DEFAULT_MAX_GAP) -> List[PlannedRead[T]]:
+    """
+    Plans the reads needed to extract items from an archive.
+    Items are ordered by their offset so the file is read front to back, items stored next to each other (holes up
+    to max_gap) are coalesced into a single read as long as it stays under max_read_size. An item larger than
+    max_read_size gets a read of its own, the consumer is expected to stream it instead of reading it at once.
+
+    Args:
+        items: items to extract
+        offset: offset of an item in the archive
+        size: size of an item in the archive
+        max_read_size: largest coalesced read
+        max_gap: largest hole between items of the same read
+
+    Returns:
+        reads in offset order
+    """
+    reads: List[PlannedRead[T]] = []
+    read: PlannedRead[T] = None
+    for item_offset, item_size, item in sorted(((offset(item), size(item), item) for item in items),
+                                               key=lambda planned: planned[0]):
+        if read is None or item_offset > read.end + max_gap or item_offset + item_size - read.offset > max_read_size:
+            read = PlannedRead(item_offset)
+            reads.append(read)
+        read.add(item, item_offset, item_size)
+    return reads
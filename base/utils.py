@@ -5,8 +5,8 @@ from .errors import InvalidFileConstantException
 
 
 def constant_check(logger: Logger, name: str, constant: Any, valid: Union[Any, List[Any]]):
-    if (constant in valid) if isinstance(valid, List) else constant == valid:
-        logger.info(f'{name}: {constant}')
+    if (constant in valid) if isinstance(valid, list) else constant == valid:
+        logger.info('%s: %s', name, constant)
     else:
         raise InvalidFileConstantException(name, constant, valid)
 
@@ -0,0 +1,137 @@
+from concurrent.futures import Future
+from itertools import count
+from queue import Queue
+from threading import Thread
+from typing import IO, Any, Callable, Iterator, List, Optional
+
+from .logging_class import LoggingClass
+
+#: Default number of writes queued per writer thread before producers block
+DEFAULT_WRITE_QUEUE_DEPTH: int = 8
+
+
+class WriteBehindFile(object):
+    """
+    File opened through :class:`WriteBehind`, writes and the close are queued and return futures.
+
+    The written data is used after write returns, a reused buffer must not be overwritten before the future of its
+    write is done.
+    """
+    __slots__ = ('file', 'queue')
+
+    def __init__(self, file: IO, queue: Queue):
+        #: Underlying file, only touched by the writer thread after opening
+        self.file: IO = file
+
+        #: Queue of the writer thread the file is bound to
+        self.queue: Queue = queue
+
+    def submit(self, function: Callable[..., Any], *args: Any) -> Future:
+        future: Future = Future()
+        #: Blocks while the queue is full, this bounds the memory held by queued data
+        self.queue.put((function, args, future))
+        return future
+
+    def write(self, data: bytes) -> Future:
+        return self.submit(self.file.write, data)
+
+    def close(self) -> Future:
+        return self.submit(self.file.close)
+
+    def __enter__(self) -> 'WriteBehindFile':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+
+class WriteBehind(LoggingClass):
+    """
+    Write-behind output stage, files are written by dedicated writer threads so decoding and I/O overlap.
+
+    Every file is bound to a single writer thread which keeps its writes in order, each thread has a bounded queue so
+    producers block once the writers fall behind by depth writes. Errors of the writer threads are raised when the
+    stage is closed.
+    """
+
+    def __init__(self, depth: int = DEFAULT_WRITE_QUEUE_DEPTH, threads: int = 1):
+        """
+        Init
+
+        Args:
+            depth: number of writes queued per writer thread before producers block
+            threads: number of writer threads
+        """
+        if depth < 1 or threads < 1:
+            raise ValueError('depth and threads must be positive')
+
+        #: Queue of every writer thread
+        self.queues: List[Queue] = [Queue(maxsize=depth) for _ in range(threads)]
+
+        #: Writer threads
+        self.threads: List[Thread] = [
+            Thread(target=self.run, args=(queue,), name=f'Write Behind #{index}', daemon=True)
+            for index, queue in enumerate(self.queues)
+        ]
+
+        #: Errors raised by the writer threads
+        self.errors: List[BaseException] = []
+
+        #: The writer threads were stopped, queued writes would never be done
+        self.closed: bool = False
+
+        self._next_queue: Iterator[int] = count()
+
+        for thread in self.threads:
+            thread.start()
+
+    def run(self, queue: Queue) -> None:
+        while True:
+            item: Optional[tuple] = queue.get()
+            if item is None:
+                return
+            function, args, future = item
+            try:
+                future.set_result(function(*args))
+            except BaseException as e:
+                self.logger.error('Write failed: %s', e)
+                self.errors.append(e)
+                future.set_exception(e)
+
+    def open(self, path: str, mode: str = 'wb') -> WriteBehindFile:
+        """
+        Opens a file for writing, the open itself is done right away so its errors are raised here.
+
+        Args:
+            path: file path
+            mode: file mode
+
+        Returns:
+            write-behind file
+        """
+        return WriteBehindFile(open(path, mode), self.queues[next(self._next_queue) % len(self.queues)])
+
+    def close(self) -> None:
+        """
+        Waits for every queued write and stops the writer threads, does nothing if they are stopped already.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        for queue in self.queues:
+            queue.put(None)
+        for thread in self.threads:
+            thread.join()
+        if self.errors:
+            raise self.errors[0]
+
+    def __enter__(self) -> 'WriteBehind':
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        try:
+            self.close()
+        except BaseException:
+            #: Do not hide the exception which is already propagating
+            if exc_type is None:
+                raise
@@ -3,5 +3,5 @@ from .header import EDATHeader
 
 
 class EDAT(FileFormatWithMagic[EDATHeader]):
-    def __init__(self, path: str):
-        super().__init__(path, EDATHeader)
+    def __init__(self, path: str, use_mmap: bool = False):
+        super().__init__(path, EDATHeader, use_mmap=use_mmap)
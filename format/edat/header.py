@@ -1,8 +1,8 @@
-from binascii import hexlify
 from typing import IO
 
+from base import Field, Layout, LazyHex
 from base.header import MagicFileHeader
-from utils.utils import read_u32, Endianess, read_u8, unpack_u32, read_u64
+from utils.utils import Endianess
 from .application_type import ApplicationType
 from .errors import InvalidEDATBlockSizeException
 from .licence_type import LicenceType
@@ -13,25 +13,44 @@ GAME_ID_SIZE = 0x09
 
 
 class EDATHeader(MagicFileHeader):
+    #: Header layout following the magic
+    LAYOUT: Layout = Layout(Endianess.BIG_ENDIAN, [
+        Field('version', 'I'),
+        Field.enum('licence_type', 'I', LicenceType),
+        Field.enum('application_type', 'I', ApplicationType),
+        Field.string('content_id', 0x30),
+        Field('qa_digest', '16s'),
+        Field('npd_hash_1', '16s'),
+        Field('npd_hash_2', '16s'),
+        Field('activation_time', '8s'),
+        Field('deactivation_time', '8s'),
+        Field.enum('npd_type', 'B', NpdType),
+        Field('metadata_type', '3s',
+              parse=lambda data: MetadataType(int.from_bytes(data, 'big')),
+              serialize=lambda metadata_type: metadata_type.value.to_bytes(3, 'big')),
+        Field('block_size', 'I'),
+        Field('data_size', 'Q'),
+        Field('metadata_sections_hash', '16s'),
+        Field('extended_header_hash', '16s'),
+        Field('ecdsa_metadata_signature', '40s'),
+        Field('ecdsa_header_signature', '40s'),
+    ])
 
     def __init__(self, f: IO):
         super().__init__(f)
+        EDATHeader.LAYOUT.read_into(self, f)
 
         #: EDAT file format version
-        self.version: int = read_u32(f, endianess=Endianess.BIG_ENDIAN)
-        self.logger.info(f"EDAT Version: {self.version}")
+        self.logger.info('EDAT Version: %s', self.version)
 
         #: Licence Type
-        self.licence_type: LicenceType = LicenceType(read_u32(f, endianess=Endianess.BIG_ENDIAN))
-        self.logger.info(f"Licence Type: {self.licence_type}")
+        self.logger.info('Licence Type: %s', self.licence_type)
 
         #: Application Type
-        self.application_type: ApplicationType = ApplicationType(read_u32(f, endianess=Endianess.BIG_ENDIAN))
-        self.logger.info(f"Application Type: {self.application_type}")
+        self.logger.info('Application Type: %s', self.application_type)
 
         #: Content ID
-        self.content_id: str = f.read(0x30).decode('UTF-8')
-        self.logger.info(f"Content ID: {self.content_id}")
+        self.logger.info('Content ID: %s', self.content_id)
 
         #: Digest
         """
@@ -41,8 +60,7 @@ class EDATHeader(MagicFileHeader):
          watermark or zeroed on forged file.
         """
         # TODO: Do hashcheck
-        self.qa_digest: bytearray = f.read(0x10)
-        self.logger.info(f"QA Digest: {hexlify(self.qa_digest)}")
+        self.logger.info('QA Digest: %s', LazyHex(self.qa_digest))
 
         #: NPD Hash 1
         """
@@ -50,8 +68,7 @@ class EDATHeader(MagicFileHeader):
          ID and File Name using the third NPDRM OMAC pkg_internal_fs_key as CMAC pkg_internal_fs_key)
         """
         # TODO: Do hashcheck
-        self.npd_hash_1: bytearray = f.read(0x10)
-        self.logger.info(f"NPD Hash 1: {hexlify(self.npd_hash_1)}")
+        self.logger.info('NPD Hash 1: %s', LazyHex(self.npd_hash_1))
 
         #: NPD Hash 2
         """
@@ -60,45 +77,35 @@ class EDATHeader(MagicFileHeader):
          klicensee and the second NPDRM OMAC pkg_internal_fs_key as CMAC pkg_internal_fs_key)
         """
         # TODO: Do hashcheck
-        self.npd_hash_2: bytearray = f.read(0x10)
-        self.logger.info(f"NPD Hash 2: {hexlify(self.npd_hash_2)}")
+        self.logger.info('NPD Hash 2: %s', LazyHex(self.npd_hash_2))
 
         #: Activation Time (start of the validity period, filled with 0x00 if not used)
         # TODO: Reverse date format
-        self.activation_time: bytearray = f.read(0x08)
-        self.logger.info(f"Activation Time: {hexlify(self.activation_time)}")
+        self.logger.info('Activation Time: %s', LazyHex(self.activation_time))
 
         #: Deactivation Time (end of the validity period, filled with 0x00 if not used)
         # TODO: Reverse date format
-        self.deactivation_time: bytearray = f.read(0x08)
-        self.logger.info(f"Deactivation Time: {hexlify(self.deactivation_time)}")
+        self.logger.info('Deactivation Time: %s', LazyHex(self.deactivation_time))
 
         #: Npd Type
         # TODO: (Separated from Metadata type for wiki format)
-        self.npd_type: NpdType = NpdType(read_u8(f, endianess=Endianess.BIG_ENDIAN))
-        self.logger.info(f"Npd Type: {self.npd_type}")
+        self.logger.info('Npd Type: %s', self.npd_type)
 
         #: Metadata Type
         # TODO: (Outdated Flags description from talk page)
-        self.metadata_type: MetadataType = MetadataType(
-            unpack_u32(bytes([0]) + f.read(0x03), endianess=Endianess.BIG_ENDIAN)
-        )
-        self.logger.info(f"Metadata Type: {self.metadata_type}")
+        self.logger.info('Metadata Type: %s', self.metadata_type)
 
         #: Block Size
-        self.block_size: int = read_u32(f, endianess=Endianess.BIG_ENDIAN)
-        self.logger.info(f"Block Size: {self.block_size}")
+        self.logger.info('Block Size: %s', self.block_size)
         if self.block_size > 0x8000:
             raise InvalidEDATBlockSizeException()
 
         #: Data Size
-        self.data_size: int = read_u64(f, endianess=Endianess.BIG_ENDIAN)
-        self.logger.info(f"Data Size: {self.data_size}")
+        self.logger.info('Data Size: %s', self.data_size)
 
         #: Metadata Sections Hash
         # TODO: Do hashcheck
-        self.metadata_sections_hash: bytearray = f.read(0x10)
-        self.logger.info(f"Metadata Sections Hash: {hexlify(self.metadata_sections_hash)}")
+        self.logger.info('Metadata Sections Hash: %s', LazyHex(self.metadata_sections_hash))
 
         #: Extended Header Hash
         """
@@ -107,8 +114,7 @@ class EDATHeader(MagicFileHeader):
          flags and keys
         """
         # TODO: Do hashcheck
-        self.extended_header_hash: bytearray = f.read(0x10)
-        self.logger.info(f"Extended Header Hash: {hexlify(self.extended_header_hash)}")
+        self.logger.info('Extended Header Hash: %s', LazyHex(self.extended_header_hash))
 
         #: ECDSA Metadata Signature
         """
@@ -116,8 +122,7 @@ class EDATHeader(MagicFileHeader):
          pub is vsh public pkg_internal_fs_key,
         """
         # TODO: Do hashcheck
-        self.ecdsa_metadata_signature: bytearray = f.read(0x28)
-        self.logger.info(f"Extended Header Hash: {hexlify(self.ecdsa_metadata_signature)}")
+        self.logger.info('Extended Header Hash: %s', LazyHex(self.ecdsa_metadata_signature))
 
         #: ECDSA Header Signature
         """
@@ -126,8 +131,7 @@ class EDATHeader(MagicFileHeader):
          curve_type is vsh type 0x02, pub is vsh public pkg_internal_fs_key.
         """
         # TODO: Do hashcheck
-        self.ecdsa_header_signature: bytearray = f.read(0x28)
-        self.logger.info(f"ECDSA Header Signature: {hexlify(self.ecdsa_header_signature)}")
+        self.logger.info('ECDSA Header Signature: %s', LazyHex(self.ecdsa_header_signature))
 
     @property
     def magic(self) -> bytes:
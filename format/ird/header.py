@@ -1,43 +1,54 @@
 from typing import IO
 
+from base import Field, Layout
 from base.header import MagicFileHeader
-from utils.utils import read_u8
+from utils.utils import Endianess
 
 GAME_ID_SIZE = 0x09
 
 
 class IRDHeader(MagicFileHeader):
+    #: Header layout between the magic and the variable length game name
+    LAYOUT: Layout = Layout(Endianess.LITTLE_ENDIAN, [
+        Field('version', 'B'),
+        Field.string('game_id', GAME_ID_SIZE),
+        Field('game_name_size', 'B'),
+    ])
+
+    #: Header layout following the game name
+    VERSIONS_LAYOUT: Layout = Layout(Endianess.LITTLE_ENDIAN, [
+        Field('update_version', '4s'),
+        Field('game_version', '5s'),
+        Field('app_version', '5s'),
+    ])
 
     def __init__(self, f: IO):
         super().__init__(f)
+        IRDHeader.LAYOUT.read_into(self, f)
 
         #: IRD file format version
-        self.version: int = read_u8(f)
-        self.logger.info(f"IRD Version: {self.version}")
+        self.logger.info('IRD Version: %s', self.version)
 
         #: Game ID (ex. BLUS12354)
-        self.game_id: str = f.read(GAME_ID_SIZE).decode('UTF-8')
-        self.logger.info(f"Game ID: {self.game_id}")
+        self.logger.info('Game ID: %s', self.game_id)
 
         #: Game name length
-        self.game_name_size: int = read_u8(f)
-        self.logger.debug(f"Game Name Size: {self.game_name_size}")
+        self.logger.debug('Game Name Size: %s', self.game_name_size)
 
         #: Game name
         self.game_name: str = f.read(self.game_name_size).decode('UTF-8')
-        self.logger.info(f"Game Name: {self.game_name}")
+        self.logger.info('Game Name: %s', self.game_name)
+
+        IRDHeader.VERSIONS_LAYOUT.read_into(self, f)
 
         #: Update version
-        self.update_version: str = f.read(4)
-        self.logger.info(f"Update Version: {self.update_version}")
+        self.logger.info('Update Version: %s', self.update_version)
 
         #: Game version
-        self.game_version: str = f.read(5)
-        self.logger.info(f"Game Version: {self.game_version}")
+        self.logger.info('Game Version: %s', self.game_version)
 
         #: App version
-        self.app_version: str = f.read(5)
-        self.logger.info(f"App Version: {self.app_version}")
+        self.logger.info('App Version: %s', self.app_version)
 
     @property
     def magic(self) -> bytes:
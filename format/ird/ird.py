@@ -1,8 +1,8 @@
 import gzip
 import zlib
-from binascii import hexlify
 from typing import IO, List, Dict
 
+from base import LazyHex
 from base.file_format import FileFormatWithMagic
 from utils.utils import read_u8, read_u32, unpack_u32, Endianess
 from .constants import compressed_magic, data2_patch_decryptor, data2_patch_encryptor
@@ -11,16 +11,16 @@ from .header import IRDHeader
 
 
 class IRD(FileFormatWithMagic[IRDHeader]):
-    def __init__(self, path: str, verify=True):
-        super().__init__(path, IRDHeader)
+    def __init__(self, path: str, verify=True, use_mmap: bool = False):
+        super().__init__(path, IRDHeader, use_mmap=use_mmap)
 
         if self.version == 7:
             self.id: str = read_u32(self.file_handle)
-            self.logger.debug(f"ID (v7 only): {self.id}")
+            self.logger.debug('ID (v7 only): %s', self.id)
 
         #: ISO9660 Header Size
         self.iso_header_size: int = read_u32(self.file_handle, endianess=Endianess.LITTLE_ENDIAN)
-        self.logger.debug(f"Header Size: {self.iso_header_size}")
+        self.logger.debug('Header Size: %s', self.iso_header_size)
 
         # TODO: Write ISO9660 Header Parser
         #: ISO9660 Header
@@ -28,7 +28,7 @@ class IRD(FileFormatWithMagic[IRDHeader]):
 
         #: ISO9660 Footer Size
         self.iso_footer_size: int = read_u32(self.file_handle, endianess=Endianess.LITTLE_ENDIAN)
-        self.logger.debug(f"Footer Size: {self.iso_footer_size}")
+        self.logger.debug('Footer Size: %s', self.iso_footer_size)
 
         # TODO: Write ISO9660 Footer Parser
         #: ISO9660 Footer
@@ -36,18 +36,18 @@ class IRD(FileFormatWithMagic[IRDHeader]):
 
         #: TODO: Document this!
         self.region_count: int = read_u8(self.file_handle)
-        self.logger.debug(f"Region Count: {self.region_count}")
+        self.logger.debug('Region Count: %s', self.region_count)
 
         #: TODO: Document this!
         self.region_hashes: List[bytes] = []
         for i in range(0, self.region_count):
             region_hash: bytes = self.file_handle.read(16)
             self.region_hashes.append(region_hash)
-            self.logger.debug(f"Region {i} hash: {hexlify(region_hash)}")
+            self.logger.debug('Region %s hash: %s', i, LazyHex(region_hash))
 
         #: Number of file hash entries
         self.file_count: int = read_u32(self.file_handle, endianess=Endianess.LITTLE_ENDIAN)
-        self.logger.debug(f"File Count: {self.file_count}")
+        self.logger.debug('File Count: %s', self.file_count)
 
         #: File Key -> File Hash map
         self.file_map: Dict[bytes, bytes] = {}
@@ -55,7 +55,7 @@ class IRD(FileFormatWithMagic[IRDHeader]):
             file_key: bytes = self.file_handle.read(8)
             file_hash: bytes = self.file_handle.read(16)
             self.file_map[file_key] = file_hash
-            self.logger.debug(f"File {i}: {hexlify(file_key)} -> {hexlify(file_hash)}")
+            self.logger.debug('File %s: %s -> %s', i, LazyHex(file_key), LazyHex(file_hash))
 
         #: 4 byte padding
         self.padding: bytes = self.file_handle.read(4)
@@ -63,7 +63,7 @@ class IRD(FileFormatWithMagic[IRDHeader]):
         if self.version >= 9:
             #: See http://www.t10.org/ftp/t10/document.04/04-328r0.pdf#page=43
             self.pic: bytes = self.file_handle.read(115)
-            self.logger.debug(f"PIC: {hexlify(self.pic).decode('ASCII')}")
+            self.logger.debug('PIC: %s', LazyHex(self.pic, decode=True))
 
         #: Used to derive the disc AES encryption pkg_internal_fs_key
         self.data1: bytes = self.file_handle.read(16)
@@ -73,32 +73,33 @@ class IRD(FileFormatWithMagic[IRDHeader]):
         self.data2_decrypted: bytes = IRD.decrypt_data2(self.data2)
         #: Data2 Patched
         self.data2_patched: bytes = IRD.patch_data2(self.data2)
-        self.logger.info(f"Data1: {hexlify(self.data1).decode('ASCII')}")
-        self.logger.info(f"Data2: {hexlify(self.data2).decode('ASCII')}")
-        self.logger.info(f"Data2(decrypted): {hexlify(self.data2_decrypted).decode('ASCII')}")
-        self.logger.info(f"Data2(patched): {hexlify(self.data2_patched).decode('ASCII')}")
+        self.logger.info('Data1: %s', LazyHex(self.data1, decode=True))
+        self.logger.info('Data2: %s', LazyHex(self.data2, decode=True))
+        self.logger.info('Data2(decrypted): %s', LazyHex(self.data2_decrypted, decode=True))
+        self.logger.info('Data2(patched): %s', LazyHex(self.data2_patched, decode=True))
 
         if self.version < 9:
             #: See http://www.t10.org/ftp/t10/document.04/04-328r0.pdf#page=43
             self.pic: bytes = self.file_handle.read(115)
-            self.logger.debug(f"PIC: {hexlify(self.pic).decode('ASCII')}")
+            self.logger.debug('PIC: %s', LazyHex(self.pic, decode=True))
 
         if self.version > 7:
             #: TODO: Document this!
             self.uid: str = read_u32(self.file_handle, endianess=Endianess.LITTLE_ENDIAN)
-            self.logger.debug(f"UID: {self.uid}")
+            self.logger.debug('UID: %s', self.uid)
 
         if verify and self.verify(self.file_handle):
-            self.logger.info(f"CRC Verified")
+            self.logger.info('CRC Verified')
         else:
             raise InvalidIRDCRCException()
 
-        self.logger.info(f"File successfully parsed")
+        self.logger.info('File successfully parsed')
 
     def get_file_handle(self) -> IO:
         """
         Returns a file handle depending on if the IRD file
-        is gzip compressed, or already extracted.
+        is gzip compressed, or already extracted. Compressed
+        files can not be memory mapped.
         :return: file handle
         """
         with open(self.path, 'rb') as f:
@@ -1,42 +1,80 @@
-from binascii import hexlify
+import ctypes
+import mmap
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from typing import IO, AnyStr, List, Optional, Dict
 
 from cryptography.hazmat.primitives.ciphers import CipherContext, Cipher, algorithms, modes
 
-from base import LoggingClass
-from utils.utils import xor_lib, backend
+from base import LoggingClass, MappedFile
+from utils.errors import NativeLibraryNotFoundException
+from utils.utils import xor_lib, xor_lib_path, backend
 from .header import PkgHeader
 from .revision import PkgRevision
 from .type import PkgType
 
+_debug_xor_key_executor: Optional[ThreadPoolExecutor] = None
+_debug_xor_key_executor_lock: threading.Lock = threading.Lock()
+
+
+def debug_xor_key_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool shared by all debug xor key stream generations, creating it if needed.
+    :return: thread pool executor
+    """
+    global _debug_xor_key_executor
+    with _debug_xor_key_executor_lock:
+        if _debug_xor_key_executor is None:
+            _debug_xor_key_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+        return _debug_xor_key_executor
+
 
 class PkgInternalIO(IO, LoggingClass):
     SEEK_DATA_OFFSET: int = 4
+    COUNTER_MASK: int = (1 << 128) - 1
+    DEBUG_XOR_KEY_CHUNK_SIZE: int = 0x10000
 
-    def __init__(self, f: IO, header: PkgHeader, encryption_key: Optional[bytes]):
+    def __init__(self, f: IO, header: PkgHeader, encryption_key: Optional[bytes], use_aes_ctr: bool = True):
         super().__init__()
         self.header: PkgHeader = header
         self.f: IO = f
 
         self.encryption_key: Optional[bytes] = encryption_key
-        self.cipher: Optional[Cipher] = None
-        self.encryptor: Optional[CipherContext] = None
 
-        self.alternate_ciphers: Dict[bytes, Cipher] = {}
-        self.alternate_encryptors: Dict[bytes, CipherContext] = {}
+        #: Decrypt retail data using AES-128-CTR directly instead of generating and xoring the key stream
+        self.use_aes_ctr: bool = use_aes_ctr
+        #: Initial AES-128-CTR counter value
+        self.initial_counter: int = int.from_bytes(self.header.pkg_data_riv, 'big')
+
+        #: Debug PKGs (and retail ones without AES-128-CTR) are decrypted with the key stream of the native library
+        if xor_lib is None and not (self.header.revision == PkgRevision.RETAIL and use_aes_ctr):
+            raise NativeLibraryNotFoundException(xor_lib_path)
 
         if self.header.revision == PkgRevision.RETAIL:
             if encryption_key is None:
                 raise ValueError('Encryptor key was not supplied even though the PKG is a Retail PKG.')
-            self.cipher = Cipher(algorithms.AES(self.encryption_key), modes.ECB(), backend=backend)
-            self.encryptor = self.cipher.encryptor()
-            self.logger.info('Encryptor initialized...')
+
+        #: Per thread AES ECB cipher contexts used by the xor key stream path
+        self.thread_local_encryptors: threading.local = threading.local()
+        #: Per thread debug xor key stream buffers reused by :meth:`decrypt_into`
+        self.thread_local_xor_keys: threading.local = threading.local()
+
+        #: Read only memory map of the file, used by :meth:`read_at` on platforms without os.pread
+        self.mapping: Optional[mmap.mmap] = None
+        self.mapping_lock: threading.Lock = threading.Lock()
+        #: The file handle is memory mapped already, positional reads slice its mapping
+        self.mapped: bool = isinstance(f, MappedFile)
+        if self.mapped:
+            self.mapping = f.mapping
 
     def __enter__(self) -> 'PkgInternalIO':
         return self
 
     def __exit__(self, ext_type, ext_val, ext_trace) -> None:
-        pass
+        if self.mapping is not None and not self.mapped:
+            self.mapping.close()
+            self.mapping = None
 
     def seek(self, offset: int, whence: int = 0) -> int:
         if whence == PkgInternalIO.SEEK_DATA_OFFSET:
@@ -53,45 +91,230 @@ class PkgInternalIO(IO, LoggingClass):
     def generate_xor(self, starting_offset: int, size: int, encryptor: Optional[CipherContext]):
         #: Because of how the AES-128 encryption, we need to expand the xor key size to the next multiple of 16
         xor_key_size = xor_lib.next_multiple_of_16(size)
-        #: Allocate memory for the key
-        xor_key: bytes = bytes(xor_key_size)
 
         # 16-byte blocks since header specified DATA_OFFSET
         block_offset: int = (starting_offset - self.header.data_offset) // 16
         # IMPORTANT: This increments pkg_data_riv by 1
         if self.header.revision == PkgRevision.RETAIL:
+            #: Allocate memory for the key
+            xor_key: bytes = bytes(xor_key_size)
             #: Generate the retail xor key
             xor_lib.generate_xor_key(self.header.pkg_data_riv, xor_key_size, block_offset, xor_key)
             #: Finalize xor key
             return encryptor.update(bytes(xor_key))
         else:
             #: Generate the debug xor key (no encryption needed)
-            xor_lib.generate_debug_xor_key(self.header.digest, xor_key_size, block_offset, xor_key)
-            return bytes(xor_key)
+            return self.generate_debug_xor(block_offset, xor_key_size)
 
-    def read(self, n: int = -1, alternate_encryption_key: Optional[bytes] = None) -> AnyStr:
-        #: Copy offset to a variable so that we don't call tell() twice
-        offset: int = self.f.tell()
-        #: Get the xor offset (absolute position in data block aligned to 16)
-        xor_offset: int = (offset - self.header.data_offset) % 16
-
-        #: Check for alternate encryption key
-        if alternate_encryption_key is not self.encryption_key and alternate_encryption_key is not None:
-            #: Check if cipher context for said key is initialized
-            if alternate_encryption_key not in self.alternate_encryptors.keys():
-                #: Initialize cipher context
-                self.init_alternate_cipher(alternate_encryption_key)
-            #: Generate xor key using the alternate encryption key
-            xor_key: bytes = self.generate_xor(offset, n, self.alternate_encryptors[alternate_encryption_key])
+    def generate_debug_xor(self, block_offset: int, size: int) -> bytes:
+        """
+        Generates the debug xor key stream (one SHA-1 per 16 byte block).
+        :param block_offset: index of the first 16 byte block relative to the header data offset
+        :param size: key stream size, multiple of 16
+        :return: debug xor key stream
+        """
+        #: Allocate memory for the key
+        xor_key: ctypes.Array = ctypes.create_string_buffer(size)
+        self.generate_debug_xor_into(block_offset, size, xor_key)
+        return xor_key.raw
+
+    def generate_debug_xor_into(self, block_offset: int, size: int, xor_key: ctypes.Array) -> None:
+        """
+        Generates the debug xor key stream (one SHA-1 per 16 byte block) into the specified buffer.
+        Large key streams are split into chunks of DEBUG_XOR_KEY_CHUNK_SIZE bytes which are generated concurrently
+        by the native library (ctypes releases the GIL), each chunk starting at its own counter value.
+        :param block_offset: index of the first 16 byte block relative to the header data offset
+        :param size: key stream size, multiple of 16
+        :param xor_key: ctypes buffer of at least size bytes
+        :return: Nothing
+        """
+        def generate_chunk(chunk_offset: int) -> None:
+            chunk_size: int = min(PkgInternalIO.DEBUG_XOR_KEY_CHUNK_SIZE, size - chunk_offset)
+            xor_lib.generate_debug_xor_key(
+                self.header.digest, chunk_size, block_offset + chunk_offset // 16,
+                ctypes.c_char_p(ctypes.addressof(xor_key) + chunk_offset)
+            )
+
+        chunk_offsets: range = range(0, size, PkgInternalIO.DEBUG_XOR_KEY_CHUNK_SIZE)
+        if len(chunk_offsets) == 1:
+            generate_chunk(0)
         else:
-            #: Generate xor key using the default encryption key
-            xor_key: bytes = self.generate_xor(offset, n, self.encryptor)
+            for _ in debug_xor_key_executor().map(generate_chunk, chunk_offsets):
+                pass
+
+    def read(self, n: int = -1, alternate_encryption_key: Optional[bytes] = None) -> AnyStr:
+        #: Offset relative to the header data offset
+        offset: int = self.f.tell() - self.header.data_offset
+        return self.decrypt(offset, self.f.read(n), alternate_encryption_key)
+
+    def read_at(self, offset: int, n: int, alternate_encryption_key: Optional[bytes] = None) -> bytes:
+        """
+        Reads and decrypts data at the specified offset without touching the shared file position.
+        The keystream counter is derived purely from the offset and every thread uses its own cipher context,
+        so this can be called concurrently from any number of threads over a single file handle.
+        :param offset: offset relative to the header data offset
+        :param n: number of bytes to read
+        :param alternate_encryption_key: encryption key to use instead of the default one
+        :return: decrypted data
+        """
+        return self.decrypt(offset, self.pread(self.header.data_offset + offset, n), alternate_encryption_key)
+
+    def decrypt(self, offset: int, buffer: bytes, alternate_encryption_key: Optional[bytes] = None) -> bytes:
+        """
+        Decrypts data located at the specified offset.
+        Retail PKGs are decrypted as AES-128-CTR with pkg_data_riv as the initial counter in a single pass, debug
+        PKGs (or retail ones when use_aes_ctr is off) go through the generated xor key stream.
+        :param offset: offset of the data relative to the header data offset
+        :param buffer: encrypted data
+        :param alternate_encryption_key: encryption key to use instead of the default one
+        :return: decrypted data
+        """
+        key: bytes = self.encryption_key if alternate_encryption_key is None else alternate_encryption_key
+
+        if self.header.revision == PkgRevision.RETAIL and self.use_aes_ctr:
+            return self.ctr_decryptor(offset, key).update(buffer)
 
-        buffer: bytes = self.f.read(n)
+        #: The key stream starts at the 16 byte block containing the offset
+        xor_offset: int = offset % 16
+        xor_key: bytes = self.generate_xor(
+            self.header.data_offset + offset, xor_offset + len(buffer), self.thread_encryptor(key)
+        )
         xor_lib.xor(buffer, xor_key, len(buffer), xor_offset)
 
         return buffer
 
+    def readinto(self, b: bytearray, alternate_encryption_key: Optional[bytes] = None) -> int:
+        """
+        Reads and decrypts data at the current position into a preallocated, writable buffer.
+        :param b: target buffer
+        :param alternate_encryption_key: encryption key to use instead of the default one
+        :return: number of bytes read
+        """
+        #: Offset relative to the header data offset
+        offset: int = self.f.tell() - self.header.data_offset
+        view: memoryview = memoryview(b)
+        n: int = self.f.readinto(view)
+        self.decrypt_into(offset, view[:n], alternate_encryption_key)
+        return n
+
+    def readinto_at(self, offset: int, b: bytearray, alternate_encryption_key: Optional[bytes] = None) -> int:
+        """
+        Reads and decrypts data at the specified offset into a preallocated, writable buffer without touching the
+        shared file position, the data is decrypted in place so no intermediate buffers are allocated.
+        :param offset: offset relative to the header data offset
+        :param b: target buffer, its length is the number of bytes to read
+        :param alternate_encryption_key: encryption key to use instead of the default one
+        :return: number of bytes read
+        """
+        view: memoryview = memoryview(b)
+        n: int = self.preadinto(self.header.data_offset + offset, view)
+        self.decrypt_into(offset, view[:n], alternate_encryption_key)
+        return n
+
+    def decrypt_into(self, offset: int, buffer: memoryview, alternate_encryption_key: Optional[bytes] = None) -> None:
+        """
+        Decrypts data located at the specified offset in place.
+        :param offset: offset of the data relative to the header data offset
+        :param buffer: writable buffer holding the encrypted data
+        :param alternate_encryption_key: encryption key to use instead of the default one
+        :return: Nothing
+        """
+        if len(buffer) == 0:
+            return
+
+        key: bytes = self.encryption_key if alternate_encryption_key is None else alternate_encryption_key
+
+        if self.header.revision == PkgRevision.RETAIL and self.use_aes_ctr:
+            self.ctr_decryptor(offset, key).update_into(buffer, buffer)
+            return
+
+        #: The key stream starts at the 16 byte block containing the offset
+        xor_offset: int = offset % 16
+        if self.header.revision == PkgRevision.RETAIL:
+            xor_key: bytes = self.generate_xor(
+                self.header.data_offset + offset, xor_offset + len(buffer), self.thread_encryptor(key)
+            )
+        else:
+            #: Reuse the key stream buffer of the calling thread
+            xor_key_size: int = xor_lib.next_multiple_of_16(xor_offset + len(buffer))
+            xor_key: ctypes.Array = getattr(self.thread_local_xor_keys, 'xor_key', None)
+            if xor_key is None or len(xor_key) < xor_key_size:
+                xor_key = self.thread_local_xor_keys.xor_key = ctypes.create_string_buffer(xor_key_size)
+            self.generate_debug_xor_into(offset // 16, xor_key_size, xor_key)
+        xor_lib.xor((ctypes.c_char * len(buffer)).from_buffer(buffer), xor_key, len(buffer), xor_offset)
+
+    def ctr_decryptor(self, offset: int, key: bytes) -> CipherContext:
+        """
+        Creates an AES-128-CTR cipher context positioned at the specified offset.
+        :param offset: offset relative to the header data offset
+        :param key: encryption key
+        :return: cipher context
+        """
+        counter: int = (self.initial_counter + offset // 16) & PkgInternalIO.COUNTER_MASK
+        decryptor: CipherContext = Cipher(
+            algorithms.AES(key), modes.CTR(counter.to_bytes(16, 'big')), backend=backend
+        ).decryptor()
+        #: Skip the part of the key stream block preceding the offset
+        if offset % 16 != 0:
+            decryptor.update(bytes(offset % 16))
+        return decryptor
+
+    def pread(self, offset: int, n: int) -> bytes:
+        """
+        Reads raw data at the specified absolute offset without touching the shared file position.
+        :param offset: absolute file offset
+        :param n: number of bytes to read
+        :return: raw data
+        """
+        if hasattr(os, 'pread') and not self.mapped:
+            return os.pread(self.f.fileno(), n, offset)
+        else:
+            #: Memory mapped or no os.pread (Windows), slice a read only memory map of the file
+            return self.memory_map()[offset:offset + n]
+
+    def preadinto(self, offset: int, buffer: memoryview) -> int:
+        """
+        Reads raw data at the specified absolute offset into a buffer without touching the shared file position.
+        :param offset: absolute file offset
+        :param buffer: writable buffer, its length is the number of bytes to read
+        :return: number of bytes read
+        """
+        if hasattr(os, 'preadv') and not self.mapped:
+            return os.preadv(self.f.fileno(), [buffer], offset)
+        else:
+            #: Memory mapped or no os.preadv, copy from a read only memory map of the file
+            with memoryview(self.memory_map()) as mapping:
+                with mapping[offset:offset + len(buffer)] as data:
+                    buffer[:len(data)] = data
+                    return len(data)
+
+    def memory_map(self) -> mmap.mmap:
+        """
+        Returns a read only memory map of the file, creating it if needed.
+        :return: memory map
+        """
+        if self.mapping is None:
+            with self.mapping_lock:
+                if self.mapping is None:
+                    self.mapping = mmap.mmap(self.f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.mapping
+
+    def thread_encryptor(self, key: bytes) -> Optional[CipherContext]:
+        """
+        Returns the AES ECB cipher context of the calling thread for the specified key, creating it if needed.
+        :param key: encryption key
+        :return: cipher context, None for debug PKGs
+        """
+        if self.header.revision != PkgRevision.RETAIL:
+            return None
+
+        encryptors: Dict[bytes, CipherContext] = getattr(self.thread_local_encryptors, 'encryptors', None)
+        if encryptors is None:
+            encryptors = self.thread_local_encryptors.encryptors = {}
+        if key not in encryptors:
+            encryptors[key] = Cipher(algorithms.AES(key), modes.ECB(), backend=backend).encryptor()
+        return encryptors[key]
+
     def readable(self) -> bool:
         return True
 
@@ -103,19 +326,3 @@ class PkgInternalIO(IO, LoggingClass):
 
     def writelines(self, lines: List[AnyStr]) -> None:
         pass
-
-    def init_alternate_cipher(self, alternate_encryption_key: bytes) -> None:
-        """
-        Initializes the alternate cipher context using the specified encryption key.
-        :param alternate_encryption_key: encryption key
-        :return: Nothing
-        """
-        #: Initialize AES ECB cipher with alternate_encryption_key
-        cipher: Cipher = Cipher(algorithms.AES(alternate_encryption_key), modes.ECB(), backend=backend)
-        #: Initialize AES ECB cipher context
-        encryptor: CipherContext = cipher.encryptor()
-        #: Add cipher to alternate_ciphers dict
-        self.alternate_ciphers[alternate_encryption_key] = cipher
-        #: Add encryptor to alternate_encryptors dict
-        self.alternate_encryptors[alternate_encryption_key] = encryptor
-        self.logger.debug(f'Alternate Cipher initialized for key {hexlify(alternate_encryption_key).decode("ASCII")}')
@@ -1,2 +1,3 @@
 from .entry import PkgEntry
 from .type import EntryType
+from .table import PkgEntryTable
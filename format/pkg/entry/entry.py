@@ -1,18 +1,31 @@
 from __future__ import annotations
 
+import logging
 import os
+import struct
 from binascii import hexlify
+from concurrent.futures import Future
+from typing import IO, List, Optional, Tuple, Union
 
 from base import LoggingClass
+from base.write_behind import WriteBehind
 from base.utils import constant_check
 from ..utils import name_codec_map
 from utils.keys import PS3_GPKG_KEY, PSP_GPKG_KEY
-from utils.utils import DEFAULT_LOCAL_IO_BLOCK_SIZE, read_u32, read_u64, Endianess, decode_data_with_all_codecs, sha1
+from utils.utils import DEFAULT_LOCAL_IO_BLOCK_SIZE, decode_data_with_all_codecs, sha1
 from .type import EntryType
 from ..decryptor import PkgInternalIO
 
 
 class PkgEntry(LoggingClass):
+    __slots__ = (
+        'name_offset', 'name_size', 'file_offset', 'file_size', 'overwrite', 'is_psp', 'entry_type', 'padding', 'name',
+        'name_codec', '__data_key'
+    )
+
+    STRUCT: struct.Struct = struct.Struct('>IIQQII')
+    """Entry table record layout: name offset, name size, file offset, file size, flags, padding"""
+
     def __init__(self):
         """
         Init
@@ -53,75 +66,115 @@ class PkgEntry(LoggingClass):
         """Data encryption key, do not change this unless critically needed"""
 
     @staticmethod
-    def read_from_file(f: PkgInternalIO) -> PkgEntry:
+    def read_from_file(f: PkgInternalIO, entry_table: Optional[IO] = None) -> PkgEntry:
         """
         Reads data into the entry from the file
 
         Args:
             f: file handle
+            entry_table: already decrypted entry table positioned at the entry, if None the entry is read from f
 
         Returns:
             constructed PkgEntry
         """
-        #: Initialize entry
-        entry: PkgEntry = PkgEntry()
+        if entry_table is None:
+            entry_table = f
 
-        entry.name_offset = read_u32(f, endianess=Endianess.BIG_ENDIAN)
-        entry.logger.debug(f"Name Offset: {entry.name_offset}")
+        entry: PkgEntry = PkgEntry.from_record(
+            PkgEntry.STRUCT.unpack(entry_table.read(PkgEntry.size())), f.encryption_key
+        )
 
-        entry.name_size = read_u32(f, endianess=Endianess.BIG_ENDIAN)
-        entry.logger.debug(f"Name Size: {entry.name_size}")
+        #: Name data in bytes, name offset is relative to the header.data_offset value
+        entry.decode_name(f.read_at(entry.name_offset, entry.name_size, entry.data_key))
 
-        entry.file_offset = read_u64(f, endianess=Endianess.BIG_ENDIAN)
-        entry.logger.debug(f"File Offset: {entry.file_offset}")
+        return entry
 
-        entry.file_size = read_u64(f, endianess=Endianess.BIG_ENDIAN)
-        entry.logger.info(f"File Size: {entry.file_size}")
+    @staticmethod
+    def from_record(record: Tuple[int, int, int, int, int, int], encryption_key: bytes,
+                    check: bool = True) -> PkgEntry:
+        """
+        Constructs the entry from an unpacked entry table record, the name has to be set using :meth:`decode_name`
 
-        # TODO: Use flags or do this better somehow
-        #: Read entry flags & type
-        entry_flags = read_u32(f, endianess=Endianess.BIG_ENDIAN)
+        Args:
+            record: entry table record unpacked using :attr:`STRUCT`
+            encryption_key: key the entry table is encrypted with
+            check: validate and log the record, disabled for records that were already validated
 
+        Returns:
+            constructed PkgEntry
+        """
+        #: Initialize entry
+        entry: PkgEntry = PkgEntry()
+
+        entry.name_offset, entry.name_size, entry.file_offset, entry.file_size, entry_flags, entry.padding = record
+
+        # TODO: Use flags or do this better somehow
         entry.overwrite = (entry_flags >> 24 & 0x80) > 0
-        entry.logger.debug(f"Overwrite: {entry.overwrite}")
 
         #: Should we use the PSP_GPKG_KEY to decrypt data & name
         entry.is_psp = (entry_flags >> 24 & 0x10) > 0
-        entry.logger.debug(f"PSP: {entry.is_psp}")
 
         #: Entry type
         entry.entry_type = EntryType(entry_flags & 0xFF)
-        entry.logger.info(f"Entry Type: {entry.entry_type}")
 
-        #: Pad to 32 bytes
-        entry.padding = read_u32(f, endianess=Endianess.BIG_ENDIAN)
-        constant_check(entry.logger, "Padding", entry.padding, valid=0)
+        if check:
+            #: Field dump, guarded as this runs once per entry
+            if PkgEntry.logger.isEnabledFor(logging.INFO):
+                entry.logger.debug('Name Offset: %s', entry.name_offset)
+                entry.logger.debug('Name Size: %s', entry.name_size)
+                entry.logger.debug('File Offset: %s', entry.file_offset)
+                entry.logger.info('File Size: %s', entry.file_size)
+                entry.logger.debug('Overwrite: %s', entry.overwrite)
+                entry.logger.debug('PSP: %s', entry.is_psp)
+                entry.logger.info('Entry Type: %s', entry.entry_type)
+
+            #: Pad to 32 bytes
+            constant_check(entry.logger, "Padding", entry.padding, valid=0)
 
         # TODO
         #  It's ugly but I don't have a better solution for now, the only other thing that could be done would be to
         #  read the name data separately from reading the metadata, this gives us a problem with having to take the
         #  is_psp value externally and change it per file so I think this is the best way, period
-        if f.encryption_key == PSP_GPKG_KEY and not entry.is_psp:
+        if encryption_key == PSP_GPKG_KEY and not entry.is_psp:
             entry.__data_key = PS3_GPKG_KEY
         else:
-            entry.__data_key = f.encryption_key
+            entry.__data_key = encryption_key
+
+        return entry
+
+    def decode_name(self, name_data: bytes) -> None:
+        """
+        Decodes the decrypted name data into :attr:`name`, falling back to the codecs from naming_exceptions.txt
 
-        #: Seek to the name offset, relative to the header.data_offset value
-        f.seek(entry.name_offset, PkgInternalIO.SEEK_DATA_OFFSET)
-        #: Name data in bytes
-        name_data: bytes = f.read(entry.name_size, entry.data_key)
+        Args:
+            name_data: decrypted name data
+        """
+        self.name, self.name_codec = PkgEntry.decode_name_data(name_data)
+        self.logger.info('Name: %s', self.name)
 
+    @staticmethod
+    def decode_name_data(name_data: bytes) -> Tuple[str, str]:
+        """
+        Decodes decrypted name data, falling back to the codecs from naming_exceptions.txt
+
+        Args:
+            name_data: decrypted name data
+
+        Returns:
+            file name, including path and the codec it was decoded with
+        """
         try:
             #: File name, including path
-            entry.name: str = name_data.decode('UTF-8')
+            return name_data.decode('UTF-8'), 'UTF-8'
         except UnicodeDecodeError as e:
             try:
                 #: File name codec fallback
-                entry.name = name_data.decode(name_codec_map[sha1(name_data)].strip())
+                name_codec: str = name_codec_map[sha1(name_data)].strip()
+                return name_data.decode(name_codec), name_codec
             except KeyError:
                 #: If all else fails, try all codecs and find a suitable one, add this to naming_exceptions.txt manually
                 for codec, string in decode_data_with_all_codecs(name_data):
-                    entry.logger.error(
+                    PkgEntry.logger.error(
                         f'{codec:15}('
                         f'{hexlify(sha1(name_data)).decode().upper()},'
                         f'{codec:15},'
@@ -129,9 +182,6 @@ class PkgEntry(LoggingClass):
                         f') -> {string}'
                     )
                 raise e
-        entry.logger.info(f"Name: {entry.name}")
-
-        return entry
 
     @property
     def data_key(self) -> bytes:
@@ -162,10 +212,19 @@ class PkgEntry(LoggingClass):
         Returns:
             Size of a file entry structure in bytes
         """
-        return 32
+        return PkgEntry.STRUCT.size
 
-    def export(self, f: PkgInternalIO, path: str, block_size: int = DEFAULT_LOCAL_IO_BLOCK_SIZE,
-               use_package_path: bool = False, create_directories: bool = True) -> bool:
+    def export_path(self, path: str, use_package_path: bool = False) -> str:
+        """
+        Resolves the path this entry is exported to
+
+        Args:
+            path: target file, or target directory if it exists or ends with a path separator
+            use_package_path: append the full entry name (including its path) to a target directory
+
+        Returns:
+            export path
+        """
         if (os.path.exists(path) and os.path.isdir(path)) or (not os.path.exists(path) and path.endswith(('/', '\\'))):
             if use_package_path:
                 path = os.path.join(path, self.name)
@@ -173,27 +232,75 @@ class PkgEntry(LoggingClass):
                 path = os.path.join(path, os.path.basename(self.name))
         elif os.path.isfile(path):
             pass
+        return path
+
+    def export(self, f: PkgInternalIO, path: str, block_size: int = DEFAULT_LOCAL_IO_BLOCK_SIZE,
+               use_package_path: bool = False, create_directories: bool = True,
+               data: Optional[memoryview] = None, writer: Optional[WriteBehind] = None) -> bool:
+        """
+        Exports the entry, creates the directory of directory entries
+
+        Args:
+            f: file handle
+            path: target file, or target directory if it exists or ends with a path separator
+            block_size: size of the blocks the file is read, decrypted and written in
+            use_package_path: append the full entry name (including its path) to a target directory
+            create_directories: create needed directory structure
+            data: encrypted file data already read by the caller (ex. as part of a coalesced read), decrypted in
+                place and written instead of reading the file, must not be reused before the writer is closed
+            writer: write-behind stage the file is written through, written synchronously if None
+
+        Returns:
+            True if the entry was exported
+        """
+        path = self.export_path(path, use_package_path)
 
         directory: str = os.path.dirname(path)
         # TODO: Do we really need this? Maybe for logging?
         # file_name: str = os.path.basename(path)
 
         if create_directories and not os.path.exists(directory):
-            os.makedirs(directory)
+            #: Other extraction workers may be creating the same directory concurrently
+            os.makedirs(directory, exist_ok=True)
 
         if self.is_file:
-            self.logger.info(f'Extracting file: {self.name} -> {path}')
+            self.logger.info('Extracting file: %s -> %s', self.name, path)
             if not os.path.exists(path) or self.overwrite:
-                with open(path, 'wb') as export:
-                    f.seek(self.file_offset, PkgInternalIO.SEEK_DATA_OFFSET)
+                with open(path, 'wb') if writer is None else writer.open(path) as export:
+                    if data is not None:
+                        f.decrypt_into(self.file_offset, data, self.data_key)
+                        export.write(data)
+                        return True
+
+                    offset: int = self.file_offset
+
+                    #: Buffers reused for every block, data is read and decrypted in place. Written behind, one
+                    #: buffer is filled while the other one is being written
+                    buffers: List[memoryview] = [
+                        memoryview(bytearray(min(block_size, self.file_size)))
+                        for _ in range(1 if writer is None else 2)
+                    ]
+                    pending: List[Optional[Future]] = [None] * len(buffers)
 
                     bytes_remaining: int = self.file_size
+                    index: int = 0
                     while bytes_remaining != 0:
+                        slot: int = index % len(buffers)
+                        if pending[slot] is not None:
+                            pending[slot].result()
                         to_read: int = block_size if bytes_remaining >= block_size else bytes_remaining
-                        bytes_remaining -= export.write(f.read(to_read, self.data_key))
+                        read: int = f.readinto_at(offset, buffers[slot][:to_read], self.data_key)
+                        if read == 0:
+                            raise EOFError(f'{self.name} is truncated')
+                        written: Union[int, Future] = export.write(buffers[slot][:read])
+                        if writer is not None:
+                            pending[slot] = written
+                        offset += read
+                        bytes_remaining -= read
+                        index += 1
 
                     return True
         else:
-            self.logger.info(f'Creating directory: {self.name} -> {path}')
-            os.makedirs(path)
+            self.logger.info('Creating directory: %s -> %s', self.name, path)
+            os.makedirs(path, exist_ok=True)
             return True
@@ -0,0 +1,99 @@
+from array import array
+from typing import Dict, Set
+
+from base.entry_table import EntryTable, NameTable, columns
+from base.utils import constant_check
+from utils.keys import PS3_GPKG_KEY, PSP_GPKG_KEY
+from .entry import PkgEntry
+from .type import EntryType
+
+
+class PkgEntryTable(EntryTable[PkgEntry]):
+    """
+    Columnar PKG entry table, entries are :class:`PkgEntry` views built on access
+    """
+
+    def __init__(self, entry_table: bytes, encryption_key: bytes):
+        """
+        Init
+
+        Args:
+            entry_table: decrypted entry table
+            encryption_key: key the entry table is encrypted with
+        """
+        self.name_offsets: array
+        """Name offsets relative to the :attr:`~format.pkg.header.PkgHeader.data_offset` value"""
+
+        self.name_sizes: array
+        """Name sizes in bytes"""
+
+        self.file_offsets: array
+        """File offsets relative to the :attr:`~format.pkg.header.PkgHeader.data_offset` value"""
+
+        self.file_sizes: array
+        """File sizes in bytes"""
+
+        self.flags: array
+        """Raw entry flags, overwrite and PSP bits and the entry type"""
+
+        paddings: array
+        self.name_offsets, self.name_sizes, self.file_offsets, self.file_sizes, self.flags, paddings = columns(
+            list(PkgEntry.STRUCT.iter_unpack(entry_table)), 'IIQQII'
+        )
+
+        #: Validated once for the whole table, views are built without checks
+        for padding in set(paddings):
+            constant_check(PkgEntry.logger, 'Padding', padding, valid=0)
+        entry_types: Set[int] = set(flag & 0xFF for flag in self.flags)
+        for entry_type in entry_types:
+            EntryType(entry_type)
+
+        self.encryption_key: bytes = encryption_key
+        """Key the entry table is encrypted with"""
+
+        self.names: NameTable = NameTable()
+        """Names of every entry, set using :meth:`append_name` in entry order"""
+
+        self.name_codecs: Dict[int, str] = {}
+        """Name codecs of the entries which are not UTF-8"""
+
+    def __len__(self) -> int:
+        return len(self.flags)
+
+    def append_name(self, name_data: bytes) -> None:
+        """
+        Decodes and stores the name of the next entry
+
+        Args:
+            name_data: decrypted name data
+        """
+        name, name_codec = PkgEntry.decode_name_data(name_data)
+        if name_codec != 'UTF-8':
+            self.name_codecs[len(self.names)] = name_codec
+        self.names.append(name)
+
+    def data_key(self, index: int) -> bytes:
+        """
+        Data key of an entry without building its view
+
+        Args:
+            index: entry index
+
+        Returns:
+            data key
+        """
+        if self.encryption_key == PSP_GPKG_KEY and not self.flags[index] >> 24 & 0x10:
+            return PS3_GPKG_KEY
+        return self.encryption_key
+
+    def entry(self, index: int) -> PkgEntry:
+        entry: PkgEntry = PkgEntry.from_record(
+            (
+                self.name_offsets[index], self.name_sizes[index], self.file_offsets[index], self.file_sizes[index],
+                self.flags[index], 0
+            ), self.encryption_key, check=False
+        )
+        if index < len(self.names):
+            entry.name = self.names[index]
+            entry.name_codec = self.name_codecs.get(index, 'UTF-8')
+        return entry
@@ -3,7 +3,7 @@ from binascii import hexlify
 from io import BytesIO
 from typing import IO, List
 
-from base import LoggingClass
+from base import LazyHex, LoggingClass
 from format.pkg.content_type import ContentType
 from format.pkg.drm_type import DrmType
 from format.pkg.errors import InvalidPKGException, InvalidPKGMetadataSizeException, InvalidPKGMetadataException
@@ -26,10 +26,10 @@ class PkgMetadata(LoggingClass):
         self.id = read_u32(f, endianess=Endianess.BIG_ENDIAN)
         self.data_size = read_u32(f, endianess=Endianess.BIG_ENDIAN)
         self.data = f.read(self.data_size)
-        self.logger.debug(f'Identifier: {hex(self.id)}')
-        self.logger.info(f'Type: {self.category_name}')
-        self.logger.debug(f'Data Size: {hex(self.data_size)}')
-        self.logger.info(f'Data: {hexlify(self.data)}')
+        self.logger.debug('Identifier: %#x', self.id)
+        self.logger.info('Type: %s', self.category_name)
+        self.logger.debug('Data Size: %#x', self.data_size)
+        self.logger.info('Data: %s', LazyHex(self.data))
 
         if len(self.possible_sizes) != 0 and self.data_size not in self.__class__.possible_sizes:
             raise InvalidPKGMetadataSizeException(self.data_size, self.possible_sizes)
@@ -57,7 +57,7 @@ class DrmTypeMetadata(PkgMetadata):
     def __init__(self, f: IO):
         super().__init__(f)
         self.drm_type: DrmType = DrmType(struct.unpack('>I', self.data)[0])
-        self.logger.info(f'Drm Type: {self.drm_type}')
+        self.logger.info('Drm Type: %s', self.drm_type)
 
 
 class ContentTypeMetadata(PkgMetadata):
@@ -72,7 +72,7 @@ class ContentTypeMetadata(PkgMetadata):
     def __init__(self, f: IO):
         super().__init__(f)
         self.content_type: ContentType = ContentType(struct.unpack('>I', self.data)[0])
-        self.logger.info(f'Content Type: {self.content_type}')
+        self.logger.info('Content Type: %s', self.content_type)
 
     @property
     def install_path(self) -> str:
@@ -99,7 +99,7 @@ class PackageSizeMetadata(PkgMetadata):
     def __init__(self, f: IO):
         super().__init__(f)
         self.package_size: int = struct.unpack('>Q', self.data)[0]
-        self.logger.info(f'Package Size: {self.package_size}')
+        self.logger.info('Package Size: %s', self.package_size)
 
 
 class PkgMetaDataMetadata(PkgMetadata):
@@ -115,8 +115,8 @@ class PkgMetaDataMetadata(PkgMetadata):
             hexlify(self.data[2:3]).decode("utf-8"),
             hexlify(self.data[3:4]).decode("utf-8")
         )
-        self.logger.info(f'Make Package NPDRM Revision: {self.make_package_npdrm_rev}')
-        self.logger.info(f'Package Version: {self.package_version}')
+        self.logger.info('Make Package NPDRM Revision: %s', self.make_package_npdrm_rev)
+        self.logger.info('Package Version: %s', self.package_version)
 
 
 class TitleIdMetadata(PkgMetadata):
@@ -128,7 +128,7 @@ class TitleIdMetadata(PkgMetadata):
     def __init__(self, f: IO):
         super().__init__(f)
         self.title_id = str(self.data)
-        self.logger.info(f'Title ID: {self.title_id}')
+        self.logger.info('Title ID: %s', self.title_id)
 
 
 class QADigestMetadata(PkgMetadata):
@@ -140,7 +140,7 @@ class QADigestMetadata(PkgMetadata):
     def __init__(self, f: IO):
         super().__init__(f)
         self.qa_digest = self.data
-        self.logger.info(f'QA Digest: {hexlify(self.qa_digest)}')
+        self.logger.info('QA Digest: %s', LazyHex(self.qa_digest))
 
 
 class VersionMetadata(PkgMetadata):
@@ -167,9 +167,9 @@ class VersionMetadata(PkgMetadata):
             hexlify(self.data[4:5]).decode("utf-8"),
             hexlify(self.data[5:6]).decode("utf-8")
         )
-        self.logger.info(f'System Version: {self.system_version}')
-        self.logger.info(f'Package Version: {self.package_version}')
-        self.logger.info(f'App Version: {self.app_version}')
+        self.logger.info('System Version: %s', self.system_version)
+        self.logger.info('Package Version: %s', self.package_version)
+        self.logger.info('App Version: %s', self.app_version)
 
 
 class UnknownMetadata(PkgMetadata):
@@ -191,7 +191,7 @@ class UnknownMetadata(PkgMetadata):
     def __init__(self, f: IO):
         super().__init__(f)
         # TODO: Investigate what this is
-        self.logger.info(f'Unknown: {hexlify(self.data)}')
+        self.logger.info('Unknown: %s', LazyHex(self.data))
 
 
 class InstallDirectoryMetadata(PkgMetadata):
@@ -203,7 +203,7 @@ class InstallDirectoryMetadata(PkgMetadata):
     def __init__(self, f: IO):
         super().__init__(f)
         self.install_directory: str = self.data.decode('utf-8')
-        self.logger.info(f'Install Directory: {self.install_directory}')
+        self.logger.info('Install Directory: %s', self.install_directory)
 
 
 class Unknown2Metadata(PkgMetadata):
@@ -215,7 +215,7 @@ class Unknown2Metadata(PkgMetadata):
     def __init__(self, f: IO):
         super().__init__(f)
         # TODO: Investigate what this is
-        self.logger.info(f'Unknown (seen in PSP cumulative patch): {hexlify(self.data)}')
+        self.logger.info('Unknown (seen in PSP cumulative patch): %s', LazyHex(self.data))
 
 
 class Unknown3Metadata(PkgMetadata):
@@ -227,7 +227,7 @@ class Unknown3Metadata(PkgMetadata):
     def __init__(self, f: IO):
         super().__init__(f)
         # TODO: Investigate what this is
-        self.logger.info(f'Unknown: {hexlify(self.data)}')
+        self.logger.info('Unknown: %s', LazyHex(self.data))
 
 
 class IndexTableMetadata(PkgMetadata):
@@ -239,13 +239,13 @@ class IndexTableMetadata(PkgMetadata):
     def __init__(self, f: IO):
         super().__init__(f)
         self.offset: int = unpack_u32(self.data[0x00:0x04], endianess=Endianess.BIG_ENDIAN)
-        self.logger.info(f'Offset: {self.offset}')
+        self.logger.info('Offset: %s', self.offset)
 
         self.size: int = unpack_u32(self.data[0x04:0x08], endianess=Endianess.BIG_ENDIAN)
-        self.logger.info(f'Size: {self.size}')
+        self.logger.info('Size: %s', self.size)
 
         self.sha_256_hash: bytes = self.data[0x08:0x28]
-        self.logger.info(f'SHA-256 Hash: {hexlify(self.sha_256_hash)}')
+        self.logger.info('SHA-256 Hash: %s', LazyHex(self.sha_256_hash))
 
 
 class ParamSFOMetadata(PkgMetadata):
@@ -295,11 +295,11 @@ class PublishingMetadata(PkgMetadata):
             hexlify(self.data[0x00:0x01]).decode("utf-8"),
             hexlify(self.data[0x01:0x04]).decode("utf-8")
         )
-        self.logger.info(f'Publishing Tools Version: {self.publishing_tools_version}')
+        self.logger.info('Publishing Tools Version: %s', self.publishing_tools_version)
 
         # TODO: Determine how to actually decode this
         self.psf_builder_version: str = hexlify(self.data[0x00:0x04]).decode("utf-8")
-        self.logger.info(f'PSF Builder Version: {self.psf_builder_version}')
+        self.logger.info('PSF Builder Version: %s', self.psf_builder_version)
 
 
 class SelfMetadata(PkgMetadata):
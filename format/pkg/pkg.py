@@ -1,17 +1,26 @@
 import hashlib
+import logging
+import operator
 import os
-from typing import List, Optional
+import tempfile
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import IO, Dict, List, Optional, Tuple, Union
 
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes, CipherContext
 
+from base.errors import InvalidFileHashException
 from base.file_format import FileFormatWithMagic
+from base.name_filter import NameFilter
+from base.read_plan import PlannedRead, plan_reads
+from base.write_behind import DEFAULT_WRITE_QUEUE_DEPTH, WriteBehind, WriteBehindFile
 from format.pkg.metadata import ContentTypeMetadata
 from format.pkg.type import PkgType
 from utils.keys import PS3_GPKG_KEY, PSP_GPKG_KEY, PSP2_GPKG_KEY0, PSP2_GPKG_KEY1, PSP2_GPKG_KEY2
 from utils.utils import DEFAULT_LOCAL_IO_BLOCK_SIZE, backend
 from .content_type import ContentType
 from .decryptor import PkgInternalIO
-from .entry import PkgEntry
+from .entry import PkgEntry, PkgEntryTable
 from .errors import InvalidPKGHeaderHashException
 from .header import PkgHeader
 from .metadata import PkgMetadata
@@ -19,9 +28,21 @@ from .revision import PkgRevision
 
 
 class PKG(FileFormatWithMagic[PkgHeader]):
+    #: Names spread over a larger region than this are read one by one instead of in a single read
+    NAME_REGION_MAX_SIZE: int = 64 * 1024 * 1024
 
-    def __init__(self, path: str, verify: bool = True):
-        super().__init__(path, PkgHeader, verify)
+    def __init__(self, path: str, verify: bool = True, lazy: bool = False, use_mmap: bool = False):
+        """
+        Init
+
+        Args:
+            path: PKG file path
+            verify: verify the whole file SHA-1 hash
+            lazy: only parse the header, metadata and entries are read on first access of :attr:`metadata` and
+                :attr:`files`
+            use_mmap: access the file through a memory map instead of read syscalls
+        """
+        super().__init__(path, PkgHeader, verify, use_mmap)
 
         sha1 = hashlib.sha1()
         self.file_handle.seek(0x00)
@@ -33,20 +54,108 @@ class PKG(FileFormatWithMagic[PkgHeader]):
         else:
             self.logger.info('Header SHA1 Hash Verified!')
 
-        self.metadata: List[PkgMetadata] = []
+        self._metadata: Optional[List[PkgMetadata]] = None
+        self._files: Optional[List[PkgEntry]] = None
+
+        if not lazy:
+            self.read_metadata()
+            self.read_files()
+
+    @property
+    def metadata(self) -> List[PkgMetadata]:
+        """
+        Metadata records, read on first access when opened lazily
+
+        Returns:
+            metadata records
+        """
+        if self._metadata is None:
+            self.read_metadata()
+        return self._metadata
+
+    @property
+    def files(self) -> PkgEntryTable:
+        """
+        File entries, read on first access when opened lazily
+
+        Returns:
+            file entries
+        """
+        if self._files is None:
+            self.read_files()
+        return self._files
+
+    def select(self, name_filter: Optional[NameFilter] = None) -> List[PkgEntry]:
+        """
+        Entries selected by a name filter, names are matched on the name table so views are only built for the
+        selected entries and no file data is read
+
+        Args:
+            name_filter: name filter, every entry is selected if None
+
+        Returns:
+            selected entries in table order
+        """
+        files: PkgEntryTable = self.files
+        if name_filter is None or name_filter.selects_all:
+            return list(files)
+        return [files[index] for index, name in enumerate(files.names) if name_filter.matches(name)]
+
+    def read_metadata(self) -> None:
+        """
+        Reads the metadata records
+        """
+        metadata: List[PkgMetadata] = []
         self.file_handle.seek(self.header.metadata_offset)
 
         for metadata_index in range(0, self.header.metadata_count):
-            self.logger.info(f'Processing metadata #{metadata_index}:')
-            self.metadata.append(PkgMetadata.create(self.file_handle))
+            self.logger.info('Processing metadata #%s:', metadata_index)
+            metadata.append(PkgMetadata.create(self.file_handle))
+
+        self._metadata = metadata
 
-        self.file_handle.seek(self.header.data_offset)
-        self.files: List[PkgEntry] = []
+    def read_files(self) -> None:
+        """
+        Reads the file entries, the entry table and the name region are each read and decrypted at once
+        """
         with PkgInternalIO(self.file_handle, self.header, self.internal_fs_key) as f:
-            for item_index in range(0, self.header.item_count):
-                self.logger.info(f'Processing file #{item_index}:')
-                self.file_handle.seek(self.header.data_offset + PkgEntry.size() * item_index)
-                self.files.append(PkgEntry.read_from_file(f))
+            files: PkgEntryTable = PkgEntryTable(
+                f.read_at(0x00, PkgEntry.size() * self.header.item_count), f.encryption_key
+            )
+
+            if len(files) != 0:
+                name_region_start: int = min(files.name_offsets)
+                name_region_end: int = max(map(operator.add, files.name_offsets, files.name_sizes))
+            else:
+                name_region_start = name_region_end = 0
+
+            if name_region_end - name_region_start <= PKG.NAME_REGION_MAX_SIZE:
+                name_region: bytes = f.pread(self.header.data_offset + name_region_start,
+                                             name_region_end - name_region_start)
+                #: Name region decrypted with every data key in use (PS3 and PSP entries can be mixed)
+                decrypted_name_regions: Dict[bytes, bytearray] = {}
+                for index in range(len(files)):
+                    data_key: bytes = files.data_key(index)
+                    if data_key not in decrypted_name_regions:
+                        decrypted_name_region: bytearray = bytearray(name_region)
+                        f.decrypt_into(name_region_start, memoryview(decrypted_name_region), data_key)
+                        decrypted_name_regions[data_key] = decrypted_name_region
+                    name_offset: int = files.name_offsets[index] - name_region_start
+                    files.append_name(bytes(
+                        decrypted_name_regions[data_key][name_offset:name_offset + files.name_sizes[index]]
+                    ))
+            else:
+                #: Names are scattered around the data, read them one by one
+                for index in range(len(files)):
+                    files.append_name(
+                        f.read_at(files.name_offsets[index], files.name_sizes[index], files.data_key(index))
+                    )
+
+        if self.logger.isEnabledFor(logging.INFO):
+            for index, entry in enumerate(files):
+                self.logger.info('Entry #%s (%s, %s): %s', index, entry.entry_type, entry.file_size, entry.name)
+
+        self._files = files
 
     @property
     def internal_fs_key(self) -> bytes:
@@ -92,3 +201,210 @@ class PKG(FileFormatWithMagic[PkgHeader]):
                use_package_path: bool = False, create_directories: bool = True) -> bool:
         with PkgInternalIO(self.file_handle, self.header, self.internal_fs_key) as f:
             return entry.export(f, path, block_size, use_package_path, create_directories)
+
+    def extract(self, path: str, jobs: int = 1, block_size: int = DEFAULT_LOCAL_IO_BLOCK_SIZE,
+                use_package_path: bool = True, create_directories: bool = True,
+                write_queue_depth: int = DEFAULT_WRITE_QUEUE_DEPTH, name_filter: Optional[NameFilter] = None) -> None:
+        """
+        Extracts all entries of the PKG, spreading the reads across a pool of worker threads.
+
+        File entries are read in the order they are stored in (see :func:`~base.read_plan.plan_reads`), small files
+        stored next to each other are read with a single read and decrypted from memory, files larger than
+        block_size are streamed on their own.
+
+        All workers share a single :class:`PkgInternalIO`, reading through :meth:`PkgInternalIO.read_at` which keeps
+        no shared seek position and gives every worker thread its own cipher context. Files are written behind by a
+        dedicated writer thread (see :class:`~base.write_behind.WriteBehind`).
+
+        Args:
+            path: target directory
+            jobs: number of worker threads
+            block_size: size of the blocks the entries are read, decrypted and written in, also the largest
+                coalesced read
+            use_package_path: extract with directory structure
+            create_directories: create needed directory structure
+            write_queue_depth: number of writes queued before the workers block, 0 to write synchronously
+            name_filter: only extract the entries it selects, the data of other entries is never read
+        """
+        entries: List[PkgEntry] = self.select(name_filter)
+        with PkgInternalIO(self.file_handle, self.header, self.internal_fs_key) as f, \
+                WriteBehind(write_queue_depth) if write_queue_depth > 0 else nullcontext() as writer:
+            #: Directories first, so that the workers never race each other creating them
+            for entry in entries:
+                if not entry.is_file:
+                    entry.export(f, path, block_size, use_package_path, create_directories)
+
+            reads: List[PlannedRead[PkgEntry]] = plan_reads(
+                [entry for entry in entries if entry.is_file], lambda entry: entry.file_offset,
+                lambda entry: entry.file_size, max_read_size=block_size
+            )
+
+            def export_worker(read: PlannedRead[PkgEntry]) -> None:
+                if read.size > block_size:
+                    read.items[0][0].export(
+                        f, path, block_size, use_package_path, create_directories, writer=writer
+                    )
+                    return
+                with memoryview(bytearray(read.size)) as buffer:
+                    if f.preadinto(self.header.data_offset + read.offset, buffer) != read.size:
+                        raise EOFError(f'{self.path} is truncated')
+                    for entry, offset, size in read.items:
+                        entry.export(
+                            f, path, block_size, use_package_path, create_directories, buffer[offset:offset + size],
+                            writer
+                        )
+
+            self.logger.info(
+                'Extracting %s entries in %s reads using %s worker(s)...', len(entries), len(reads), jobs
+            )
+            with ThreadPoolExecutor(max_workers=jobs) as executor:
+                for _ in executor.map(export_worker, reads):
+                    pass
+
+    def extract_verified(self, path: str, block_size: int = DEFAULT_LOCAL_IO_BLOCK_SIZE,
+                         use_package_path: bool = True, create_directories: bool = True,
+                         write_queue_depth: int = DEFAULT_WRITE_QUEUE_DEPTH,
+                         name_filter: Optional[NameFilter] = None) -> None:
+        """
+        Extracts all entries of the PKG while verifying the whole file SHA-1 hash in the same pass.
+
+        The file is read sequentially exactly once, every block is hashed and the parts of it belonging to file
+        entries are decrypted in place and written out. Existing files are written to temporary files which replace
+        them once the hash is verified. If the hash doesn't match the declared one, all extracted files and created
+        directories are removed again and existing files are left as they were.
+
+        Written behind, two buffers are used in turns so the next block is read and hashed while the previous one is
+        being written.
+
+        Args:
+            path: target directory
+            block_size: size of the blocks the file is read in
+            use_package_path: extract with directory structure
+            create_directories: create needed directory structure
+            write_queue_depth: number of writes queued before reading blocks, 0 to write synchronously
+            name_filter: only extract the entries it selects, the whole file is still read to verify its hash
+
+        Raises:
+            InvalidFileHashException: if the file hash doesn't match the declared hash
+        """
+        size_without_pkg_hash: int = os.stat(self.path).st_size - 32
+        #: (written path, export path) of every file, existing files are only replaced once the hash is verified
+        written_paths: List[Tuple[str, str]] = []
+        created_directories: List[str] = []
+        #: File entries being written, with their export file handles
+        active_entries: List[Tuple[PkgEntry, Union[IO, WriteBehindFile]]] = []
+        writer: Optional[WriteBehind] = WriteBehind(write_queue_depth) if write_queue_depth > 0 else None
+
+        def create_directory(directory: str) -> None:
+            #: Remember every directory level that is created, so that it can be rolled back
+            missing: List[str] = []
+            while directory and not os.path.exists(directory):
+                missing.append(directory)
+                directory = os.path.dirname(directory)
+            for directory in reversed(missing):
+                os.mkdir(directory)
+                created_directories.append(directory)
+
+        with PkgInternalIO(self.file_handle, self.header, self.internal_fs_key) as f:
+            try:
+                pkg_hash: bytes = f.pread(size_without_pkg_hash, 20)
+
+                pending_entries: List[Tuple[PkgEntry, str]] = []
+                for entry in self.select(name_filter):
+                    export_path: str = entry.export_path(path, use_package_path)
+                    if not entry.is_file:
+                        self.logger.info('Creating directory: %s -> %s', entry.name, export_path)
+                        create_directory(export_path)
+                    elif not os.path.exists(export_path) or entry.overwrite:
+                        pending_entries.append((entry, export_path))
+                #: Entries are written in the order their data appears in the file
+                pending_entries.sort(key=lambda pending_entry: pending_entry[0].file_offset, reverse=True)
+
+                sha1 = hashlib.sha1()
+                buffers: List[memoryview] = [
+                    memoryview(bytearray(block_size)) for _ in range(1 if writer is None else 2)
+                ]
+                #: Writes of the data in every buffer, waited for before the buffer is reused
+                pending: List[List[Future]] = [[] for _ in buffers]
+                position: int = 0
+                index: int = 0
+                while position < size_without_pkg_hash:
+                    buffer: memoryview = buffers[index % len(buffers)]
+                    for written in pending[index % len(buffers)]:
+                        written.result()
+                    pending[index % len(buffers)] = []
+                    index += 1
+                    block: memoryview = buffer[:f.preadinto(
+                        position, buffer[:min(block_size, size_without_pkg_hash - position)]
+                    )]
+                    if len(block) == 0:
+                        break
+                    #: Hash before the entry data gets decrypted in place
+                    sha1.update(block)
+                    block_end: int = position + len(block)
+
+                    #: Start writing the entries whose data begins in this block
+                    while pending_entries and \
+                            self.header.data_offset + pending_entries[-1][0].file_offset < block_end:
+                        entry, export_path = pending_entries.pop()
+                        self.logger.info('Extracting file: %s -> %s', entry.name, export_path)
+                        if create_directories:
+                            create_directory(os.path.dirname(export_path))
+                        written_path: str = export_path
+                        if os.path.exists(export_path):
+                            file_descriptor, written_path = tempfile.mkstemp(
+                                suffix='.tmp', prefix=f'{os.path.basename(export_path)}.',
+                                dir=os.path.dirname(export_path) or None
+                            )
+                            os.close(file_descriptor)
+                        written_paths.append((written_path, export_path))
+                        active_entries.append(
+                            (entry, open(written_path, 'wb') if writer is None else writer.open(written_path))
+                        )
+
+                    for entry, export in list(active_entries):
+                        entry_start: int = self.header.data_offset + entry.file_offset
+                        entry_end: int = entry_start + entry.file_size
+                        start: int = max(entry_start, position)
+                        end: int = min(entry_end, block_end)
+                        if start < end:
+                            data: memoryview = block[start - position:end - position]
+                            f.decrypt_into(start - self.header.data_offset, data, entry.data_key)
+                            written: Union[int, Future] = export.write(data)
+                            if writer is not None:
+                                pending[(index - 1) % len(buffers)].append(written)
+                        if entry_end <= block_end:
+                            export.close()
+                            active_entries.remove((entry, export))
+
+                    position = block_end
+
+                if writer is not None:
+                    writer.close()
+                if pkg_hash == sha1.digest() and not pending_entries and not active_entries:
+                    self.logger.info('File Hash Verified!')
+                    for written_path, export_path in written_paths:
+                        if written_path != export_path:
+                            os.replace(written_path, export_path)
+                    return
+                raise InvalidFileHashException()
+            except BaseException:
+                self.logger.error('Extraction failed, removing extracted files...')
+                for _, export in active_entries:
+                    if writer is not None and writer.closed:
+                        #: Nothing reads the queue of a stopped writer any more, close the file directly
+                        export.file.close()
+                    else:
+                        export.close()
+                if writer is not None:
+                    #: Files can only be removed once they are written and closed
+                    try:
+                        writer.close()
+                    except BaseException:
+                        pass
+                #: Files which existed before are left as they were
+                for written_path, _ in written_paths:
+                    os.remove(written_path)
+                for created_directory in reversed(created_directories):
+                    os.rmdir(created_directory)
+                raise
@@ -1,17 +1,471 @@
+import gc
+import hashlib
 import logging
 import os
+import shutil
+import struct
+import tempfile
+import time
+import tracemalloc
 import unittest
+import warnings
+from io import BytesIO, StringIO
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from unittest import mock
 
 import yaml
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 
-from base.errors import EmptyFileException
+from base import MappedFile
+from base.errors import EmptyFileException, InvalidFileHashException
+from base.name_filter import NameFilter
+from base.write_behind import WriteBehind, WriteBehindFile
 from format.pkg import PKG
+from format.pkg.decryptor import PkgInternalIO
+from format.pkg.entry import PkgEntry, PkgEntryTable
+from format.pkg.header import PkgExtHeader, PkgHeader
+from format.pkg.key_id import PkgKeyID
+from utils.keys import PS3_GPKG_KEY
+from utils.logger import Logger
+from utils.utils import DEFAULT_LOCAL_IO_BLOCK_SIZE, backend, human_size, xor_lib
 
 logging.basicConfig(level=logging.DEBUG, format='%(name)-32s: %(levelname)-8s %(message)s')
 
+#: Debug PKGs and the xor key stream need the native library, it is not committed and has to be built using build.sh
+requires_xor_lib = unittest.skipIf(xor_lib is None, 'xor key stream library not built, run build.sh')
+
+
+def create_test_pkg(path: str, entries: List[Tuple[str, Optional[bytes]]], debug: bool = False,
+                    pkg_data_riv: bytes = bytes(range(0xF0, 0x100)), digest: bytes = bytes(range(0x10))) -> None:
+    """
+    Creates a minimal PS3 PKG (no metadata) containing the specified entries, used for tests.
+
+    Args:
+        path: output path
+        entries: list of (name, data) pairs, data is None for folders
+        debug: create a debug (SHA-1 keystream) PKG instead of a retail (AES-128-CTR) one
+        pkg_data_riv: PKG data RIV
+        digest: PKG digest, used as the debug keystream seed
+    """
+    #: Entry table, name region and file data region, each file aligned to 16 bytes
+    entry_table: bytearray = bytearray()
+    names: bytearray = bytearray()
+    name_offsets: List[int] = []
+    for name, _ in entries:
+        name_offsets.append(32 * len(entries) + len(names))
+        names += name.encode('UTF-8')
+        names += bytes(-len(names) % 16)
+    file_data: bytearray = bytearray()
+    file_data_offset: int = 32 * len(entries) + len(names)
+    for (name, data), name_offset in zip(entries, name_offsets):
+        entry_type: int = 0x04 if data is None else 0x03
+        entry_table += struct.pack(
+            '>IIQQII', name_offset, len(name.encode('UTF-8')), file_data_offset + len(file_data),
+            0 if data is None else len(data), 0x80000000 | entry_type, 0
+        )
+        if data is not None:
+            file_data += data
+            file_data += bytes(-len(file_data) % 16)
+    data: bytes = bytes(entry_table + names + file_data)
+
+    #: Encrypt the data region
+    if debug:
+        seed: bytes = digest[0:8] + digest[0:8] + digest[8:16] + digest[8:16] + bytes(0x10)
+        key_stream: bytes = b''.join(
+            hashlib.sha1(seed + block.to_bytes(0x10, 'big')).digest()[0:0x10] for block in range(len(data) // 16)
+        )
+        data = bytes(a ^ b for a, b in zip(data, key_stream))
+    else:
+        data = Cipher(algorithms.AES(PS3_GPKG_KEY), modes.CTR(pkg_data_riv), backend=backend).encryptor().update(data)
+
+    data_offset: int = 0x100
+    header: bytearray = bytearray(0xC0)
+    header[0x00:0x08] = b'\x7fPKG' + (b'\x00\x00' if debug else b'\x80\x00') + b'\x00\x01'
+    struct.pack_into('>IIII', header, 0x08, 0xC0, 0, 0, len(entries))
+    struct.pack_into('>QQQ', header, 0x18, data_offset + len(data) + 0x20, data_offset, len(data))
+    header[0x30:0x54] = b'UP0000-TEST00000_00-0000000000000000'
+    header[0x60:0x70] = digest
+    header[0x70:0x80] = pkg_data_riv
+    header[0xB8:0xC0] = hashlib.sha1(bytes(header[0x00:0x80])).digest()[-8:]
+
+    body: bytes = bytes(header) + bytes(data_offset - len(header)) + data
+    with open(path, 'wb') as f:
+        f.write(body + hashlib.sha1(body).digest() + bytes(0x0C))
+
 
 # noinspection PyMethodMayBeStatic,PyUnusedLocal
 class PKGParsingTest(unittest.TestCase):
+    # CHANGE ME TO BENCHMARK DECRYPTION ON LARGER ENTRIES
+    BENCHMARK_SIZE = 256 * 1024 * 1024
+
+    def setUp(self):
+        self.temp_dir: str = tempfile.mkdtemp()
+        self.entries: List[Tuple[str, Optional[bytes]]] = [
+            ('USRDIR', None),
+            ('USRDIR/DATA', None),
+            ('PARAM.SFO', os.urandom(0x1234)),
+            ('USRDIR/EBOOT.BIN', os.urandom(0x30000)),
+        ] + [(f'USRDIR/DATA/{i:04}.DAT', os.urandom(i * 97)) for i in range(32)]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def assert_extracted(self, target_dir: str):
+        for name, data in self.entries:
+            if data is None:
+                self.assertTrue(os.path.isdir(os.path.join(target_dir, name)))
+            else:
+                with open(os.path.join(target_dir, name), 'rb') as f:
+                    self.assertEqual(f.read(), data, f'Extracted data mismatch for {name}')
+
+    @requires_xor_lib
+    def test_extraction_parallel(self):
+        for debug, use_mmap in ((False, False), (True, False), (False, True)):
+            pkg_path: str = os.path.join(self.temp_dir, f'test_{debug}.pkg')
+            create_test_pkg(pkg_path, self.entries, debug=debug)
+            pkg: PKG = PKG(pkg_path, use_mmap=use_mmap)
+            for jobs in (1, 4):
+                target_dir: str = os.path.join(self.temp_dir, f'out_{debug}_{use_mmap}_{jobs}/')
+                pkg.extract(target_dir, jobs=jobs, block_size=0x1000 if jobs > 1 else DEFAULT_LOCAL_IO_BLOCK_SIZE)
+                self.assert_extracted(target_dir)
+            del pkg
+
+    @requires_xor_lib
+    def test_extraction_verified(self):
+        for debug in (False, True):
+            pkg_path: str = os.path.join(self.temp_dir, f'test_{debug}.pkg')
+            create_test_pkg(pkg_path, self.entries, debug=debug)
+            pkg: PKG = PKG(pkg_path, verify=False)
+            target_dir: str = os.path.join(self.temp_dir, f'out_{debug}/')
+            pkg.extract_verified(target_dir, block_size=0x1000)
+            self.assert_extracted(target_dir)
+            #: Existing files are replaced once the hash is verified
+            with open(os.path.join(target_dir, 'PARAM.SFO'), 'wb') as f:
+                f.write(b'original')
+            pkg.extract_verified(target_dir, block_size=0x1000, write_queue_depth=0)
+            self.assert_extracted(target_dir)
+            del pkg
+
+            #: Corrupt the last byte of the data, the extracted files must be rolled back
+            with open(pkg_path, 'r+b') as f:
+                f.seek(-0x21, os.SEEK_END)
+                last_byte: int = f.read(1)[0]
+                f.seek(-0x21, os.SEEK_END)
+                f.write(bytes([last_byte ^ 0xFF]))
+            pkg: PKG = PKG(pkg_path, verify=False)
+            target_dir: str = os.path.join(self.temp_dir, f'out_{debug}_corrupted/')
+            with self.assertRaises(InvalidFileHashException):
+                pkg.extract_verified(target_dir, block_size=0x1000)
+            self.assertFalse(os.path.exists(target_dir))
+
+            #: Files which existed before are left as they were
+            target_dir = os.path.join(self.temp_dir, f'out_{debug}/')
+            with open(os.path.join(target_dir, 'PARAM.SFO'), 'wb') as f:
+                f.write(b'original')
+            os.remove(os.path.join(target_dir, 'USRDIR/EBOOT.BIN'))
+            with self.assertRaises(InvalidFileHashException):
+                pkg.extract_verified(target_dir, block_size=0x1000)
+            with open(os.path.join(target_dir, 'PARAM.SFO'), 'rb') as f:
+                self.assertEqual(f.read(), b'original')
+            self.assertFalse(os.path.exists(os.path.join(target_dir, 'USRDIR/EBOOT.BIN')))
+            self.assertEqual(sorted(os.listdir(target_dir)), ['PARAM.SFO', 'USRDIR'])
+            del pkg
+
+    def test_extraction_truncated(self):
+        pkg_path: str = os.path.join(self.temp_dir, 'test.pkg')
+        create_test_pkg(pkg_path, self.entries)
+        pkg: PKG = PKG(pkg_path, verify=False)
+        entry: PkgEntry = next(entry for entry in pkg.files if entry.name == 'USRDIR/EBOOT.BIN')
+        with open(pkg_path, 'r+b') as f:
+            f.truncate(pkg.header.data_offset + entry.file_offset + 0x2000)
+        #: Entries read together in a coalesced read and entries streamed on their own fail the same way
+        for block_size in (DEFAULT_LOCAL_IO_BLOCK_SIZE, 0x1000):
+            with self.assertRaises(EOFError):
+                pkg.extract(os.path.join(self.temp_dir, f'out_{block_size}/'), block_size=block_size)
+        del pkg
+
+    def test_extraction_verified_truncated(self):
+        for debug in (False, True) if xor_lib is not None else (False,):
+            pkg_path: str = os.path.join(self.temp_dir, f'test_{debug}.pkg')
+            create_test_pkg(pkg_path, self.entries, debug=debug)
+            pkg: PKG = PKG(pkg_path, verify=False)
+            entry: PkgEntry = next(entry for entry in pkg.files if entry.name == 'USRDIR/EBOOT.BIN')
+            #: The file ends in the middle of an entry, which is still being written when the stream ends
+            with open(pkg_path, 'r+b') as f:
+                f.truncate(pkg.header.data_offset + entry.file_offset + 0x2000 + 32)
+            for depth in (0, 1):
+                target_dir: str = os.path.join(self.temp_dir, f'out_{debug}_{depth}_truncated/')
+                with warnings.catch_warnings(record=True) as caught:
+                    warnings.simplefilter('always', ResourceWarning)
+                    with self.assertRaises(InvalidFileHashException):
+                        pkg.extract_verified(target_dir, block_size=0x1000, write_queue_depth=depth)
+                    gc.collect()
+                #: Files being written are closed before they are removed
+                self.assertEqual([warning for warning in caught if warning.category is ResourceWarning], [])
+                self.assertFalse(os.path.exists(target_dir))
+            del pkg
+
+    def test_write_behind(self):
+        pkg_path: str = os.path.join(self.temp_dir, 'test.pkg')
+        create_test_pkg(pkg_path, self.entries)
+        pkg: PKG = PKG(pkg_path)
+        for depth in (0, 1, 8):
+            #: Small blocks so the large entries are streamed through the double buffer
+            target_dir: str = os.path.join(self.temp_dir, f'out_{depth}/')
+            pkg.extract(target_dir, jobs=2, block_size=0x1000, write_queue_depth=depth)
+            self.assert_extracted(target_dir)
+            target_dir = os.path.join(self.temp_dir, f'out_verified_{depth}/')
+            pkg.extract_verified(target_dir, block_size=0x1000, write_queue_depth=depth)
+            self.assert_extracted(target_dir)
+        del pkg
+
+        #: Write errors happen on the writer thread and are raised when the stage is closed
+        writer: WriteBehind = WriteBehind(depth=2)
+        export: WriteBehindFile = writer.open(os.path.join(self.temp_dir, 'file.bin'))
+        export.write(b'data')
+        export.close().result()
+        failed: Future = export.write(b'more data')
+        with self.assertRaises(ValueError):
+            writer.close()
+        self.assertIsInstance(failed.exception(), ValueError)
+        with open(os.path.join(self.temp_dir, 'file.bin'), 'rb') as f:
+            self.assertEqual(f.read(), b'data')
+        with self.assertRaises(FileNotFoundError):
+            WriteBehind().open(os.path.join(self.temp_dir, 'missing', 'file.bin'))
+
+    def test_selective_extraction(self):
+        pkg_path: str = os.path.join(self.temp_dir, 'test.pkg')
+        create_test_pkg(pkg_path, self.entries)
+        pkg: PKG = PKG(pkg_path, verify=False, lazy=True)
+        name_filter: NameFilter = NameFilter(['PARAM.SFO', 'USRDIR/DATA/000?.DAT'], ['*/0001.DAT'])
+        selected: List[str] = ['PARAM.SFO'] + [f'USRDIR/DATA/{i:04}.DAT' for i in range(32) if i < 10 and i != 1]
+        self.assertEqual([entry.name for entry in pkg.select(name_filter)], selected)
+        self.assertEqual(len(pkg.select()), len(self.entries))
+        self.assertEqual(
+            [entry.name for entry in pkg.select(NameFilter([r'^USRDIR/[A-Z]+(\.BIN)?$'], regex=True))],
+            ['USRDIR/DATA', 'USRDIR/EBOOT.BIN']
+        )
+        self.assertEqual(len(pkg.select(NameFilter(['param.sfo'], ignore_case=True))), 1)
+        #: Regular expressions are compiled one by one, inline flags and alternations only apply to their own pattern
+        self.assertEqual(
+            [entry.name for entry in pkg.select(NameFilter([r'(?i)^param\.sfo$', r'EBOOT|^USRDIR$'], regex=True))],
+            ['USRDIR', 'PARAM.SFO', 'USRDIR/EBOOT.BIN']
+        )
+
+        for verified in (False, True):
+            target_dir: str = os.path.join(self.temp_dir, f'out_{verified}')
+            if verified:
+                pkg.extract_verified(target_dir + '/', name_filter=name_filter)
+            else:
+                pkg.extract(target_dir + '/', name_filter=name_filter)
+            extracted: List[str] = sorted(
+                os.path.relpath(os.path.join(root, file), target_dir).replace(os.sep, '/')
+                for root, _, files in os.walk(target_dir) for file in files
+            )
+            self.assertEqual(extracted, sorted(selected))
+            for name, data in self.entries:
+                if name in selected:
+                    with open(os.path.join(target_dir, name), 'rb') as f:
+                        self.assertEqual(f.read(), data)
+        del pkg
+
+    def test_lazy(self):
+        pkg_path: str = os.path.join(self.temp_dir, 'test.pkg')
+        create_test_pkg(pkg_path, self.entries)
+        pkg: PKG = PKG(pkg_path, verify=False, lazy=True)
+        self.assertEqual(pkg.header.content_id, 'UP0000-TEST00000_00-0000000000000000')
+        self.assertIsNone(pkg._files)
+        self.assertEqual([entry.name for entry in pkg.files], [name for name, _ in self.entries])
+        self.assertEqual([entry.file_size for entry in pkg.files], [len(data or b'') for _, data in self.entries])
+        del pkg
+
+    def test_entry_table(self):
+        pkg_path: str = os.path.join(self.temp_dir, 'test.pkg')
+        create_test_pkg(pkg_path, self.entries)
+        pkg: PKG = PKG(pkg_path, verify=False)
+        self.assertIsInstance(pkg.files, PkgEntryTable)
+        self.assertEqual(len(pkg.files), len(self.entries))
+        self.assertEqual(pkg.files[-1].name, self.entries[-1][0])
+        self.assertEqual([entry.name for entry in pkg.files[1:3]], [name for name, _ in self.entries[1:3]])
+        for index, entry in enumerate(pkg.files):
+            self.assertEqual(entry.data_key, pkg.files.data_key(index))
+            self.assertEqual(entry.is_file, self.entries[index][1] is not None)
+        with self.assertRaises(IndexError):
+            pkg.files[len(self.entries)]
+
+        #: Columnar table against the same entries held as one object each
+        self.entries = [(f'dir/file_{i}.bin', b'x' * 16) for i in range(10000)]
+        create_test_pkg(pkg_path, self.entries)
+        logging.disable(logging.CRITICAL)
+        try:
+            gc.collect()
+            tracemalloc.start()
+            pkg = PKG(pkg_path, verify=False)
+            table_size: int = tracemalloc.get_traced_memory()[0]
+            objects: List[PkgEntry] = list(pkg.files)
+            objects_size: int = tracemalloc.get_traced_memory()[0] - table_size
+            tracemalloc.stop()
+        finally:
+            logging.disable(logging.NOTSET)
+        logging.info(f'{len(objects)} entries, table: {table_size / len(objects):.1f} bytes per entry, '
+                     f'objects: {objects_size / len(objects):.1f} bytes per entry')
+        self.assertLess(table_size * 2, objects_size)
+        del pkg
+
+    @requires_xor_lib
+    def test_read_at(self):
+        for debug, use_mmap in ((False, False), (True, False), (False, True), (True, True)):
+            pkg_path: str = os.path.join(self.temp_dir, f'test_{debug}.pkg')
+            create_test_pkg(pkg_path, self.entries, debug=debug)
+            pkg: PKG = PKG(pkg_path, use_mmap=use_mmap)
+            with PkgInternalIO(pkg.file_handle, pkg.header, pkg.internal_fs_key) as f:
+                for offset, size in ((0, 0x20), (3, 0x1000), (0x4F1, 0x33), (0x1FFF, 0x10000)):
+                    f.seek(offset, PkgInternalIO.SEEK_DATA_OFFSET)
+                    expected: bytes = f.read(size)
+                    with ThreadPoolExecutor(max_workers=4) as executor:
+                        for data in executor.map(lambda _: f.read_at(offset, size), range(8)):
+                            self.assertEqual(data, expected)
+                    buffer: bytearray = bytearray(size + 0x10)
+                    self.assertEqual(f.readinto_at(offset, memoryview(buffer)[0x10:]), size)
+                    self.assertEqual(buffer[0x10:], expected)
+            del pkg
+
+    @requires_xor_lib
+    def test_decryption(self):
+        pkg_path: str = os.path.join(self.temp_dir, 'test.pkg')
+        create_test_pkg(pkg_path, self.entries)
+        pkg: PKG = PKG(pkg_path)
+        block: bytes = os.urandom(0x12345)
+        results: Dict[bool, bytes] = {}
+        for use_aes_ctr in (True, False):
+            f: PkgInternalIO = PkgInternalIO(pkg.file_handle, pkg.header, pkg.internal_fs_key, use_aes_ctr=use_aes_ctr)
+            #: Fresh copy, the xor key stream path decrypts in place
+            results[use_aes_ctr] = bytes(f.decrypt(3, bytes(memoryview(block))))
+        del pkg
+        self.assertEqual(results[True], results[False])
+
+    @requires_xor_lib
+    @unittest.skipUnless(os.environ.get('PSTOOLS_BENCHMARK'), 'set PSTOOLS_BENCHMARK to run benchmarks')
+    def test_benchmark_decryption(self):
+        pkg_path: str = os.path.join(self.temp_dir, 'test.pkg')
+        create_test_pkg(pkg_path, self.entries)
+        pkg: PKG = PKG(pkg_path)
+        block: bytes = os.urandom(DEFAULT_LOCAL_IO_BLOCK_SIZE)
+        for use_aes_ctr in (True, False):
+            f: PkgInternalIO = PkgInternalIO(pkg.file_handle, pkg.header, pkg.internal_fs_key, use_aes_ctr=use_aes_ctr)
+            elapsed: float = 0
+            for offset in range(0, self.BENCHMARK_SIZE, len(block)):
+                #: Fresh copy, the xor key stream path decrypts in place
+                data: bytes = bytes(memoryview(block))
+                start: float = time.perf_counter()
+                f.decrypt(offset + 3, data)
+                elapsed += time.perf_counter() - start
+            logging.info(
+                f'{"AES-128-CTR" if use_aes_ctr else "Xor key stream"}: {human_size(self.BENCHMARK_SIZE / elapsed)}/s'
+            )
+        del pkg
+
+    def test_header_parsing(self):
+        pkg_path: str = os.path.join(self.temp_dir, 'test.pkg')
+        create_test_pkg(pkg_path, self.entries)
+        with open(pkg_path, 'rb') as f:
+            header_data: bytes = f.read(0xC0)
+        ext_header_data: bytes = b'\x7fext' + struct.pack(
+            '>IIIIIQIII', 1, 0x40, 0x140, 0x40, 0x80, 0x1000, 0, PkgKeyID.PS_VITA.value, 0x100
+        ) + bytes(0x14)
+
+        #: Field checks, both headers are unpacked from a single read each
+        header: PkgHeader = PkgHeader(BytesIO(header_data))
+        self.assertEqual((header.item_count, header.data_offset), (len(self.entries), 0x100))
+        self.assertEqual(header.content_id, 'UP0000-TEST00000_00-0000000000000000')
+        ext_header: PkgExtHeader = PkgExtHeader(BytesIO(ext_header_data))
+        self.assertEqual((ext_header.tail_offset, ext_header.pkg_key_id), (0x1000, PkgKeyID.PS_VITA))
+
+    @unittest.skipUnless(os.environ.get('PSTOOLS_BENCHMARK'), 'set PSTOOLS_BENCHMARK to run benchmarks')
+    def test_benchmark_header_parsing(self):
+        pkg_path: str = os.path.join(self.temp_dir, 'test.pkg')
+        create_test_pkg(pkg_path, self.entries)
+        with open(pkg_path, 'rb') as f:
+            header_data: bytes = f.read(0xC0)
+        ext_header_data: bytes = b'\x7fext' + struct.pack(
+            '>IIIIIQIII', 1, 0x40, 0x140, 0x40, 0x80, 0x1000, 0, PkgKeyID.PS_VITA.value, 0x100
+        ) + bytes(0x14)
+
+        #: Per header parse cost with logging disabled, header only scans of large libraries are dominated by this
+        logging.disable(logging.CRITICAL)
+        try:
+            for header_class, data in ((PkgHeader, header_data), (PkgExtHeader, ext_header_data)):
+                iterations: int = 20000
+                start: float = time.perf_counter()
+                for _ in range(iterations):
+                    header_class(BytesIO(data))
+                elapsed: float = time.perf_counter() - start
+                logging.disable(logging.NOTSET)
+                logging.info(f'{header_class.__name__}: {elapsed / iterations * 1000000:.2f} us per header')
+                logging.disable(logging.CRITICAL)
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def test_class_logger(self):
+        #: Classes of the base package are defined before utils.utils sets the logger class
+        self.assertIsInstance(MappedFile.logger, Logger)
+        self.assertEqual(MappedFile.logger.name, 'Mapped File')
+        self.assertIs(PkgEntry.logger, PkgEntry.logger)
+        self.assertIsNot(PKG.logger, PkgEntry.logger)
+
+    def test_parsing_builds_only_needed_entries(self):
+        #: Enough entries for per entry field logging to dominate the open time unless it is deferred
+        self.entries = [(f'dir/file_{i}.bin', b'x' * 16) for i in range(10000)]
+        pkg_path: str = os.path.join(self.temp_dir, 'test.pkg')
+        create_test_pkg(pkg_path, self.entries)
+
+        #: Entry views and log records built, counted instead of timed
+        counts: Dict[str, int] = {'entries': 0, 'records': 0}
+        entry_init = PkgEntry.__init__
+        make_record = logging.Logger.makeRecord
+
+        def counting_entry_init(entry: PkgEntry) -> None:
+            counts['entries'] += 1
+            entry_init(entry)
+
+        def counting_make_record(logger: logging.Logger, *args, **kwargs) -> logging.LogRecord:
+            counts['records'] += 1
+            return make_record(logger, *args, **kwargs)
+
+        root_logger: logging.Logger = logging.getLogger()
+        level: int = root_logger.level
+        handlers: List[logging.Handler] = root_logger.handlers
+        timings: Dict[str, float] = {}
+        try:
+            with mock.patch.object(PkgEntry, '__init__', counting_entry_init), \
+                    mock.patch.object(logging.Logger, 'makeRecord', counting_make_record):
+                for label, log_level in (('emitted', logging.DEBUG), ('filtered', logging.WARNING)):
+                    root_logger.handlers = [logging.StreamHandler(StringIO())]
+                    root_logger.setLevel(log_level)
+                    counts.update(entries=0, records=0)
+                    start: float = time.perf_counter()
+                    pkg: PKG = PKG(pkg_path, verify=False)
+                    timings[label] = time.perf_counter() - start
+                    if label == 'emitted':
+                        self.assertGreaterEqual(counts['entries'], len(self.entries))
+                        self.assertGreaterEqual(counts['records'], len(self.entries))
+                    else:
+                        #: Nothing is built for log messages which are filtered out
+                        self.assertEqual(counts, {'entries': 0, 'records': 0})
+
+                    #: Only the entries selected by a name filter are built
+                    selected: List[PkgEntry] = pkg.select(NameFilter(['dir/file_1?.bin']))
+                    self.assertEqual([entry.name for entry in selected], [f'dir/file_{i}.bin' for i in range(10, 20)])
+                    if label == 'filtered':
+                        self.assertEqual(counts['entries'], len(selected))
+                    del pkg
+        finally:
+            root_logger.handlers = handlers
+            root_logger.setLevel(level)
+
+        for label, elapsed in timings.items():
+            logging.info(f'Open with {len(self.entries)} entries, logging {label}: {elapsed:.3f}s')
 
     def test_parser_pkg(self):
         for root, dirs, files in os.walk(os.path.dirname(os.path.realpath(__file__))):
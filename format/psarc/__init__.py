@@ -1 +1,2 @@
 from .psarc import PSARC
+from .writer import PSARCWriter
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import io
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+
+from base import LoggingClass
+from .errors import InvalidPSARCException
+from .toc import TOCEntry
+
+if TYPE_CHECKING:
+    from .psarc import PSARC
+
+
+class PSARCEntryIO(io.RawIOBase, LoggingClass):
+    """
+    Read only, seekable file handle of a single PSARC entry.
+
+    Only the blocks touched by reads are decompressed, the most recently used ones are kept in a small LRU cache so
+    reads and seeks around the same region do not inflate the same block again. Reads go through the archive's file
+    handle, so handles of the same archive should not be used from multiple threads at once.
+    """
+
+    def __init__(self, psarc: PSARC, entry: TOCEntry, cache_size: int = 4):
+        super().__init__()
+
+        #: Archive the entry belongs to
+        self.psarc: PSARC = psarc
+
+        #: TOC entry
+        self.entry: TOCEntry = entry
+
+        #: Entry name
+        self.name: str = entry.name
+
+        #: Maximum number of decompressed blocks kept
+        self.cache_size: int = max(cache_size, 1)
+
+        #: Decompressed blocks by block index within the entry, least recently used first
+        self.cache: OrderedDict = OrderedDict()
+
+        #: Current position
+        self.position: int = 0
+
+    def __len__(self) -> int:
+        return self.entry.decompressed_size
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position: int = offset
+        elif whence == io.SEEK_CUR:
+            position = self.position + offset
+        elif whence == io.SEEK_END:
+            position = self.entry.decompressed_size + offset
+        else:
+            raise ValueError(f'Invalid whence ({whence})')
+        if position < 0:
+            raise ValueError(f'Negative seek position {position}')
+        self.position = position
+        return self.position
+
+    def tell(self) -> int:
+        return self.position
+
+    def block(self, index: int) -> bytes:
+        """
+        Decompressed block, served from the cache if possible.
+
+        :param index: block index within the entry
+        :return: decompressed block data
+        """
+        data: bytes = self.cache.get(index)
+        if data is not None:
+            self.cache.move_to_end(index)
+            return data
+
+        data = self.psarc.read_block(self.entry, index)
+        self.cache[index] = data
+        if len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return data
+
+    def readinto(self, b) -> int:
+        if self.closed:
+            raise ValueError('I/O operation on closed file.')
+
+        with memoryview(b) as view, view.cast('B') as target:
+            size: int = max(min(len(target), self.entry.decompressed_size - self.position), 0)
+            block_size: int = self.psarc.header.block_size
+            copied: int = 0
+            while copied < size:
+                index, block_offset = divmod(self.position, block_size)
+                data: bytes = self.block(index)
+                if len(data) <= block_offset:
+                    #: A truncated or corrupted block would otherwise never advance the position
+                    raise InvalidPSARCException(
+                        f'Block {index} of {self.name} decompressed to {len(data)} bytes, expected more than '
+                        f'{block_offset}'
+                    )
+                chunk: int = min(size - copied, len(data) - block_offset)
+                target[copied:copied + chunk] = data[block_offset:block_offset + chunk]
+                copied += chunk
+                self.position += chunk
+            return size
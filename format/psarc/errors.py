@@ -0,0 +1,13 @@
+from .compression_type import CompressionType
+
+
+class InvalidPSARCException(Exception):
+    def __init__(self, message: str = ""):
+        super(InvalidPSARCException, self).__init__(message)
+
+
+class UnsupportedCompressionTypeException(InvalidPSARCException):
+    def __init__(self, compression_type: CompressionType):
+        super(UnsupportedCompressionTypeException, self).__init__(
+            f'Unsupported PSARC compression type: {compression_type}.'
+        )
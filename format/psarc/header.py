@@ -1,44 +1,63 @@
 from typing import IO
 
+from base import Field, Layout
 from base.header import MagicFileHeader
-from utils.utils import read_u32, read_u16, Endianess
+from utils.utils import Endianess
 from .compression_type import CompressionType
 from .path_type import ArchivePathType
 
 
 class PSARCHeader(MagicFileHeader):
+    #: Header layout following the magic
+    LAYOUT: Layout = Layout(Endianess.BIG_ENDIAN, [
+        Field('version_major', 'H'),
+        Field('version_minor', 'H'),
+        Field.enum('compression_type', '4s', CompressionType),
+        Field('toc_length', 'I'),
+        Field('toc_entry_size', 'I'),
+        Field('toc_entry_count', 'I'),
+        Field('block_size', 'I'),
+        Field.enum('archive_path_type', 'I', ArchivePathType),
+    ])
+
     def __init__(self, f: IO):
         super().__init__(f)
+        PSARCHeader.LAYOUT.read_into(self, f)
 
         #: PSARC Minor and Major File Versions
-        self.version_major: int = read_u16(f, endianess=Endianess.BIG_ENDIAN)
-        self.version_minor: int = read_u16(f, endianess=Endianess.BIG_ENDIAN)
-        self.logger.info(f'Version: v{self.version_major}.{self.version_minor}')
+        self.logger.info('Version: v%s.%s', self.version_major, self.version_minor)
 
         #: PSARC Compression Type
-        self.compression_type: CompressionType = CompressionType(f.read(4))
-        self.logger.info(f'Compression Type: {self.compression_type}')
+        self.logger.info('Compression Type: %s', self.compression_type)
 
         #: PSARC TOC Length
-        self.toc_length: int = read_u32(f, endianess=Endianess.BIG_ENDIAN)
-        self.logger.info(f'TOC Length: {self.toc_length}')
+        self.logger.info('TOC Length: %s', self.toc_length)
 
         #: PSARC TOC Entry Size
-        self.toc_entry_size: int = read_u32(f, endianess=Endianess.BIG_ENDIAN)
-        self.logger.info(f'TOC Entry Size: {self.toc_entry_size}')
+        self.logger.info('TOC Entry Size: %s', self.toc_entry_size)
 
         #: PSARC TOC Entry Count
-        self.toc_entry_count: int = read_u32(f, endianess=Endianess.BIG_ENDIAN)
-        self.logger.info(f'TOC Entries: {self.toc_entry_count}')
+        self.logger.info('TOC Entries: %s', self.toc_entry_count)
 
         #: PSARC Block Size
-        self.block_size: int = read_u32(f, endianess=Endianess.BIG_ENDIAN)
-        self.logger.info(f'Block Size: {self.block_size}')
+        self.logger.info('Block Size: %s', self.block_size)
 
         #: PSARC Archive Path Type
-        # TODO: Fucking use this actually
-        self.archive_path_type: ArchivePathType = ArchivePathType(read_u32(f, endianess=Endianess.BIG_ENDIAN))
-        self.logger.info(f'Archive Path Type: {self.archive_path_type}')
+        self.logger.info('Archive Path Type: %s', self.archive_path_type)
+
+    @property
+    def ignore_case(self) -> bool:
+        """Names are matched case insensitively, their digests are computed from the upper case name."""
+        return self.archive_path_type.ignore_case
+
+    @property
+    def absolute_paths(self) -> bool:
+        """Names are stored as absolute paths (with a leading slash)."""
+        return self.archive_path_type.absolute_paths
+
+    def write(self, f: IO):
+        f.write(self.magic)
+        PSARCHeader.LAYOUT.write(self, f)
 
     @property
     def magic(self) -> bytes:
@@ -1,3 +1,5 @@
+import hashlib
+
 from aenum import Enum
 
 
@@ -6,3 +8,46 @@ class ArchivePathType(Enum):
     IGNORE_CASE = 0x01
     ABSOLUTE = 0x02
     UNKNOWN = 0x03
+
+    @property
+    def ignore_case(self) -> bool:
+        """Names are matched case insensitively, their digests are computed from the upper case name."""
+        return bool(self.value & ArchivePathType.IGNORE_CASE.value)
+
+    @property
+    def absolute_paths(self) -> bool:
+        """Names are stored as absolute paths (with a leading slash)."""
+        return bool(self.value & ArchivePathType.ABSOLUTE.value)
+
+    def entry_name(self, name: str) -> str:
+        """
+        Converts a path to the form names are stored in the manifest (forward slashes, leading slash only for
+        archives with absolute paths)
+
+        :param name: entry path
+        :return: manifest name
+        """
+        name = name.replace('\\', '/')
+        if self.absolute_paths:
+            return name if name.startswith('/') else '/' + name
+        return name.lstrip('/')
+
+    def normalize_name(self, name: str) -> str:
+        """
+        Converts a path to the form name digests are computed from (manifest name, upper case for case insensitive
+        archives)
+
+        :param name: entry path
+        :return: normalized path
+        """
+        name = self.entry_name(name)
+        return name.upper() if self.ignore_case else name
+
+    def name_digest(self, name: str) -> bytes:
+        """
+        Digest of an entry path as stored in the TOC
+
+        :param name: entry path
+        :return: MD5 of the normalized path
+        """
+        return hashlib.md5(self.normalize_name(name).encode('UTF-8')).digest()
@@ -1,41 +1,450 @@
+import logging
 import os
-from typing import List
+import struct
+from array import array
+from contextlib import nullcontext
+from itertools import accumulate
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Dict, Generator, Iterator, List, Optional, Tuple, Union
 
+from base.codec import Codec, get_codec
+from base.entry_table import NameTable
 from base.file_format import FileFormatWithMagic
+from base.name_filter import NameFilter
+from base.parallel import imap_ordered
+from base.read_plan import DEFAULT_MAX_READ_SIZE, PlannedRead, plan_reads
+from base.write_behind import DEFAULT_WRITE_QUEUE_DEPTH, WriteBehind
 from utils.utils import human_size
+from .entry_io import PSARCEntryIO
+from .errors import UnsupportedCompressionTypeException
 from .header import PSARCHeader
-from .toc import TOCEntry
+from .toc import TOCEntry, TOCEntryTable
 
 
 class PSARC(FileFormatWithMagic[PSARCHeader]):
-    def __init__(self, path: str):
-        super().__init__(path, PSARCHeader)
+    #: Size of the header including the magic, the TOC follows it
+    HEADER_SIZE: int = 4 + PSARCHeader.LAYOUT.size
+
+    #: Compressed blocks in flight per decompression worker
+    BLOCKS_PER_JOB: int = 4
+
+    #: Largest read neighbouring entries are coalesced into when extracting, larger entries are streamed
+    MAX_READ_SIZE: int = DEFAULT_MAX_READ_SIZE
+
+    def __init__(self, path: str, use_mmap: bool = False, lazy: bool = False):
+        """
+        Init
+
+        :param path: PSARC file path
+        :param use_mmap: access the file through a memory map instead of read syscalls
+        :param lazy: do not decompress the manifest, entries can still be found by name through their digests and the
+            manifest is read on first use of the entry names
+        """
+        super().__init__(path, PSARCHeader, use_mmap=use_mmap)
 
         #: Read PSARC TOC Entries
-        self.entries: List[TOCEntry] = list()
-        for i in range(0, self.header.toc_entry_count):
-            self.logger.debug(f'Reading TOC Entry #{i}')
-            entry: TOCEntry = TOCEntry(self.file_handle)
-            self.entries.append(entry)
-
-        for i, entry in enumerate(self.entries):
-            #: First entry contains file names
-            if i == 0:
-                #: Decompressed data read all at once into memory
-                data: str = entry.read_entry_data(
-                    self.file_handle, self.header.block_size, self.header.compression_type
-                ).decode('UTF-8')
-
-                for index, name in enumerate(data.splitlines(), start=1):
-                    #: Set TOC Entry Name
-                    actual_entry = self.entries[index]
-                    actual_entry.name = name
-                    self.logger.info(
-                        f'Entry #{index} ({human_size(actual_entry.decompressed_size)}): {actual_entry.name}'
-                    )
+        self.logger.debug('Reading %s TOC Entries', self.header.toc_entry_count)
+        self.entries: TOCEntryTable = TOCEntryTable(self.file_handle, self.header.toc_entry_count)
+
+        #: Stored size of every block, 0 meaning a full block stored uncompressed
+        self.block_sizes: array = self.read_block_sizes()
+        self.logger.debug('Block Count: %s', len(self.block_sizes))
+
+        #: Prefix sums of the stored block sizes, an entry's block n is at offset + the difference to its first block
+        self.block_offsets: array = array('Q', [0])
+        self.block_offsets.extend(accumulate(size or self.header.block_size for size in self.block_sizes))
+
+        #: Block codec of the archive compression type
+        self.codec: Optional[Codec] = get_codec(self.header.compression_type.value.decode('ASCII'))
+
+        #: Was the manifest (entry names) read
+        self.manifest_read: bool = False
+
+        self._hash_index: Optional[Dict[bytes, int]] = None
+
+        if not lazy:
+            self.read_manifest()
+
+    def read_manifest(self) -> None:
+        """
+        Reads the entry names from the manifest (first entry), does nothing if they were already read
+        """
+        if self.manifest_read:
+            return
+
+        for index, name in enumerate(self.iter_manifest(), 1):
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info(
+                    'Entry #%s (%s): %s', index, human_size(self.entries.decompressed_sizes[index]), name
+                )
+
+    def iter_manifest(self) -> Iterator[str]:
+        """
+        Parses the entry names from the manifest (first entry) while it is decompressed block by block. Every name is
+        added to the entry table as soon as its line is complete, so the first entries can be used before the whole
+        manifest is decompressed and the manifest is never held in memory as a whole.
+
+        Names which were already parsed are not added again, an abandoned iteration can be resumed by a new one.
+
+        :return: entry names in TOC order
+        """
+        if self.manifest_read:
+            for name in self.entries.names:
+                yield name
+            return
+
+        names: NameTable = self.entries.names
+        for index, line in enumerate(self.iter_manifest_lines()):
+            if index == len(names):
+                names.append_encoded(line.rstrip(b'\r'))
+            yield names[index]
+        self.manifest_read = True
+
+    def iter_manifest_lines(self) -> Iterator[bytes]:
+        """
+        Splits the manifest into lines while it is decompressed, only the current block and the incomplete line
+        carried over from the previous one are kept in memory.
+
+        :return: encoded manifest lines
+        """
+        if len(self.entries) == 0:
+            return
+        buffer: bytearray = bytearray()
+        for data in self.get_decompression_stream(self.entries[0]):
+            buffer += data
+            start: int = 0
+            end: int = buffer.find(b'\n')
+            while end != -1:
+                yield bytes(buffer[start:end])
+                start = end + 1
+                end = buffer.find(b'\n', start)
+            del buffer[:start]
+        if buffer:
+            yield bytes(buffer)
+
+    @property
+    def hash_index(self) -> Dict[bytes, int]:
+        """
+        Entry index by name digest, built from the TOC on first use
+
+        :return: name digest -> entry index
+        """
+        if self._hash_index is None:
+            hashes: bytes = self.entries.hashes
+            self._hash_index = {hashes[index * 16:index * 16 + 16]: index for index in range(1, len(self.entries))}
+        return self._hash_index
+
+    def normalize_name(self, name: str) -> str:
+        """
+        Normalizes a path to the form names are stored in the archive (forward slashes, leading slash only for
+        archives with absolute paths, upper case for case insensitive archives)
+
+        :param name: entry path
+        :return: normalized path
+        """
+        return self.header.archive_path_type.normalize_name(name)
+
+    def name_digest(self, name: str) -> bytes:
+        """
+        Digest of an entry path as stored in the TOC
+
+        :param name: entry path
+        :return: MD5 of the normalized path
+        """
+        return self.header.archive_path_type.name_digest(name)
+
+    @property
+    def block_size_width(self) -> int:
+        """Width in bytes of a block size table entry, the smallest one able to hold the block size."""
+        if self.header.block_size <= 0x10000:
+            return 2
+        elif self.header.block_size <= 0x1000000:
+            return 3
+        return 4
+
+    def read_block_sizes(self) -> array:
+        """Reads the block size table following the TOC entries, the file handle is expected to be positioned at it."""
+        width: int = self.block_size_width
+        count: int = (
+            self.header.toc_length - PSARC.HEADER_SIZE - self.header.toc_entry_count * self.header.toc_entry_size
+        ) // width
+        data: bytes = self.file_handle.read(count * width)
+        if width == 3:
+            return array('I', [int.from_bytes(data[i:i + 3], 'big') for i in range(0, len(data), 3)])
+        return array('I', struct.unpack(f'>{count}{"H" if width == 2 else "I"}', data))
+
+    def block_count(self, entry: TOCEntry) -> int:
+        return -(-entry.decompressed_size // self.header.block_size)
+
+    def iter_blocks(self, entry: TOCEntry, first: int = 0,
+                    last: Optional[int] = None) -> Iterator[Tuple[int, int, int]]:
+        """
+        Locates blocks of an entry using the block index, without touching the blocks before them.
+
+        :param entry: TOC entry
+        :param first: index of the first block within the entry
+        :param last: index of the block after the last one within the entry, all remaining blocks if None
+        :return: (file offset, stored size, decompressed size) of every requested block
+        """
+        block_size: int = self.header.block_size
+        if last is None:
+            last = self.block_count(entry)
+        for block in range(entry.block_index + first, entry.block_index + last):
+            offset: int = entry.offset + self.block_offsets[block] - self.block_offsets[entry.block_index]
+            decompressed_size: int = min(block_size, entry.decompressed_size - (block - entry.block_index) * block_size)
+            yield offset, self.block_offsets[block + 1] - self.block_offsets[block], decompressed_size
+
+    def stored_size(self, entry: TOCEntry) -> int:
+        """Size of the stored (compressed) blocks of an entry."""
+        return self.block_offsets[entry.block_index + self.block_count(entry)] - self.block_offsets[entry.block_index]
+
+    def split_blocks(self, entry: TOCEntry, data: bytes) -> Iterator[Tuple[bytes, int]]:
+        """
+        Splits already read stored data of an entry into its blocks.
+
+        :param entry: TOC entry
+        :param data: stored data of the entry, starting at its offset
+        :return: (stored data, decompressed size) of every block
+        """
+        with memoryview(data) as view:
+            for offset, stored_size, decompressed_size in self.iter_blocks(entry):
+                yield bytes(view[offset - entry.offset:offset - entry.offset + stored_size]), decompressed_size
+
+    def read_blocks(self, entry: TOCEntry, first: int = 0, last: Optional[int] = None) -> Iterator[Tuple[bytes, int]]:
+        """
+        Reads stored blocks of an entry.
+
+        :param entry: TOC entry
+        :param first: index of the first block within the entry
+        :param last: index of the block after the last one within the entry, all remaining blocks if None
+        :return: (stored data, decompressed size) of every requested block
+        """
+        for offset, stored_size, decompressed_size in self.iter_blocks(entry, first, last):
+            self.file_handle.seek(offset)
+            yield self.file_handle.read(stored_size), decompressed_size
+
+    def decompress_block(self, block: Tuple[bytes, int]) -> bytes:
+        """
+        Decompresses a single block, blocks which did not compress are stored as is.
+
+        :param block: (stored data, decompressed size)
+        :return: decompressed data
+        """
+        data, decompressed_size = block
+        if len(data) == decompressed_size:
+            return data
+        if self.codec is None:
+            raise UnsupportedCompressionTypeException(self.header.compression_type)
+        return self.codec.decompress(data, decompressed_size)
+
+    def decompress_blocks(self, blocks: Iterator[Tuple[bytes, int]], executor: Optional[Executor] = None,
+                          jobs: int = 1) -> Iterator[bytes]:
+        """
+        Decompresses blocks in order, on the executor if one is given.
+
+        :param blocks: (stored data, decompressed size) of every block, read in this thread
+        :param executor: executor to decompress the blocks on
+        :param jobs: number of workers of the executor, decides how many blocks are in flight
+        :return: decompressed blocks
+        """
+        return imap_ordered(self.decompress_block, blocks, executor, jobs * PSARC.BLOCKS_PER_JOB)
+
+    def get_decompression_stream(self, entry: TOCEntry, executor: Optional[Executor] = None,
+                                 jobs: int = 1) -> Generator[bytes, None, None]:
+        """
+        Decompresses an entry block by block.
+
+        :param entry: TOC entry
+        :param executor: executor to decompress the blocks on, blocks are read in this thread and yielded in order
+        :param jobs: number of workers of the executor
+        :return: decompressed blocks
+        """
+        for data in self.decompress_blocks(self.read_blocks(entry), executor, jobs):
+            yield data
+
+    def read_entry_data(self, entry: TOCEntry, executor: Optional[Executor] = None, jobs: int = 1) -> bytes:
+        return b''.join(self.get_decompression_stream(entry, executor, jobs))
+
+    def read_block(self, entry: TOCEntry, block: int) -> bytes:
+        """
+        Reads and decompresses a single block of an entry.
+
+        :param entry: TOC entry
+        :param block: block index within the entry
+        :return: decompressed block data
+        """
+        return self.decompress_block(next(self.read_blocks(entry, block, block + 1)))
+
+    def read(self, entry: TOCEntry, offset: int = 0, length: Optional[int] = None,
+             executor: Optional[Executor] = None, jobs: int = 1) -> bytes:
+        """
+        Reads a byte range of an entry, only the blocks overlapping the range are read and decompressed.
+
+        :param entry: TOC entry
+        :param offset: offset within the decompressed entry
+        :param length: number of bytes to read, everything up to the end of the entry if None
+        :param executor: executor to decompress the blocks on
+        :param jobs: number of workers of the executor
+        :return: decompressed data, shorter than length if the range goes past the end of the entry
+        """
+        if offset < 0 or (length is not None and length < 0):
+            raise ValueError('offset and length must not be negative')
+        end: int = entry.decompressed_size if length is None else min(offset + length, entry.decompressed_size)
+        if offset >= end:
+            return b''
+
+        block_size: int = self.header.block_size
+        first: int = offset // block_size
+        data: bytes = b''.join(
+            self.decompress_blocks(self.read_blocks(entry, first, -(-end // block_size)), executor, jobs)
+        )
+        return data[offset - first * block_size:end - first * block_size]
+
+    def find(self, name: str) -> TOCEntry:
+        """
+        Finds an entry by its name through the name digests, without reading the manifest if it was not read yet.
+
+        :param name: entry path
+        :return: TOC entry
+        """
+        index: Optional[int] = self.hash_index.get(self.name_digest(name))
+        if index is None:
+            #: Archives written by other tools might not follow the digest convention, fall back to the manifest
+            normalized_name: str = self.normalize_name(name)
+            for i, entry_name in enumerate(self.iter_manifest(), 1):
+                if self.normalize_name(entry_name) == normalized_name:
+                    index = i
+                    break
+            else:
+                raise FileNotFoundError(f'No entry named {name} in {self.path}')
+
+        entry: TOCEntry = self.entries[index]
+        if entry.name is None:
+            entry.name = name
+        return entry
+
+    def select(self, name_filter: Optional[NameFilter] = None) -> List[TOCEntry]:
+        """
+        Entries selected by a name filter, names are matched while the manifest is parsed so no other entry data is
+        read.
+
+        :param name_filter: name filter, every entry (except the manifest) is selected if None
+        :return: selected entries in TOC order
+        """
+        if name_filter is None or name_filter.selects_all:
+            self.read_manifest()
+            return list(self.entries[1:])
+        return [self.entries[index] for index, name in enumerate(self.iter_manifest(), 1) if name_filter.matches(name)]
+
+    def open(self, name: Union[str, TOCEntry], cache_size: int = 4) -> PSARCEntryIO:
+        """
+        Opens an entry as a read only, seekable file handle which decompresses blocks on demand.
+
+        :param name: entry name or TOC entry
+        :param cache_size: number of decompressed blocks kept by the handle
+        :return: entry file handle
+        """
+        entry: TOCEntry = self.find(name) if isinstance(name, str) else name
+        return PSARCEntryIO(self, entry, cache_size)
+
+    def check_block(self, block: Tuple[int, Tuple[bytes, int]]) -> Tuple[int, int, Optional[str]]:
+        """
+        Decompresses a block to check it, run on the verification workers.
+
+        :param block: (entry index, (stored data, decompressed size))
+        :return: (entry index, decompressed length, problem or None)
+        """
+        index, (data, decompressed_size) = block
+        try:
+            length: int = len(self.decompress_block((data, decompressed_size)))
+        except Exception as e:
+            return index, 0, f'Block could not be decompressed: {e}'
+        if length != decompressed_size:
+            return index, length, f'Block decompressed to {length} bytes instead of {decompressed_size}'
+        return index, length, None
+
+    def verify(self, jobs: int = 1) -> List[Tuple[int, str]]:
+        """
+        Checks the archive without extracting it: block ranges against the block size table and the file size, every
+        block decompresses to its expected length, decompressed entry sizes against the TOC and name digests against
+        the manifest. Blocks are decompressed in parallel and their data is discarded.
+
+        :param jobs: number of threads decompressing blocks
+        :return: (entry index, problem) of every problem found, empty if the archive is intact
+        """
+        problems: List[Tuple[int, str]] = []
+        file_size: int = os.path.getsize(self.path)
+        checked: List[Tuple[int, TOCEntry]] = []
+        for index in range(len(self.entries)):
+            entry: TOCEntry = self.entries[index]
+            last: int = entry.block_index + self.block_count(entry)
+            if last > len(self.block_sizes):
+                problems.append((index, f'Blocks {entry.block_index}-{last} are past the block size table'))
+            elif entry.offset + self.block_offsets[last] - self.block_offsets[entry.block_index] > file_size:
+                problems.append((index, 'Data is past the end of the file'))
+            else:
+                checked.append((index, entry))
+
+        def blocks() -> Iterator[Tuple[int, Tuple[bytes, int]]]:
+            for entry_index, checked_entry in checked:
+                for block in self.read_blocks(checked_entry):
+                    yield entry_index, block
+
+        sizes: Dict[int, int] = {}
+        executor: Optional[Executor] = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        try:
+            for index, length, problem in imap_ordered(
+                    self.check_block, blocks(), executor, jobs * PSARC.BLOCKS_PER_JOB
+            ):
+                sizes[index] = sizes.get(index, 0) + length
+                if problem is not None:
+                    problems.append((index, problem))
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        for index, entry in checked:
+            if sizes.get(index, 0) != entry.decompressed_size:
+                problems.append(
+                    (index, f'Decompressed to {sizes.get(index, 0)} bytes instead of {entry.decompressed_size}')
+                )
+        self.logger.info('Total Decompressed Size: %s', human_size(sum(sizes.values())))
+
+        #: Names are only checked if the manifest itself is intact
+        if any(index == 0 for index, _ in problems):
+            problems.append((0, 'Names were not checked'))
+        else:
+            self.read_manifest()
+            name_count: int = len(self.entries.names)
+            if name_count != len(self.entries) - 1:
+                problems.append((0, f'Manifest has {name_count} names for {len(self.entries) - 1} entries'))
+            for index in range(1, min(len(self.entries), name_count + 1)):
+                if self.name_digest(self.entries.name(index)) != self.entries.hash(index):
+                    problems.append((index, 'Name digest does not match the TOC'))
+
+        problems.sort()
+        for index, problem in problems:
+            self.logger.error('Entry #%s: %s', index, problem)
+        return problems
 
     def save_entry(self, entry: TOCEntry, path: str, use_package_path: bool = True, create_directories: bool = True,
-                   overwrite: bool = True) -> bool:
+                   overwrite: bool = True, executor: Optional[Executor] = None, data: Optional[bytes] = None,
+                   writer: Optional[WriteBehind] = None, jobs: int = 1) -> bool:
+        """
+        Extracts a single entry.
+
+        :param entry: TOC entry
+        :param path: target file, or target directory if it exists or ends with a path separator
+        :param use_package_path: extract with directory structure
+        :param create_directories: create needed directory structure
+        :param overwrite: overwrite an already extracted file
+        :param executor: executor to decompress the blocks on
+        :param data: stored data of the entry already read by the caller (ex. as part of a coalesced read), the blocks
+            are read from the archive if None
+        :param writer: write-behind stage the file is written through, written synchronously if None
+        :param jobs: number of workers of the executor
+        :return: True if the entry was extracted
+        """
         if (os.path.exists(path) and os.path.isdir(path)) or (
                 not os.path.exists(path) and path.endswith(('/', '\\'))):
             if use_package_path:
@@ -51,22 +460,62 @@ class PSARC(FileFormatWithMagic[PSARCHeader]):
         if create_directories and not os.path.exists(directory):
             os.makedirs(directory)
 
-            self.logger.info(f'Extracting entry: {entry.name} -> {path}')
+        self.logger.info('Extracting entry: %s -> %s', entry.name, path)
         if not os.path.exists(path) or overwrite:
-            # TODO: Do this in C so its somewhat performant at least
-            with open(path, 'wb') as export:
-                for data in entry.get_decompression_stream(
-                        self.file_handle, self.header.block_size, self.header.compression_type
-                ):
-                    export.write(data)
-                    self.logger.info(f'File extracted!')
-                return True
+            with open(path, 'wb') if writer is None else writer.open(path) as export:
+                blocks: Iterator[Tuple[bytes, int]] = (
+                    self.read_blocks(entry) if data is None else self.split_blocks(entry, data)
+                )
+                for block in self.decompress_blocks(blocks, executor, jobs):
+                    export.write(block)
+            self.logger.info('File extracted!')
+            return True
         else:
             self.logger.info(
                 'Could not extract file because a file with the same name already exists, turn on overwrite'
             )
             return False
 
+    def extract(self, path: str, jobs: int = 1, use_package_path: bool = True, create_directories: bool = True,
+                overwrite: bool = True, write_queue_depth: int = DEFAULT_WRITE_QUEUE_DEPTH,
+                name_filter: Optional[NameFilter] = None) -> None:
+        """
+        Extracts every entry (except the manifest).
+
+        :param path: target directory
+        :param jobs: number of threads decompressing blocks, zlib and lzma release the GIL so this scales with cores
+        :param use_package_path: extract with directory structure
+        :param create_directories: create needed directory structure
+        :param overwrite: overwrite already extracted files
+        :param write_queue_depth: number of blocks queued for the writer thread before decompression blocks, 0 to
+            write synchronously
+        :param name_filter: only extract the entries it selects, the data of other entries is never read
+        """
+        #: Entries in the order they are stored in, small neighbouring entries read at once
+        reads: List[PlannedRead[TOCEntry]] = plan_reads(
+            self.select(name_filter), lambda entry: entry.offset, self.stored_size, max_read_size=PSARC.MAX_READ_SIZE
+        )
+        executor: Optional[Executor] = ThreadPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        try:
+            with WriteBehind(write_queue_depth) if write_queue_depth > 0 else nullcontext() as writer:
+                for read in reads:
+                    if read.size > PSARC.MAX_READ_SIZE:
+                        self.save_entry(
+                            read.items[0][0], path, use_package_path, create_directories, overwrite, executor,
+                            writer=writer, jobs=jobs
+                        )
+                        continue
+                    self.file_handle.seek(read.offset)
+                    with memoryview(self.file_handle.read(read.size)) as data:
+                        for entry, offset, size in read.items:
+                            self.save_entry(
+                                entry, path, use_package_path, create_directories, overwrite, executor,
+                                data[offset:offset + size], writer, jobs
+                            )
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
     def __del__(self):
         self.logger.debug('Cleaning up...')
         if not self.file_handle.closed:
@@ -1,10 +1,28 @@
+import gc
+import hashlib
 import logging
 import os
 import shutil
+import struct
 import subprocess
+import tempfile
+import time
+import tracemalloc
 import unittest
+import zlib
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from io import BufferedReader, BytesIO
+from typing import Dict, Iterator, List, Tuple
 
-from format.psarc import PSARC
+from base.codec import Codec, get_codec
+from base.name_filter import NameFilter
+from base.read_plan import PlannedRead, plan_reads
+from format.psarc import PSARC, PSARCWriter
+from format.psarc.compression_type import CompressionType
+from format.psarc.errors import InvalidPSARCException, UnsupportedCompressionTypeException
+from format.psarc.header import PSARCHeader
+from format.psarc.path_type import ArchivePathType
+from format.psarc.toc import TOCEntry
 from utils.utils import file_md5
 
 logging.basicConfig(level=logging.DEBUG, format='%(name)-32s: %(levelname)-8s %(message)s')
@@ -14,6 +32,56 @@ logger = logging.getLogger('PSARC Test')
 script_path = os.path.dirname(os.path.realpath(__file__)).replace('\\', '/')
 
 
+def create_test_psarc(path: str, entries: List[Tuple[str, bytes]], block_size: int = 0x10000,
+                      archive_path_type: ArchivePathType = ArchivePathType.RELATIVE,
+                      compression_type: CompressionType = CompressionType.ZLIB) -> None:
+    """
+    Creates a PSARC containing the specified entries, used for tests.
+
+    :param path: output path
+    :param entries: (name, data) pairs
+    :param block_size: archive block size
+    :param archive_path_type: archive path type flags
+    :param compression_type: block compression type
+    """
+    codec: Codec = get_codec(compression_type.value.decode('ASCII'))
+    files: List[bytes] = ['\n'.join(name for name, _ in entries).encode('UTF-8')] + [data for _, data in entries]
+    ignore_case: bool = bool(archive_path_type.value & ArchivePathType.IGNORE_CASE.value)
+    digests: List[bytes] = [bytes(16)] + [
+        hashlib.md5((name.upper() if ignore_case else name).encode('UTF-8')).digest() for name, _ in entries
+    ]
+
+    block_sizes: List[int] = []
+    blocks: List[bytes] = []
+    toc: List[Tuple[bytes, int, int, int]] = []
+    offset: int = 0
+    for digest, data in zip(digests, files):
+        toc.append((digest, len(block_sizes), len(data), offset))
+        for start in range(0, len(data), block_size):
+            block: bytes = data[start:start + block_size]
+            compressed: bytes = codec.compress(block)
+            if len(compressed) < len(block):
+                block = compressed
+            #: Full size blocks are stored with a size of 0
+            block_sizes.append(len(block) % block_size)
+            blocks.append(block)
+            offset += len(block)
+
+    width: int = 2 if block_size <= 0x10000 else 3 if block_size <= 0x1000000 else 4
+    toc_length: int = 0x20 + 30 * len(toc) + width * len(block_sizes)
+    with open(path, 'wb') as f:
+        f.write(b'PSAR' + struct.pack(
+            '>HH4sIIIII', 1, 4, compression_type.value, toc_length, 30, len(toc), block_size, archive_path_type.value
+        ))
+        for digest, block_index, size, data_offset in toc:
+            f.write(digest + struct.pack('>I', block_index) + size.to_bytes(5, 'big') +
+                    (toc_length + data_offset).to_bytes(5, 'big'))
+        for size in block_sizes:
+            f.write(size.to_bytes(width, 'big'))
+        for block in blocks:
+            f.write(block)
+
+
 class Tests(unittest.TestCase):
 
     def test_parser_psarc(self):
@@ -25,6 +93,723 @@ class Tests(unittest.TestCase):
 
                     #: PSARC File Object
                     PSARC(file)
+                    PSARC(file, use_mmap=True)
+
+    def test_layout_psarc(self):
+        for root, dirs, files in os.walk(script_path):
+            for file in files:
+                if file.endswith(('.psarc', '.PSARC')):
+                    with open(os.path.join(root, file), 'rb') as f:
+                        header_data: bytes = f.read(4 + PSARCHeader.LAYOUT.size)
+                        f.seek(0)
+                        psarc_file: PSARC = PSARC(os.path.join(root, file))
+
+                        #: Header serializes back to the exact bytes it was parsed from
+                        header: PSARCHeader = PSARCHeader(BytesIO(header_data))
+                        serialized: BytesIO = BytesIO()
+                        header.write(serialized)
+                        self.assertEqual(serialized.getvalue(), header_data)
+
+                        #: Bulk decoded TOC matches entries read one by one
+                        f.seek(len(header_data))
+                        for entry in psarc_file.entries:
+                            single: TOCEntry = TOCEntry(f)
+                            self.assertEqual(
+                                (single.hash, single.block_index, single.decompressed_size, single.offset),
+                                (entry.hash, entry.block_index, entry.decompressed_size, entry.offset)
+                            )
+                            self.assertEqual(TOCEntry.LAYOUT.pack(entry), TOCEntry.LAYOUT.pack(single))
+
+    def test_extraction_parallel(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            block_size: int = 0x4000
+            entries: List[Tuple[str, bytes]] = [
+                ('empty.bin', b''),
+                ('text/small.txt', b'small file'),
+                ('text/compressible.txt', b'PSARC block ' * 10000),
+                #: Random data does not compress, its blocks are stored as is (full ones with a size of 0)
+                ('random.bin', os.urandom(block_size * 3 + 0x123)),
+                ('mixed.bin', os.urandom(block_size) + bytes(block_size * 2) + os.urandom(block_size // 2)),
+            ]
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, entries, block_size=block_size)
+            psarc_file: PSARC = PSARC(psarc_path)
+            self.assertIn(0, psarc_file.block_sizes)
+
+            for jobs in (1, 4):
+                target_dir: str = os.path.join(temp_dir, f'extracted_{jobs}/')
+                psarc_file.extract(target_dir, jobs=jobs)
+                for name, data in entries:
+                    with open(os.path.join(target_dir, name), 'rb') as f:
+                        self.assertEqual(f.read(), data, name)
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_extraction_lzma(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            block_size: int = 0x4000
+            entries: List[Tuple[str, bytes]] = [
+                ('empty.bin', b''),
+                ('text/compressible.txt', b'PSARC block ' * 10000),
+                ('random.bin', os.urandom(block_size * 2 + 0x123)),
+            ]
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, entries, block_size=block_size, compression_type=CompressionType.LZMA)
+            psarc_file: PSARC = PSARC(psarc_path)
+            self.assertEqual(psarc_file.header.compression_type, CompressionType.LZMA)
+
+            for jobs in (1, 4):
+                target_dir: str = os.path.join(temp_dir, f'extracted_{jobs}/')
+                psarc_file.extract(target_dir, jobs=jobs)
+                for name, data in entries:
+                    with open(os.path.join(target_dir, name), 'rb') as f:
+                        self.assertEqual(f.read(), data, name)
+            with psarc_file.open('text/compressible.txt') as f:
+                f.seek(block_size + 5)
+                self.assertEqual(f.read(10), entries[1][1][block_size + 5:block_size + 15])
+
+            #: Compressed blocks of an unregistered codec can not be read
+            psarc_file.codec = None
+            with self.assertRaises(UnsupportedCompressionTypeException):
+                psarc_file.read_entry_data(psarc_file.entries[2])
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_writer(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            block_size: int = 0x1000
+            files: Dict[str, bytes] = {
+                'empty.bin': b'',
+                'Dir/Small.txt': b'small file',
+                'Dir/Sub/compressible.txt': b'PSARC block ' * 2000,
+                'random.bin': os.urandom(block_size * 2),
+                'mixed.bin': os.urandom(block_size // 2) + bytes(block_size * 2) + os.urandom(0x123),
+            }
+            source_dir: str = os.path.join(temp_dir, 'source')
+            for name, data in files.items():
+                os.makedirs(os.path.dirname(os.path.join(source_dir, name)), exist_ok=True)
+                with open(os.path.join(source_dir, name), 'wb') as f:
+                    f.write(data)
+
+            for compression_type, archive_path_type, jobs in (
+                    (CompressionType.ZLIB, ArchivePathType.RELATIVE, 1),
+                    (CompressionType.ZLIB, ArchivePathType.UNKNOWN, 2),
+                    (CompressionType.LZMA, ArchivePathType.ABSOLUTE, 2),
+            ):
+                psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+                writer: PSARCWriter = PSARCWriter(compression_type, block_size, archive_path_type)
+                writer.add_directory(source_dir)
+                writer.write(psarc_path, jobs=jobs)
+
+                psarc_file: PSARC = PSARC(psarc_path)
+                self.assertEqual(psarc_file.header.compression_type, compression_type)
+                self.assertEqual(psarc_file.header.archive_path_type, archive_path_type)
+                self.assertEqual(len(psarc_file.entries), len(files) + 1)
+                self.assertIn(0, psarc_file.block_sizes)
+                for name, data in files.items():
+                    entry: TOCEntry = psarc_file.find(name.lower() if archive_path_type.ignore_case else name)
+                    self.assertEqual(psarc_file.read_entry_data(entry), data, name)
+                self.assertEqual(
+                    set(psarc_file.entries.names),
+                    set(archive_path_type.entry_name(name) for name in files)
+                )
+                del psarc_file
+
+            #: Repacked sample archive has the same contents
+            original: PSARC = PSARC(os.path.join(script_path, 'gallery1.psarc'))
+            extract_dir: str = os.path.join(temp_dir, 'gallery1/')
+            original.extract(extract_dir)
+            writer = PSARCWriter(block_size=original.header.block_size)
+            writer.add_directory(extract_dir)
+            writer.write(os.path.join(temp_dir, 'gallery1.psarc'))
+            repacked: PSARC = PSARC(os.path.join(temp_dir, 'gallery1.psarc'))
+            self.assertEqual(list(repacked.entries.names), list(original.entries.names))
+            for entry in original.entries[1:]:
+                self.assertEqual(repacked.read_entry_data(repacked.find(entry.name)), original.read_entry_data(entry))
+            self.assertEqual(repacked.entries.hashes, original.entries.hashes)
+            del original, repacked
+
+            writer = PSARCWriter(archive_path_type=ArchivePathType.IGNORE_CASE)
+            writer.add_directory(source_dir)
+            with self.assertRaises(ValueError):
+                writer.add_file(os.path.join(source_dir, 'random.bin'), 'DIR/SMALL.TXT')
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_patch(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            block_size: int = 0x1000
+            text: bytes = b''.join(f'line {i}\n'.encode() for i in range(5000))
+            entries: List[Tuple[str, bytes]] = [
+                ('text.txt', text),
+                ('random.bin', os.urandom(block_size * 2 + 0x10)),
+                ('old.bin', b'old'),
+                ('removed.bin', b'removed'),
+            ]
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, entries, block_size=block_size)
+            original: PSARC = PSARC(psarc_path)
+
+            patch_dir: str = os.path.join(temp_dir, 'patch')
+            os.makedirs(os.path.join(patch_dir, 'new'))
+            with open(os.path.join(patch_dir, 'old.bin'), 'wb') as f:
+                f.write(b'new data' * 1000)
+            with open(os.path.join(patch_dir, 'new', 'file.bin'), 'wb') as f:
+                f.write(b'added')
+
+            #: Added entries compressed at another level than the original ones, copied blocks stay as they were
+            writer: PSARCWriter = PSARCWriter.from_psarc(original, level=1)
+            writer.remove('removed.bin')
+            writer.add_directory(patch_dir, replace=True)
+            with self.assertRaises(ValueError):
+                writer.write(psarc_path)
+            patched_path: str = os.path.join(temp_dir, 'patched.psarc')
+            writer.write(patched_path, jobs=2)
+
+            patched: PSARC = PSARC(patched_path)
+            self.assertEqual(list(patched.entries.names), ['text.txt', 'random.bin', 'old.bin', 'new/file.bin'])
+            self.assertEqual(patched.read_entry_data(patched.find('text.txt')), text)
+            self.assertEqual(patched.read_entry_data(patched.find('random.bin')), entries[1][1])
+            self.assertEqual(patched.read_entry_data(patched.find('old.bin')), b'new data' * 1000)
+            self.assertEqual(patched.read_entry_data(patched.find('new/file.bin')), b'added')
+            with self.assertRaises(FileNotFoundError):
+                patched.find('removed.bin')
+            for name, _ in entries[:2]:
+                self.assertEqual(
+                    list(patched.read_blocks(patched.find(name))), list(original.read_blocks(original.find(name)))
+                )
+            self.assertNotEqual(zlib.compress(text[:block_size], 1), zlib.compress(text[:block_size]))
+
+            #: Archives with other settings are recompressed
+            writer = PSARCWriter(block_size=block_size * 2)
+            writer.add_psarc(original)
+            writer.write(patched_path)
+            patched = PSARC(patched_path)
+            for name, data in entries:
+                self.assertEqual(patched.read_entry_data(patched.find(name)), data)
+            del original, patched
+
+            #: Unchanged copy of a case insensitive archive with absolute paths
+            original = PSARC(os.path.join(script_path, 'ms3patchv0103.psarc'))
+            PSARCWriter.from_psarc(original).write(patched_path)
+            patched = PSARC(patched_path)
+            self.assertEqual(patched.entries.hashes[16:], original.entries.hashes[16:])
+            self.assertEqual(list(patched.entries.names), list(original.entries.names))
+            for entry in original.entries[1:]:
+                self.assertEqual(patched.read_entry_data(patched.find(entry.name)), original.read_entry_data(entry))
+            del original, patched
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_patch_in_place(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            block_size: int = 0x1000
+            text: bytes = b''.join(f'line {i}\n'.encode() for i in range(5000))
+            entries: List[Tuple[str, bytes]] = [
+                ('text.txt', text),
+                ('random.bin', os.urandom(block_size * 2 + 0x10)),
+                ('old.bin', b'old'),
+                ('removed.bin', b'removed'),
+            ]
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, entries, block_size=block_size)
+            original: PSARC = PSARC(psarc_path)
+            offsets: Dict[str, int] = {name: original.find(name).offset for name, _ in entries}
+            original_size: int = os.path.getsize(psarc_path)
+
+            #: Replacing an entry keeps the names and the manifest, only the new data is appended
+            writer: PSARCWriter = PSARCWriter.from_psarc(original)
+            writer.add('old.bin', b'new data', replace=True)
+            writer.patch()
+            del original
+            patched: PSARC = PSARC(psarc_path)
+            self.assertEqual(patched.verify(), [])
+            self.assertEqual(list(patched.entries.names), [name for name, _ in entries])
+            self.assertEqual(os.path.getsize(psarc_path), original_size + len(b'new data'))
+            self.assertEqual(patched.read_entry_data(patched.find('old.bin')), b'new data')
+            for name, data in entries[:2] + entries[3:]:
+                self.assertEqual(patched.find(name).offset, offsets[name])
+                self.assertEqual(patched.read_entry_data(patched.find(name)), data)
+
+            #: Grown tables, the entries stored where they go are moved to the end
+            writer = PSARCWriter.from_psarc(patched)
+            writer.remove('removed.bin')
+            added: List[Tuple[str, bytes]] = [(f'new/{i:03}.bin', os.urandom(i)) for i in range(100)]
+            for name, data in added:
+                writer.add(name, data)
+            writer.patch(jobs=2)
+            del patched
+            patched = PSARC(psarc_path)
+            self.assertEqual(patched.verify(), [])
+            self.assertEqual(
+                list(patched.entries.names), ['text.txt', 'random.bin', 'old.bin'] + [name for name, _ in added]
+            )
+            self.assertGreater(patched.header.toc_length, offsets['text.txt'])
+            self.assertGreaterEqual(patched.find('text.txt').offset, original_size)
+            self.assertEqual(patched.find('random.bin').offset, offsets['random.bin'])
+            for name, data in [entries[0], entries[1], ('old.bin', b'new data')] + added:
+                self.assertEqual(patched.read_entry_data(patched.find(name)), data)
+            with self.assertRaises(FileNotFoundError):
+                patched.find('removed.bin')
+            with self.assertRaises(ValueError):
+                PSARCWriter().patch()
+            del patched
+
+            #: Case insensitive archive with absolute paths
+            shutil.copy(os.path.join(script_path, 'ms3patchv0103.psarc'), psarc_path)
+            original = PSARC(psarc_path)
+            expected: Dict[str, bytes] = {entry.name: original.read_entry_data(entry) for entry in original.entries[1:]}
+            writer = PSARCWriter.from_psarc(original)
+            writer.add('/added.txt', b'added')
+            writer.patch()
+            del original
+            patched = PSARC(psarc_path)
+            self.assertEqual(patched.verify(), [])
+            expected['/added.txt'] = b'added'
+            self.assertEqual(list(patched.entries.names), list(expected))
+            for name, data in expected.items():
+                self.assertEqual(patched.read_entry_data(patched.find(name.lower())), data)
+            del patched
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_manifest_streaming(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            #: Small blocks so names span block boundaries
+            names: List[str] = [f'directory_{i % 7}/file_{i:05}.bin' for i in range(3000)]
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, [(name, b'') for name in names], block_size=0x400)
+
+            psarc_file: PSARC = PSARC(psarc_path, lazy=True)
+            manifest: Iterator[str] = psarc_file.iter_manifest()
+            self.assertEqual(next(manifest), names[0])
+            #: Usable before the rest of the manifest is decompressed
+            self.assertEqual(psarc_file.entries[1].name, names[0])
+            self.assertLess(len(psarc_file.entries.names), len(names))
+            self.assertFalse(psarc_file.manifest_read)
+            del manifest
+
+            #: Abandoned iteration is resumed without adding names twice
+            self.assertEqual(list(psarc_file.iter_manifest()), names)
+            self.assertTrue(psarc_file.manifest_read)
+            self.assertEqual(list(psarc_file.entries.names), names)
+            self.assertEqual(list(psarc_file.iter_manifest()), names)
+
+            #: Peak memory compared to decoding and splitting the whole manifest at once
+            names = [f'directory_{i % 7}/file_{i:06}.bin' for i in range(20000)]
+            create_test_psarc(psarc_path, [(name, b'') for name in names])
+            peaks: List[int] = []
+            for streaming in (False, True):
+                psarc_file = PSARC(psarc_path, lazy=True)
+                gc.collect()
+                tracemalloc.start()
+                if streaming:
+                    psarc_file.read_manifest()
+                else:
+                    psarc_file.entries.names.extend(
+                        psarc_file.read_entry_data(psarc_file.entries[0]).decode('UTF-8').splitlines()
+                    )
+                peaks.append(tracemalloc.get_traced_memory()[1])
+                tracemalloc.stop()
+                self.assertEqual(list(psarc_file.entries.names), names)
+                del psarc_file
+            logger.info(f'Manifest peak memory: {peaks[0]} bytes at once, {peaks[1]} bytes streaming')
+            self.assertLess(peaks[1], peaks[0])
+
+            #: Windows line endings and a missing final line break
+            create_test_psarc(psarc_path, [('a.bin\r', b''), ('b.bin', b'')], block_size=0x400)
+            psarc_file = PSARC(psarc_path)
+            self.assertEqual(list(psarc_file.entries.names), ['a.bin', 'b.bin'])
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_verify(self):
+        for file in ('gallery1.psarc', 'CB_GA_STARGATE01.PSARC', 'ms3patchv0103.psarc'):
+            psarc_file: PSARC = PSARC(os.path.join(script_path, file), lazy=True)
+            self.assertEqual(psarc_file.verify(jobs=2), [], file)
+            del psarc_file
+
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            block_size: int = 0x1000
+            entries: List[Tuple[str, bytes]] = [
+                ('text.txt', b'PSARC block ' * 1000),
+                ('random.bin', os.urandom(block_size + 0x10)),
+                ('other.txt', b'other ' * 1000),
+            ]
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, entries, block_size=block_size)
+            psarc_file = PSARC(psarc_path)
+            text_offset: int = psarc_file.entries[1].offset
+            file_size: int = os.path.getsize(psarc_path)
+            del psarc_file
+
+            with open(psarc_path, 'r+b') as f:
+                #: Damaged compressed block of the first entry
+                f.seek(text_offset + 0x10)
+                f.write(b'\xFF' * 8)
+                #: Name digest of the last entry
+                f.seek(PSARC.HEADER_SIZE + TOCEntry.LAYOUT.size * 3)
+                f.write(bytes(16))
+            psarc_file = PSARC(psarc_path)
+            self.assertEqual([index for index, _ in psarc_file.verify(jobs=2)], [1, 1, 3])
+            del psarc_file
+
+            #: Truncated archive
+            with open(psarc_path, 'r+b') as f:
+                f.truncate(file_size - 0x10)
+            psarc_file = PSARC(psarc_path, lazy=True)
+            self.assertIn((3, 'Data is past the end of the file'), psarc_file.verify())
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_read_plan(self):
+        #: (offset, size) of items in table order
+        items: List[Tuple[int, int]] = [
+            (0x5000, 0x100), (0x0, 0x1000), (0x1000, 0x10), (0x1020, 0x0), (0x10000, 0x100), (0x20000, 0x800000),
+            (0x1010, 0x10),
+        ]
+        reads: List[PlannedRead[Tuple[int, int]]] = plan_reads(
+            items, lambda item: item[0], lambda item: item[1], max_read_size=0x4000, max_gap=0x1000
+        )
+        self.assertEqual([(read.offset, read.size) for read in reads], [
+            (0x0, 0x1020), (0x5000, 0x100), (0x10000, 0x100), (0x20000, 0x800000)
+        ])
+        self.assertEqual(
+            [(offset, size) for (_, offset, size) in reads[0].items],
+            [(0, 0x1000), (0x1000, 0x10), (0x1010, 0x10), (0x1020, 0)]
+        )
+        self.assertEqual([item for read in reads for item, _, _ in read.items], sorted(items))
+
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            entries: List[Tuple[str, bytes]] = [
+                ('large.bin', os.urandom(PSARC.MAX_READ_SIZE + 0x1234)),
+                ('small.txt', b'small file'),
+                ('empty.bin', b''),
+                ('text.txt', b'PSARC block ' * 10000),
+            ]
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, entries)
+            psarc_file: PSARC = PSARC(psarc_path)
+            reads = plan_reads(psarc_file.entries[1:], lambda entry: entry.offset, psarc_file.stored_size,
+                               max_read_size=PSARC.MAX_READ_SIZE)
+            self.assertEqual([len(read.items) for read in reads], [1, 3])
+            target_dir: str = os.path.join(temp_dir, 'extracted/')
+            psarc_file.extract(target_dir, jobs=2)
+            for name, data in entries:
+                with open(os.path.join(target_dir, name), 'rb') as f:
+                    self.assertEqual(f.read(), data, name)
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_selective_extraction(self):
+        #: Case insensitive archive with absolute paths, patterns match names without the leading slash
+        psarc_file: PSARC = PSARC(os.path.join(script_path, 'ms3patchv0103.psarc'), lazy=True)
+        names: List[str] = [name for name in psarc_file.iter_manifest()]
+        name_filter: NameFilter = NameFilter(['DATA/*'], ['*.xml'], ignore_case=True)
+        self.assertEqual(
+            [entry.name for entry in psarc_file.select(name_filter)],
+            [name for name in names if name.lower().startswith('/data/') and not name.endswith('.xml')]
+        )
+        self.assertEqual(len(psarc_file.select()), len(names))
+        del psarc_file
+
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            entries: List[Tuple[str, bytes]] = [
+                ('textures/a.dds', b'a' * 100),
+                ('textures/b.png', b'b' * 100),
+                ('sounds/c.ogg', b'c' * 100),
+            ]
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, entries)
+            psarc_file = PSARC(psarc_path, lazy=True)
+            target_dir: str = os.path.join(temp_dir, 'extracted/')
+            psarc_file.extract(target_dir, name_filter=NameFilter([r'\.(dds|ogg)$'], regex=True))
+            self.assertEqual(sorted(os.listdir(target_dir)), ['sounds', 'textures'])
+            self.assertEqual(os.listdir(os.path.join(target_dir, 'textures')), ['a.dds'])
+            with open(os.path.join(target_dir, 'sounds', 'c.ogg'), 'rb') as f:
+                self.assertEqual(f.read(), b'c' * 100)
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_read_range(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            block_size: int = 0x1000
+            data: bytes = os.urandom(block_size * 2) + b'PSARC ' * 3000 + os.urandom(0x345)
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, [('first.bin', os.urandom(0x2345)), ('data.bin', data)], block_size)
+            psarc_file: PSARC = PSARC(psarc_path)
+            entry: TOCEntry = psarc_file.entries[2]
+            self.assertEqual(len(psarc_file.block_offsets), len(psarc_file.block_sizes) + 1)
+
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                for offset, length in (
+                        (0, 1), (0, block_size), (block_size - 1, 2), (block_size * 2 + 7, block_size * 3),
+                        (len(data) - 5, 5), (len(data) - 5, 100), (len(data), 10), (len(data) + 10, 1), (123, 0)
+                ):
+                    expected: bytes = data[offset:offset + length]
+                    self.assertEqual(psarc_file.read(entry, offset, length), expected, (offset, length))
+                    self.assertEqual(psarc_file.read(entry, offset, length, executor), expected, (offset, length))
+            self.assertEqual(psarc_file.read(entry, 0x100), data[0x100:])
+            self.assertEqual(psarc_file.read(entry), psarc_file.read_entry_data(entry))
+            with self.assertRaises(ValueError):
+                psarc_file.read(entry, -1, 1)
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_open(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            block_size: int = 0x1000
+            data: bytes = os.urandom(block_size) + b'PSARC ' * 2000 + os.urandom(0x123)
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, [('empty.bin', b''), ('dir/data.bin', data)], block_size)
+            psarc_file: PSARC = PSARC(psarc_path)
+
+            with psarc_file.open('dir/data.bin', cache_size=2) as f:
+                self.assertTrue(f.seekable())
+                self.assertEqual(f.read(4), data[:4])
+                self.assertEqual(f.seek(block_size - 2), block_size - 2)
+                self.assertEqual(f.read(5), data[block_size - 2:block_size + 3])
+                self.assertEqual(f.seek(-0x10, os.SEEK_END), len(data) - 0x10)
+                self.assertEqual(f.read(), data[-0x10:])
+                self.assertEqual(f.read(1), b'')
+                f.seek(3)
+                self.assertEqual(f.read(), data[3:])
+                self.assertLessEqual(len(f.cache), 2)
+                with self.assertRaises(ValueError):
+                    f.seek(-1)
+
+            #: Buffered wrapper behaves like a regular file
+            with BufferedReader(psarc_file.open(psarc_file.entries[2])) as f:
+                f.seek(0x1234)
+                self.assertEqual(f.read(0x2000), data[0x1234:0x3234])
+            with psarc_file.open('empty.bin') as f:
+                self.assertEqual(f.read(), b'')
+            with self.assertRaises(FileNotFoundError):
+                psarc_file.open('missing.bin')
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_open_truncated(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            block_size: int = 0x1000
+            data: bytes = b'PSARC ' * 2000
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            #: LZMA returns what it could decompress from a truncated block instead of failing
+            create_test_psarc(psarc_path, [('data.bin', data)], block_size, compression_type=CompressionType.LZMA)
+            with open(psarc_path, 'r+b') as f:
+                f.truncate(os.path.getsize(psarc_path) - 0x10)
+            psarc_file: PSARC = PSARC(psarc_path)
+            with psarc_file.open('data.bin') as f:
+                with self.assertRaises(InvalidPSARCException):
+                    f.read()
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_find(self):
+        #: Case insensitive archive with absolute paths
+        psarc_path: str = os.path.join(script_path, 'ms3patchv0103.psarc')
+        psarc_file: PSARC = PSARC(psarc_path)
+        lazy_psarc_file: PSARC = PSARC(psarc_path, lazy=True)
+        for entry in psarc_file.entries[1:]:
+            for name in (entry.name, entry.name.lower(), entry.name.lstrip('/')):
+                found: TOCEntry = lazy_psarc_file.find(name)
+                self.assertEqual((found.offset, found.decompressed_size), (entry.offset, entry.decompressed_size))
+                self.assertEqual(found.name, name)
+        self.assertEqual(
+            lazy_psarc_file.open(psarc_file.entries[1].name.lower()).read(),
+            psarc_file.read_entry_data(psarc_file.entries[1])
+        )
+        #: Digests were enough, the manifest was never decompressed
+        self.assertFalse(lazy_psarc_file.manifest_read)
+        with self.assertRaises(FileNotFoundError):
+            lazy_psarc_file.find('/missing.bin')
+        self.assertTrue(lazy_psarc_file.manifest_read)
+        del psarc_file, lazy_psarc_file
+
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            psarc_path = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, [('Dir/File.bin', b'data'), ('other.bin', b'other')])
+            psarc_file = PSARC(psarc_path, lazy=True)
+            self.assertEqual(psarc_file.read_entry_data(psarc_file.find('Dir/File.bin')), b'data')
+            self.assertEqual(psarc_file.read_entry_data(psarc_file.find('Dir\\File.bin')), b'data')
+            self.assertFalse(psarc_file.manifest_read)
+            with self.assertRaises(FileNotFoundError):
+                psarc_file.find('dir/file.bin')
+            del psarc_file
+
+            #: Digests of the raw names in an archive flagged case insensitive with absolute paths, the manifest names
+            #: are normalized like the digest index would, whether the manifest was read already or not
+            with open(psarc_path, 'r+b') as f:
+                f.seek(0x1C)
+                f.write(struct.pack('>I', ArchivePathType.IGNORE_CASE.value | ArchivePathType.ABSOLUTE.value))
+            for read_manifest in (False, True):
+                psarc_file = PSARC(psarc_path, lazy=True)
+                if read_manifest:
+                    psarc_file.read_manifest()
+                for name in ('/dir/file.bin', 'DIR\\FILE.BIN', 'Dir/File.bin'):
+                    self.assertEqual(psarc_file.read_entry_data(psarc_file.find(name)), b'data')
+                with self.assertRaises(FileNotFoundError):
+                    psarc_file.find('/dir/missing.bin')
+                del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_parallel_decompression(self):
+        class InlineExecutor(Executor):
+            def submit(self, fn, *args, **kwargs) -> Future:
+                future: Future = Future()
+                future.set_result(fn(*args, **kwargs))
+                return future
+
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            data: bytes = b''.join(f'line {i} of a compressible asset\n'.encode() for i in range(5000))
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, [('data.txt', data)], block_size=0x1000)
+            psarc_file: PSARC = PSARC(psarc_path)
+            entry: TOCEntry = psarc_file.entries[1]
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                self.assertEqual(psarc_file.read_entry_data(entry, executor, 4), data)
+
+            #: Blocks in flight only depend on the number of jobs, not on the executor type
+            read: List[int] = []
+
+            def blocks() -> Iterator[Tuple[bytes, int]]:
+                for block in psarc_file.read_blocks(entry):
+                    read.append(len(block[0]))
+                    yield block
+
+            decompressed: Iterator[bytes] = psarc_file.decompress_blocks(blocks(), InlineExecutor(), 3)
+            self.assertEqual(next(decompressed), data[:0x1000])
+            self.assertEqual(len(read), 3 * PSARC.BLOCKS_PER_JOB)
+            self.assertEqual(data[0x1000:], b''.join(decompressed))
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    @unittest.skipUnless(os.environ.get('PSTOOLS_BENCHMARK'), 'set PSTOOLS_BENCHMARK to run benchmarks')
+    def test_benchmark_decompression(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            #: Text-like data so zlib has to do real work on every block
+            data: bytes = b''.join(f'line {i} of a large compressible asset\n'.encode() for i in range(1000000))
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, [('large.txt', data)])
+            psarc_file: PSARC = PSARC(psarc_path)
+            entry: TOCEntry = psarc_file.entries[1]
+
+            for jobs in sorted({1, os.cpu_count() or 1}):
+                with ThreadPoolExecutor(max_workers=jobs) as executor:
+                    start: float = time.perf_counter()
+                    size: int = sum(
+                        len(block) for block in psarc_file.get_decompression_stream(entry, executor, jobs)
+                    )
+                    elapsed: float = time.perf_counter() - start
+                self.assertEqual(size, len(data))
+                logger.info(f'{jobs} job(s): {size / elapsed / 1024 / 1024:.1f} MiB/s')
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_codecs(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            data: bytes = b''.join(f'line {i} of a compressible asset\n'.encode() for i in range(2000))
+            for compression_type in CompressionType:
+                codec: Codec = get_codec(compression_type.value.decode('ASCII'))
+                self.assertEqual(codec.decompress(codec.compress(data[:0x1000]), 0x1000), data[:0x1000])
+                psarc_path: str = os.path.join(temp_dir, f'{compression_type.name.lower()}.psarc')
+                create_test_psarc(
+                    psarc_path, [('data.txt', data)], block_size=0x1000, compression_type=compression_type
+                )
+                psarc_file: PSARC = PSARC(psarc_path)
+                with ThreadPoolExecutor(max_workers=2) as executor:
+                    self.assertEqual(psarc_file.read_entry_data(psarc_file.entries[1], executor, 2), data)
+                del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    @unittest.skipUnless(os.environ.get('PSTOOLS_BENCHMARK'), 'set PSTOOLS_BENCHMARK to run benchmarks')
+    def test_benchmark_codecs(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            data: bytes = b''.join(f'line {i} of a large compressible asset\n'.encode() for i in range(200000))
+            for compression_type in CompressionType:
+                psarc_path: str = os.path.join(temp_dir, f'{compression_type.name.lower()}.psarc')
+                create_test_psarc(psarc_path, [('large.txt', data)], compression_type=compression_type)
+                psarc_file: PSARC = PSARC(psarc_path)
+                entry: TOCEntry = psarc_file.entries[1]
+
+                for jobs in sorted({1, os.cpu_count() or 1}):
+                    with ThreadPoolExecutor(max_workers=jobs) as executor:
+                        start: float = time.perf_counter()
+                        size: int = sum(
+                            len(block) for block in psarc_file.get_decompression_stream(entry, executor, jobs)
+                        )
+                        elapsed: float = time.perf_counter() - start
+                    self.assertEqual(size, len(data))
+                    logger.info(
+                        f'{compression_type.name} {jobs} job(s): {os.path.getsize(psarc_path)} bytes, '
+                        f'{size / elapsed / 1024 / 1024:.1f} MiB/s'
+                    )
+                del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_memory_psarc(self):
+        temp_dir: str = tempfile.mkdtemp()
+        try:
+            entries: List[Tuple[str, bytes]] = [(f'dir/file_{i}.bin', bytes(16)) for i in range(20000)]
+            psarc_path: str = os.path.join(temp_dir, 'test.psarc')
+            create_test_psarc(psarc_path, entries)
+
+            logging.disable(logging.CRITICAL)
+            try:
+                #: Warm up, so lazily created module state is not counted
+                PSARC(psarc_path)
+
+                #: Columnar table against the same entries held as one object each
+                gc.collect()
+                tracemalloc.start()
+                psarc_file: PSARC = PSARC(psarc_path)
+                table_size: int = tracemalloc.get_traced_memory()[0]
+                objects: List[TOCEntry] = list(psarc_file.entries)
+                objects_size: int = tracemalloc.get_traced_memory()[0] - table_size
+                tracemalloc.stop()
+            finally:
+                logging.disable(logging.NOTSET)
+
+            self.assertEqual([entry.name for entry in objects[1:]], [name for name, _ in entries])
+            self.assertEqual(objects[-1].decompressed_size, 16)
+            self.assertIsNone(objects[0].name)
+            logger.info(f'{len(objects)} entries, table: {table_size / len(objects):.1f} bytes per entry, '
+                        f'objects: {objects_size / len(objects):.1f} bytes per entry')
+            self.assertLess(table_size * 2, objects_size)
+            del psarc_file
+        finally:
+            shutil.rmtree(temp_dir)
 
     def test_extraction_psarc(self):
         for root, dirs, files in os.walk(script_path):
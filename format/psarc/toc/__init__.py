@@ -1 +1,2 @@
 from .entry import TOCEntry
+from .table import TOCEntryTable
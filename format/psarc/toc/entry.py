@@ -1,57 +1,31 @@
-import struct
-from binascii import hexlify
-from typing import IO, Generator
+import logging
+from typing import IO, Any, Dict, Optional
 
-from base import LoggingClass
-from utils.utils import read_u32, Endianess
-from ..compression_type import CompressionType
-from ..utils import psarc_zlib_multi_stream_unpack
+from base import Field, Layout, LazyHex, LoggingClass
+from utils.utils import Endianess
 
 
 class TOCEntry(LoggingClass):
-    def __init__(self, f: IO):
+    __slots__ = ('name', 'hash', 'block_index', 'decompressed_size', 'offset')
+
+    #: TOC entry record layout
+    LAYOUT: Layout = Layout(Endianess.BIG_ENDIAN, [
+        Field('hash', '16s'),
+        Field('block_index', 'I'),
+        Field.uint('decompressed_size', 5),
+        Field.uint('offset', 5),
+    ])
+
+    def __init__(self, f: Optional[IO] = None, values: Optional[Dict[str, Any]] = None):
         super().__init__()
 
         #: Name (read later after reading the name data)
         self.name: str = None
 
-        #: 128-bit MD5 Name Digest
-        self.hash: bytes = f.read(16)
-        self.logger.debug(f'Hash: {hexlify(self.hash)}')
-
-        #: Entry Block Index
-        self.block_index: int = read_u32(f, endianess=Endianess.BIG_ENDIAN)
-        self.logger.debug(f'Block Index: {self.block_index}')
-
-        #: Entry Decompressed Size
-        self.decompressed_size: int = struct.unpack('>Q', bytes([0, 0, 0]) + f.read(5))[0]
-        self.logger.debug(f'Decompressed Size: {self.decompressed_size}')
-
-        #: Entry Offset
-        self.offset: int = struct.unpack('>Q', bytes([0, 0, 0]) + f.read(5))[0]
-        self.logger.debug(f'Offset: {self.offset}')
-
-    # TODO: Implement LZMA Decompression (And find an example file...)
-    # noinspection PyUnusedLocal
-    def get_decompression_stream(
-            self, f: IO, block_size: int, compression_type: CompressionType
-    ) -> Generator[bytes, None, None]:
-        f.seek(self.offset)
-        if f.read(1)[0] == 0x78:
-            f.seek(self.offset)
-            for data in psarc_zlib_multi_stream_unpack(f, self.decompressed_size, block_size):
-                yield data
-        else:
-            f.seek(self.offset)
-            bytes_remaining: int = self.decompressed_size
-            while bytes_remaining != 0:
-                to_read: int = block_size if bytes_remaining >= block_size else bytes_remaining
-                data = f.read(to_read)
-                yield data
-                bytes_remaining -= len(data)
-
-    def read_entry_data(self, f: IO, block_size: int, compression_type: CompressionType) -> bytearray:
-        _data: bytearray = bytearray()
-        for data in self.get_decompression_stream(f, block_size, compression_type):
-            _data += data
-        return _data
+        #: 128-bit MD5 Name Digest, Entry Block Index, Entry Decompressed Size and Entry Offset
+        Layout.assign(self, TOCEntry.LAYOUT.read(f) if values is None else values)
+        if TOCEntry.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('Hash: %s', LazyHex(self.hash))
+            self.logger.debug('Block Index: %s', self.block_index)
+            self.logger.debug('Decompressed Size: %s', self.decompressed_size)
+            self.logger.debug('Offset: %s', self.offset)
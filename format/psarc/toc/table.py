@@ -0,0 +1,56 @@
+from array import array
+from typing import IO
+
+from base.entry_table import EntryTable, NameTable
+from .entry import TOCEntry
+
+
+class TOCEntryTable(EntryTable[TOCEntry]):
+    """
+    Columnar TOC, entries are :class:`TOCEntry` views built on access
+    """
+
+    def __init__(self, f: IO, count: int):
+        #: 128-bit MD5 Name Digests, back to back
+        self.hashes: bytes = b''
+
+        #: Entry Block Indexes
+        self.block_indexes: array = array('I')
+
+        #: Entry Decompressed Sizes
+        self.decompressed_sizes: array = array('Q')
+
+        #: Entry Offsets
+        self.offsets: array = array('Q')
+
+        #: Names of the entries following the manifest (set after reading the manifest)
+        self.names: NameTable = NameTable()
+
+        #: Whole TOC read at once
+        records = list(TOCEntry.LAYOUT.iter_unpack_raw(f.read(TOCEntry.LAYOUT.size * count)))
+        if len(records) != 0:
+            hashes, block_indexes, decompressed_sizes, offsets = zip(*records)
+            self.hashes = b''.join(hashes)
+            self.block_indexes = array('I', block_indexes)
+            self.decompressed_sizes = array('Q', [int.from_bytes(size, 'big') for size in decompressed_sizes])
+            self.offsets = array('Q', [int.from_bytes(offset, 'big') for offset in offsets])
+
+    def __len__(self) -> int:
+        return len(self.block_indexes)
+
+    def hash(self, index: int) -> bytes:
+        return self.hashes[index * 16:index * 16 + 16]
+
+    def name(self, index: int) -> str:
+        #: The manifest (first entry) has no name
+        return self.names[index - 1] if 0 < index <= len(self.names) else None
+
+    def entry(self, index: int) -> TOCEntry:
+        entry: TOCEntry = TOCEntry(values={
+            'hash': self.hash(index),
+            'block_index': self.block_indexes[index],
+            'decompressed_size': self.decompressed_sizes[index],
+            'offset': self.offsets[index],
+        })
+        entry.name = self.name(index)
+        return entry
@@ -0,0 +1,446 @@
+import os
+from array import array
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from itertools import groupby
+from types import SimpleNamespace
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from base import LoggingClass
+from base.codec import Codec, get_codec
+from base.parallel import imap_ordered
+from utils.utils import human_size
+from .compression_type import CompressionType
+from .errors import UnsupportedCompressionTypeException
+from .header import PSARCHeader
+from .path_type import ArchivePathType
+from .psarc import PSARC
+from .toc import TOCEntry
+
+
+#: Entry data, a file path, data in memory or an entry of an existing archive
+Source = Union[str, bytes, Tuple[PSARC, TOCEntry]]
+
+
+def compress_block(codec: Codec, level: Optional[int], data: bytes) -> bytes:
+    """
+    Compresses a single block, blocks which do not shrink are stored as is.
+    Defined at module level so it can be sent to worker processes.
+
+    :param codec: block codec
+    :param level: compression level, codec default if None
+    :param data: block data
+    :return: stored block data
+    """
+    compressed: bytes = codec.compress(data, level)
+    #: A stored block is only read as uncompressed if its length is the decompressed length
+    return compressed if len(compressed) < len(data) else data
+
+
+class PSARCWriter(LoggingClass):
+    """
+    Builds PSARC archives.
+
+    Entries are only collected when added, their data is read block by block while the archive is written, so the
+    memory use is bounded by the number of blocks in flight and not by the size of the files.
+
+    Entries of existing archives with the same block size and compression type are copied without recompressing
+    their blocks. A writer created from an archive can also patch it in place, then only the data of the added or
+    replaced files is written.
+    """
+
+    #: Version written to the header
+    VERSION: Tuple[int, int] = (1, 4)
+
+    #: Uncompressed blocks in flight per compression worker
+    BLOCKS_PER_JOB: int = 4
+
+    #: Size of the reads used to copy blocks of existing archives
+    COPY_CHUNK_SIZE: int = 0x100000
+
+    def __init__(self, compression_type: CompressionType = CompressionType.ZLIB, block_size: int = 0x10000,
+                 archive_path_type: ArchivePathType = ArchivePathType.RELATIVE, level: Optional[int] = None):
+        """
+        Init
+
+        :param compression_type: block compression type
+        :param block_size: decompressed size of a full block
+        :param archive_path_type: archive path type flags, decide the form of the names and of their digests
+        :param level: compression level, codec default if None
+        """
+        if block_size <= 0 or block_size > 0xFFFFFFFF:
+            raise ValueError(f'Invalid block size {block_size}')
+
+        #: Block compression type
+        self.compression_type: CompressionType = compression_type
+
+        #: Block codec
+        self.codec: Codec = get_codec(compression_type.value.decode('ASCII'))
+        if self.codec is None:
+            raise UnsupportedCompressionTypeException(compression_type)
+
+        #: Compression level
+        self.level: Optional[int] = level
+
+        #: Decompressed size of a full block
+        self.block_size: int = block_size
+
+        #: Archive path type flags
+        self.archive_path_type: ArchivePathType = archive_path_type
+
+        #: (manifest name, source) of every entry in archive order by name digest
+        self.entries: Dict[bytes, Tuple[str, Source]] = {}
+
+        #: Archive the writer was created from, patched in place by :meth:`patch`
+        self.psarc: Optional[PSARC] = None
+
+    @staticmethod
+    def from_psarc(psarc: PSARC, level: Optional[int] = None) -> 'PSARCWriter':
+        """
+        Writer with the settings and entries of an existing archive, used to patch it.
+
+        :param psarc: archive to patch
+        :param level: compression level of added entries, codec default if None
+        :return: writer
+        """
+        writer: PSARCWriter = PSARCWriter(
+            psarc.header.compression_type, psarc.header.block_size, psarc.header.archive_path_type, level
+        )
+        writer.add_psarc(psarc)
+        writer.psarc = psarc
+        return writer
+
+    @property
+    def block_size_width(self) -> int:
+        """Width in bytes of a block size table entry, the smallest one able to hold the block size."""
+        if self.block_size <= 0x10000:
+            return 2
+        elif self.block_size <= 0x1000000:
+            return 3
+        return 4
+
+    def add(self, name: str, source: Source, replace: bool = False) -> None:
+        """
+        Adds an entry, a replaced entry keeps its position.
+
+        :param name: entry name
+        :param source: entry data source
+        :param replace: replace an entry with the same name instead of failing
+        """
+        name = self.archive_path_type.entry_name(name)
+        digest: bytes = self.archive_path_type.name_digest(name)
+        if digest in self.entries and not replace:
+            raise ValueError(f'Duplicate entry name {name}')
+        self.entries[digest] = (name, source)
+
+    def add_file(self, path: str, name: Optional[str] = None, replace: bool = False) -> None:
+        """
+        Adds a file.
+
+        :param path: path of the file to add
+        :param name: entry name, the file name if None
+        :param replace: replace an entry with the same name instead of failing
+        """
+        self.add(os.path.basename(path) if name is None else name, path, replace)
+
+    def add_directory(self, directory: str, prefix: str = '', replace: bool = False) -> None:
+        """
+        Adds every file in a directory tree, names are the paths relative to the directory.
+
+        :param directory: directory to add
+        :param prefix: path prepended to the entry names
+        :param replace: replace entries with the same names instead of failing
+        """
+        for root, dirs, files in os.walk(directory):
+            dirs.sort()
+            for file in sorted(files):
+                path: str = os.path.join(root, file)
+                self.add_file(path, prefix + os.path.relpath(path, directory).replace(os.sep, '/'), replace)
+
+    def add_entry(self, psarc: PSARC, entry: TOCEntry, name: Optional[str] = None, replace: bool = False) -> None:
+        """
+        Adds an entry of an existing archive.
+
+        :param psarc: archive the entry belongs to
+        :param entry: TOC entry
+        :param name: entry name, the name in the archive if None
+        :param replace: replace an entry with the same name instead of failing
+        """
+        self.add(entry.name if name is None else name, (psarc, entry), replace)
+
+    def add_psarc(self, psarc: PSARC, replace: bool = False) -> None:
+        """
+        Adds every entry of an existing archive.
+
+        :param psarc: archive to add the entries of
+        :param replace: replace entries with the same names instead of failing
+        """
+        psarc.read_manifest()
+        for entry in psarc.entries[1:]:
+            self.add_entry(psarc, entry, replace=replace)
+
+    def remove(self, name: str) -> None:
+        """
+        Removes an entry.
+
+        :param name: entry name
+        """
+        try:
+            del self.entries[self.archive_path_type.name_digest(name)]
+        except KeyError:
+            raise FileNotFoundError(f'No entry named {name}')
+
+    def can_copy(self, source: Source) -> bool:
+        """
+        Blocks of an archive entry can be copied as is if the archive has the same block size and compression type.
+
+        :param source: entry data source
+        :return: can the stored blocks be copied
+        """
+        if not isinstance(source, tuple):
+            return False
+        header: PSARCHeader = source[0].header
+        return header.block_size == self.block_size and header.compression_type == self.compression_type
+
+    @staticmethod
+    def source_size(source: Source) -> int:
+        if isinstance(source, bytes):
+            return len(source)
+        elif isinstance(source, str):
+            return os.path.getsize(source)
+        return source[1].decompressed_size
+
+    def read_source(self, source: Source, size: int) -> Iterator[bytes]:
+        """
+        Reads the uncompressed blocks of an entry.
+
+        :param source: entry data source
+        :param size: decompressed size of the entry
+        :return: uncompressed blocks
+        """
+        if isinstance(source, bytes):
+            for start in range(0, size, self.block_size):
+                yield source[start:start + self.block_size]
+            return
+
+        with open(source, 'rb') if isinstance(source, str) else source[0].open(source[1]) as f:
+            for start in range(0, size, self.block_size):
+                data: bytes = f.read(min(self.block_size, size - start))
+                if len(data) != min(self.block_size, size - start):
+                    raise IOError(f'{source} changed while it was being archived')
+                yield data
+
+    def iter_blocks(self, entries: Iterable[Tuple[str, Source, int]]) -> Iterator[bytes]:
+        """
+        Reads the uncompressed blocks of entries.
+
+        :param entries: (name, source, decompressed size) of the entries
+        :return: uncompressed blocks
+        """
+        for name, source, size in entries:
+            self.logger.info('Adding entry: %s (%s)', name, human_size(size))
+            for data in self.read_source(source, size):
+                yield data
+
+    def copy_blocks(self, f: IO, name: str, source: Tuple[PSARC, TOCEntry], block_sizes: array) -> None:
+        """
+        Copies the stored blocks of an archive entry.
+
+        :param f: output file
+        :param name: entry name
+        :param source: archive and TOC entry
+        :param block_sizes: stored block sizes, the sizes of the copied blocks are appended
+        """
+        psarc, entry = source
+        self.logger.info('Copying entry: %s (%s)', name, human_size(entry.decompressed_size))
+        first: int = entry.block_index
+        last: int = first + psarc.block_count(entry)
+        block_sizes.extend(psarc.block_offsets[block + 1] - psarc.block_offsets[block] for block in range(first, last))
+
+        remaining: int = psarc.block_offsets[last] - psarc.block_offsets[first]
+        psarc.file_handle.seek(entry.offset)
+        while remaining > 0:
+            data: bytes = psarc.file_handle.read(min(remaining, PSARCWriter.COPY_CHUNK_SIZE))
+            if not data:
+                raise IOError(f'{psarc.path} is truncated')
+            f.write(data)
+            remaining -= len(data)
+
+    def layout(self) -> Tuple[List[str], List[Source], List[int], List[int], int]:
+        """
+        Entries in archive order and the size of the header and tables, which only depends on the entry sizes.
+
+        :return: (entry names, sources including the manifest, decompressed sizes, index of the first block of every
+                 entry followed by the block count, size of the header and tables)
+        """
+        names: List[str] = [name for name, _ in self.entries.values()]
+        sources: List[Source] = ['\n'.join(names).encode('UTF-8')] + [source for _, source in self.entries.values()]
+        sizes: List[int] = [self.source_size(source) for source in sources]
+        block_indexes: List[int] = [0]
+        for size in sizes:
+            block_indexes.append(block_indexes[-1] + -(-size // self.block_size))
+
+        toc_length: int = (
+            PSARC.HEADER_SIZE + TOCEntry.LAYOUT.size * len(sizes) + self.block_size_width * block_indexes[-1]
+        )
+        return names, sources, sizes, block_indexes, toc_length
+
+    def write_data(self, f: IO, entries: Iterable[Tuple[str, Source, int]], executor: Optional[Executor],
+                   jobs: int) -> Tuple[List[int], array]:
+        """
+        Writes the stored blocks of entries next to each other at the current position.
+
+        :param f: output file
+        :param entries: (name, source, decompressed size) of the entries
+        :param executor: executor compressing the blocks, compressed in this thread if None
+        :param jobs: number of compression workers
+        :return: (offset of every entry, stored size of every block)
+        """
+        offsets: List[int] = []
+        block_sizes: array = array('Q')
+        #: Runs of copied entries and of entries to compress, the compression pipeline is drained between them
+        for copy, group in groupby(entries, key=lambda item: self.can_copy(item[1])):
+            run: List[Tuple[str, Source, int]] = list(group)
+            offset: int = f.tell()
+            block: int = len(block_sizes)
+            if copy:
+                for name, source, _ in run:
+                    self.copy_blocks(f, name, source, block_sizes)
+            else:
+                for data in imap_ordered(
+                        partial(compress_block, self.codec, self.level), self.iter_blocks(run), executor,
+                        jobs * PSARCWriter.BLOCKS_PER_JOB
+                ):
+                    f.write(data)
+                    block_sizes.append(len(data))
+            for _, _, size in run:
+                offsets.append(offset)
+                block_count: int = -(-size // self.block_size)
+                offset += sum(block_sizes[block:block + block_count])
+                block += block_count
+        return offsets, block_sizes
+
+    def write(self, path: str, jobs: int = 1) -> None:
+        """
+        Writes the archive.
+
+        Space for the header, TOC and block size table is reserved up front (their size only depends on the entry
+        sizes), the blocks are streamed after it and the tables are filled in once all blocks are written.
+
+        :param path: output path, can not be one of the archives entries are copied from
+        :param jobs: number of processes compressing blocks
+        """
+        for _, source in self.entries.values():
+            if isinstance(source, tuple) and os.path.exists(path) and os.path.samefile(path, source[0].path):
+                raise ValueError(f'Can not write {path} while copying entries from it')
+
+        names, sources, sizes, block_indexes, toc_length = self.layout()
+        self.logger.info('Writing %s entries in %s blocks to %s', len(names), block_indexes[-1], path)
+
+        executor: Optional[Executor] = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        try:
+            with open(path, 'wb') as f:
+                f.seek(toc_length)
+                offsets, block_sizes = self.write_data(f, zip(['Manifest'] + names, sources, sizes), executor, jobs)
+                f.seek(0)
+                self.write_tables(f, toc_length, names, sizes, offsets, block_indexes, block_sizes)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def patch(self, jobs: int = 1) -> None:
+        """
+        Patches the archive the writer was created from in place.
+
+        Entries still stored in the archive are left where they are, only the blocks of added and replaced entries
+        (and of a new manifest if the names changed) are appended to the end of the archive, then the header, TOC and
+        block size table are rewritten. Entries stored where the grown tables go are moved to the end first. The data
+        of removed and replaced entries is left behind as unused space, :meth:`write` a new archive to reclaim it.
+
+        The tables are only rewritten once all the data is on disk, the writer and the archive it was created from
+        can not be used after patching.
+
+        :param jobs: number of processes compressing blocks
+        """
+        psarc: Optional[PSARC] = self.psarc
+        if psarc is None:
+            raise ValueError('Only writers created from an archive can patch it')
+
+        names, sources, sizes, block_indexes, toc_length = self.layout()
+        if names == [entry.name for entry in psarc.entries[1:]]:
+            sources[0] = (psarc, psarc.entries[0])
+        #: Entries which stay where they are, the ones in the way of the tables are moved
+        in_place: List[bool] = [
+            isinstance(source, tuple) and source[0] is psarc and source[1].offset >= toc_length for source in sources
+        ]
+        self.logger.info(
+            'Patching %s: %s of %s entries are written', psarc.path, in_place.count(False), len(sources)
+        )
+
+        executor: Optional[Executor] = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+        try:
+            with open(psarc.path, 'r+b') as f:
+                f.seek(0, os.SEEK_END)
+                offsets: List[int] = []
+                block_sizes: array = array('Q')
+                for keep, run in groupby(
+                        zip(['Manifest'] + names, sources, sizes, in_place), key=lambda item: item[3]
+                ):
+                    if keep:
+                        for _, (_, entry), _, _ in run:
+                            first: int = entry.block_index
+                            offsets.append(entry.offset)
+                            block_sizes.extend(
+                                psarc.block_offsets[block + 1] - psarc.block_offsets[block]
+                                for block in range(first, first + psarc.block_count(entry))
+                            )
+                        continue
+                    run_offsets, run_block_sizes = self.write_data(
+                        f, ((name, source, size) for name, source, size, _ in run), executor, jobs
+                    )
+                    offsets.extend(run_offsets)
+                    block_sizes.extend(run_block_sizes)
+
+                #: The data has to be on disk before the tables point at it
+                f.flush()
+                os.fsync(f.fileno())
+                f.seek(0)
+                self.write_tables(f, toc_length, names, sizes, offsets, block_indexes, block_sizes)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+    def write_tables(self, f: IO, toc_length: int, names: List[str], sizes: List[int], offsets: List[int],
+                     block_indexes: List[int], block_sizes: array) -> None:
+        """
+        Writes the header, TOC and block size table.
+
+        :param f: output file, positioned at the start of the archive
+        :param toc_length: size of the header and tables
+        :param names: entry names
+        :param sizes: decompressed size of every entry including the manifest
+        :param offsets: offset of every entry including the manifest
+        :param block_indexes: index of the first block of every entry, followed by the block count
+        :param block_sizes: stored size of every block
+        """
+        f.write(b'PSAR')
+        PSARCHeader.LAYOUT.write(SimpleNamespace(
+            version_major=PSARCWriter.VERSION[0],
+            version_minor=PSARCWriter.VERSION[1],
+            compression_type=self.compression_type,
+            toc_length=toc_length,
+            toc_entry_size=TOCEntry.LAYOUT.size,
+            toc_entry_count=len(sizes),
+            block_size=self.block_size,
+            archive_path_type=self.archive_path_type,
+        ), f)
+
+        digests: List[bytes] = [bytes(16)] + [self.archive_path_type.name_digest(name) for name in names]
+        for index, (digest, size, offset) in enumerate(zip(digests, sizes, offsets)):
+            f.write(TOCEntry.LAYOUT.pack(SimpleNamespace(
+                hash=digest, block_index=block_indexes[index], decompressed_size=size, offset=offset
+            )))
+
+        width: int = self.block_size_width
+        #: Full size blocks are stored with a size of 0
+        f.write(b''.join((size % self.block_size).to_bytes(width, 'big') for size in block_sizes))
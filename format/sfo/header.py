@@ -1,33 +1,45 @@
 from io import BytesIO
 from typing import IO
 
+from base import Field, Layout
 from base.header import MagicFileHeader
-from utils.utils import read_u32, Endianess, write_u32
+from utils.utils import Endianess
 
 GAME_ID_SIZE = 0x09
 
 
+def parse_version(version_data: bytes) -> str:
+    return f'{version_data[0]}.{version_data[1]}{version_data[2]}{version_data[3]}'
+
+
+def serialize_version(version: str) -> bytes:
+    return bytes([int(version[0]), int(version[2]), int(version[3]), int(version[4])])
+
+
 class SFOHeader(MagicFileHeader):
+    #: Header layout following the magic
+    LAYOUT: Layout = Layout(Endianess.LITTLE_ENDIAN, [
+        Field('version', '4s', parse=parse_version, serialize=serialize_version),
+        Field('key_table_offset', 'I'),
+        Field('data_table_offset', 'I'),
+        Field('entry_count', 'I'),
+    ])
 
     def __init__(self, f: BytesIO):
         super().__init__(f)
+        SFOHeader.LAYOUT.read_into(self, f)
 
-        version_data: bytes = f.read(4)
         #: SFO file format version
-        self.version: str = f'{version_data[0]}.{version_data[1]}{version_data[2]}{version_data[3]}'
-        self.logger.info(f'SFO Version: {self.version}')
+        self.logger.info('SFO Version: %s', self.version)
 
         #: Start offset of Key Table
-        self.key_table_offset: int = read_u32(f, Endianess.LITTLE_ENDIAN)
-        self.logger.info(f'Key Table Offset: {self.key_table_offset}')
+        self.logger.info('Key Table Offset: %s', self.key_table_offset)
 
         #: Start offset of Data Table
-        self.data_table_offset: int = read_u32(f, Endianess.LITTLE_ENDIAN)
-        self.logger.info(f'Data Table Offset: {self.data_table_offset}')
+        self.logger.info('Data Table Offset: %s', self.data_table_offset)
 
         #: Entry Count (both tables)
-        self.entry_count: int = read_u32(f, Endianess.LITTLE_ENDIAN)
-        self.logger.info(f'Entry Count: {self.entry_count}')
+        self.logger.info('Entry Count: %s', self.entry_count)
 
     def write(self, f: IO):
         self.logger.info('Writing SFO Header Data...')
@@ -35,17 +47,8 @@ class SFOHeader(MagicFileHeader):
         #: Write Magic
         f.write(self.magic)
 
-        #: Write File Format Version
-        f.write(bytes([int(self.version[0]), int(self.version[2]), int(self.version[3]), int(self.version[4])]))
-
-        #: Write Key Table Offset
-        write_u32(f, self.key_table_offset, Endianess.LITTLE_ENDIAN)
-
-        #: Write Data Table Offset
-        write_u32(f, self.data_table_offset, Endianess.LITTLE_ENDIAN)
-
-        #: Write Entry Count
-        write_u32(f, self.entry_count, Endianess.LITTLE_ENDIAN)
+        #: Write File Format Version, Key Table Offset, Data Table Offset and Entry Count
+        SFOHeader.LAYOUT.write(self, f)
 
         self.logger.info('SFO Header Data Written!')
 
@@ -1,52 +1,51 @@
-from typing import IO
+from typing import IO, Any, Dict, List, Optional
 
-from base import LoggingClass
-from utils.utils import read_u32, Endianess, read_u16, write_u16, write_u32
+from base import Field, LoggingClass, Layout
+from utils.utils import Endianess
 from .data_type import DataType
 
 GAME_ID_SIZE = 0x09
 
 
 class IndexTableEntry(LoggingClass):
-    def __init__(self, f: IO):
+    #: Index table entry record layout
+    LAYOUT: Layout = Layout(Endianess.LITTLE_ENDIAN, [
+        Field('key_offset', 'H'),
+        Field.enum('data_type', '2s', DataType),
+        Field('data_length', 'I'),
+        Field('data_max_length', 'I'),
+        Field('data_offset', 'I'),
+    ])
+
+    def __init__(self, f: Optional[IO] = None, values: Optional[Dict[str, Any]] = None):
         super().__init__()
+        Layout.assign(self, IndexTableEntry.LAYOUT.read(f) if values is None else values)
 
         #: Key Offset (relative to key_table_offset)
-        self.key_offset: int = read_u16(f, Endianess.LITTLE_ENDIAN)
-        self.logger.debug(f'Key Offset: {self.key_offset}')
+        self.logger.debug('Key Offset: %s', self.key_offset)
 
         #: Data Type
-        self.data_type: DataType = DataType(f.read(2))
-        self.logger.debug(f'Data Type: {self.data_type}')
+        self.logger.debug('Data Type: %s', self.data_type)
 
         #: Data Length (used bytes)
-        self.data_length: int = read_u32(f, Endianess.LITTLE_ENDIAN)
-        self.logger.debug(f'Data Length: {self.data_length}')
+        self.logger.debug('Data Length: %s', self.data_length)
 
         #: Data Max Length
-        self.data_max_length: int = read_u32(f, Endianess.LITTLE_ENDIAN)
-        self.logger.debug(f'Data Max Length: {self.data_max_length}')
+        self.logger.debug('Data Max Length: %s', self.data_max_length)
 
         #: Data Offset (relative to data_table_offset)
-        self.data_offset: int = read_u32(f, Endianess.LITTLE_ENDIAN)
-        self.logger.debug(f'Data Offset: {self.data_offset}')
+        self.logger.debug('Data Offset: %s', self.data_offset)
+
+    @staticmethod
+    def read_table(f: IO, count: int) -> List['IndexTableEntry']:
+        """Reads ``count`` consecutive index table entries with a single read."""
+        data: bytes = f.read(IndexTableEntry.LAYOUT.size * count)
+        return [IndexTableEntry(values=values) for values in IndexTableEntry.LAYOUT.iter_unpack(data)]
 
     def write(self, f: IO):
         self.logger.info('Writing SFO Index Table Entry Data...')
 
-        #: Writing Key Offset
-        write_u16(f, self.key_offset, Endianess.LITTLE_ENDIAN)
-
-        #: Writing Data Type
-        f.write(self.data_type.value)
-
-        #: Writing Data Length
-        write_u32(f, self.data_length, Endianess.LITTLE_ENDIAN)
-
-        #: Writing Data Max Length
-        write_u32(f, self.data_max_length, Endianess.LITTLE_ENDIAN)
-
-        #: Writing Data Offset
-        write_u32(f, self.data_offset, Endianess.LITTLE_ENDIAN)
+        #: Writing Key Offset, Data Type, Data Length, Data Max Length and Data Offset
+        IndexTableEntry.LAYOUT.write(self, f)
 
         self.logger.info('SFO Index Table Entry Data Written!')
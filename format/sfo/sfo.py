@@ -10,15 +10,12 @@ from .index_table import IndexTableEntry
 
 
 class SFO(FileFormatWithMagic[SFOHeader]):
-    def __init__(self, path: str):
-        super().__init__(path, SFOHeader)
+    def __init__(self, path: str, use_mmap: bool = False):
+        super().__init__(path, SFOHeader, use_mmap=use_mmap)
 
         #: Index Table
-        self.index_table: List[IndexTableEntry] = list()
         self.logger.info('Reading SFO Index Table...')
-        for i in range(0, self.header.entry_count):
-            self.logger.debug(f'Reading SFO Index Table Entry #{i}')
-            self.index_table.append(IndexTableEntry(self.file_handle))
+        self.index_table: List[IndexTableEntry] = IndexTableEntry.read_table(self.file_handle, self.header.entry_count)
 
         #: Alignment Padding to int32
         self.file_handle.seek(self.file_handle.tell() % 4, os.SEEK_CUR)
@@ -55,14 +52,14 @@ class SFO(FileFormatWithMagic[SFOHeader]):
                 data = self.file_handle.read(entry.data_length)
 
             self.logger.info(
-                f'Key Data Map Entry #{index} ({entry.data_length}/{entry.data_max_length}): '
-                f'{key[:-1]} ({entry.data_type}) -> {data}'
+                'Key Data Map Entry #%s (%s/%s): %s (%s) -> %s',
+                index, entry.data_length, entry.data_max_length, key[:-1], entry.data_type, data
             )
             self.key_data_map[key] = data
 
     def set_data(self, key: str, data: Union[str, int]):
         if key not in self.key_data_map:
-            self.logger.error(f'Key {key} does not exist in the key table...')
+            self.logger.error('Key %s does not exist in the key table...', key)
         else:
             #: Index Table Entry Index
             index: int = list(self.key_data_map.keys()).index(key)
@@ -86,7 +83,7 @@ class SFO(FileFormatWithMagic[SFOHeader]):
                 #: Check if data can fit under max length, if not it will be truncated (+1 NULL Terminator)
                 if len(data) + 1 > index_table_entry.data_max_length:
                     self.logger.warning(
-                        f'Data too long, truncating to {index_table_entry.data_max_length - 1} bytes...')
+                        'Data too long, truncating to %s bytes...', index_table_entry.data_max_length - 1)
                     data = data[0:index_table_entry.data_max_length - 1]
 
                 #: Set Data and add NULL Terminator
@@ -97,7 +94,7 @@ class SFO(FileFormatWithMagic[SFOHeader]):
             elif data_type == DataType.UTF8_SPECIAL:
                 #: Check if data can fit under max length, if not it will be truncated
                 if len(data) > index_table_entry.data_max_length:
-                    self.logger.warning(f'Data too long, truncating to {index_table_entry.data_max_length} bytes...')
+                    self.logger.warning('Data too long, truncating to %s bytes...', index_table_entry.data_max_length)
                     data = data[0:index_table_entry.data_max_length]
 
                 #: Set Data
@@ -106,7 +103,7 @@ class SFO(FileFormatWithMagic[SFOHeader]):
                 #: Set Entry data length
                 index_table_entry.data_length = len(data)
             else:
-                self.logger.error(f'Invalid data type for entry, specified {data_type}')
+                self.logger.error('Invalid data type for entry, specified %s', data_type)
 
     def print_key_data_map(self):
         for entry in self.index_table:
@@ -116,8 +113,8 @@ class SFO(FileFormatWithMagic[SFOHeader]):
             #: SFO Key Data Pair
             key, data = list(self.key_data_map.items())[index]
             self.logger.info(
-                f'Key Data Map Entry #{index} ({entry.data_length}/{entry.data_max_length}): '
-                f'{key[:-1]} ({entry.data_type}) -> {data}'
+                'Key Data Map Entry #%s (%s/%s): %s (%s) -> %s',
+                index, entry.data_length, entry.data_max_length, key[:-1], entry.data_type, data
             )
 
     def write(self, output_file: Optional[str] = None):
@@ -128,19 +125,19 @@ class SFO(FileFormatWithMagic[SFOHeader]):
             self.file_handle.close()
 
         with open(output_file, 'wb') as f:
-            self.logger.info(f'Writing SFO File...')
+            self.logger.info('Writing SFO File...')
 
             self.header.write(f)
 
-            self.logger.info(f'Writing SFO Index Table...')
+            self.logger.info('Writing SFO Index Table...')
 
             for i in range(0, self.header.entry_count):
-                self.logger.info(f'Writing SFO Index Table Entry #{i}')
+                self.logger.info('Writing SFO Index Table Entry #%s', i)
                 self.index_table[i].write(f)
 
-                self.logger.info(f'SFO Index Table Written!')
+                self.logger.info('SFO Index Table Written!')
 
-            self.logger.info(f'Writing Key -> Data Pair Map...')
+            self.logger.info('Writing Key -> Data Pair Map...')
             for entry in self.index_table:
                 #: Index Table Entry Index
                 index: int = self.index_table.index(entry)
@@ -167,6 +164,6 @@ class SFO(FileFormatWithMagic[SFOHeader]):
                 #: Write the rest of the unused space
                 f.write(bytes(entry.data_max_length - entry.data_length))
 
-            self.logger.info(f'Key -> Data Pair Map Written!')
+            self.logger.info('Key -> Data Pair Map Written!')
 
-            self.logger.info(f'SFO File Written!')
+            self.logger.info('SFO File Written!')
@@ -18,6 +18,7 @@ class Tests(unittest.TestCase):
                 if file.endswith(".SFO"):
                     file = os.path.join(root, file)
                     SFO(file)
+                    SFO(file, use_mmap=True)
 
     def test_writing_sfo(self):
         for root, dirs, files in os.walk(os.path.dirname(os.path.realpath(__file__))):
@@ -1,11 +1,28 @@
 import logging
+import multiprocessing
 import os
+import re
+from typing import List, Optional, Tuple
 
 import click
 
+from base.name_filter import NameFilter
+from base.write_behind import DEFAULT_WRITE_QUEUE_DEPTH
 from format import PKG
 from format import PSARC
 from format import SFO
+from format.psarc import PSARCWriter
+from format.psarc.compression_type import CompressionType
+from format.psarc.path_type import ArchivePathType
+from utils.utils import human_size
+
+
+def create_name_filter(include: Tuple[str, ...], exclude: Tuple[str, ...], regex: bool,
+                       ignore_case: bool = False) -> NameFilter:
+    try:
+        return NameFilter(include, exclude, regex, ignore_case)
+    except re.error as e:
+        raise click.BadParameter(f'invalid pattern {e.pattern!r}: {e}', param_hint='--include/--exclude')
 
 
 @click.group()
@@ -32,24 +49,54 @@ def pkg():
 @pkg.command()
 @click.argument('file', type=str)
 @click.option('--verify/--no-verify', default=True)
-def info(file: str, verify: bool):
+@click.option('--lazy/--no-lazy', default=False,
+              help='only parse the header, skip the metadata, the entry table and the file verification')
+@click.option('--mmap/--no-mmap', default=False, help='access the file through a memory map')
+def info(file: str, verify: bool, lazy: bool, mmap: bool):
     """
     Info about Sony Playstation 3 PKG file contents
     """
-    PKG(file, verify)
+    #: A lazy open only reads the header, the file is not read as a whole to verify it
+    PKG(file, verify and not lazy, lazy=lazy, use_mmap=mmap)
 
 
 @pkg.command()
 @click.argument('file', type=str)
 @click.option('--verify/--no-verify', default=True)
-def extract(file: str, verify: bool):
+@click.option('--jobs', '-j', default=1, type=click.IntRange(min=1), help='number of parallel extraction workers')
+@click.option('--single-pass/--no-single-pass', default=False,
+              help='verify the file hash while extracting instead of before (removes the output on mismatch)')
+@click.option('--mmap/--no-mmap', default=False, help='access the file through a memory map')
+@click.option('--write-queue', default=DEFAULT_WRITE_QUEUE_DEPTH, type=click.IntRange(min=0),
+              help='number of writes queued for the writer thread (0 = write synchronously)')
+@click.option('--include', '-i', multiple=True, type=str, help='only entries matching the pattern, can be repeated')
+@click.option('--exclude', '-e', multiple=True, type=str, help='skip entries matching the pattern, can be repeated')
+@click.option('--regex/--glob', default=False, help='patterns are regular expressions instead of globs')
+@click.option('--list', 'list_entries', is_flag=True, default=False,
+              help='list the selected entries instead of extracting them')
+def extract(file: str, verify: bool, jobs: int, single_pass: bool, mmap: bool, write_queue: int,
+            include: Tuple[str, ...], exclude: Tuple[str, ...], regex: bool, list_entries: bool):
     """
     Extract Sony Playstation 3 PKG file contents
     """
-    pkg_file: PKG = PKG(file, verify)
-    for entry in pkg_file.files:
-        # TODO: Fix to use title_id but need to fix metadata for that
-        pkg_file.export(entry, f'{pkg_file.header.content_id}/', use_package_path=True)
+    name_filter: NameFilter = create_name_filter(include, exclude, regex)
+    #: Listing only needs the entry table, the file is not read as a whole to verify it
+    pkg_file: PKG = PKG(file, verify and not single_pass and not list_entries, use_mmap=mmap)
+    if list_entries:
+        for entry in pkg_file.select(name_filter):
+            click.echo(f'{human_size(entry.file_size) if entry.is_file else "<DIR>":>12}  {entry.name}')
+        return
+    # TODO: Fix to use title_id but need to fix metadata for that
+    if verify and single_pass:
+        pkg_file.extract_verified(
+            f'{pkg_file.header.content_id}/', use_package_path=True, write_queue_depth=write_queue,
+            name_filter=name_filter
+        )
+    else:
+        pkg_file.extract(
+            f'{pkg_file.header.content_id}/', jobs=jobs, use_package_path=True, write_queue_depth=write_queue,
+            name_filter=name_filter
+        )
 
 
 @pstools.group()
@@ -101,11 +148,12 @@ def psarc():
 
 @psarc.command()
 @click.argument('file')
-def info(file: str):
+@click.option('--mmap/--no-mmap', default=False, help='access the file through a memory map')
+def info(file: str, mmap: bool):
     """
     Info about Sony Playstation Archive (PSARC) file contents
     """
-    PSARC(file)
+    PSARC(file, use_mmap=mmap)
 
 
 # noinspection PyShadowingBuiltins
@@ -115,18 +163,109 @@ def info(file: str):
 @click.option('--use-package-path/--no-use-package-path', default=True, help='extract with directory structure')
 @click.option('--create-directories/--no-create-directories', default=True, help='create needed directory structure')
 @click.option('--overwrite/--no-overwrite', default=True, help='overwrite already extracted files')
-def extract(file: str, dir: str, use_package_path: bool, create_directories: bool, overwrite: bool):
+@click.option('--mmap/--no-mmap', default=False, help='access the file through a memory map')
+@click.option('--jobs', '-j', default=1, type=click.IntRange(min=1), help='number of parallel decompression workers')
+@click.option('--write-queue', default=DEFAULT_WRITE_QUEUE_DEPTH, type=click.IntRange(min=0),
+              help='number of writes queued for the writer thread (0 = write synchronously)')
+@click.option('--include', '-i', multiple=True, type=str, help='only entries matching the pattern, can be repeated')
+@click.option('--exclude', '-e', multiple=True, type=str, help='skip entries matching the pattern, can be repeated')
+@click.option('--regex/--glob', default=False, help='patterns are regular expressions instead of globs')
+@click.option('--list', 'list_entries', is_flag=True, default=False,
+              help='list the selected entries instead of extracting them')
+def extract(file: str, dir: str, use_package_path: bool, create_directories: bool, overwrite: bool, mmap: bool,
+            jobs: int, write_queue: int, include: Tuple[str, ...], exclude: Tuple[str, ...], regex: bool,
+            list_entries: bool):
     """
     Extract Sony Playstation Archive (PSARC) file contents
     """
-    psarc_file: PSARC = PSARC(file)
+    psarc_file: PSARC = PSARC(file, use_mmap=mmap, lazy=True)
+    name_filter: NameFilter = create_name_filter(include, exclude, regex, psarc_file.header.ignore_case)
+    if list_entries:
+        for entry in psarc_file.select(name_filter):
+            click.echo(f'{human_size(entry.decompressed_size):>12}  {entry.name}')
+        return
     if dir is None:
         dir = f'./{os.path.basename(file)}/'
-    for entry in psarc_file.entries[1:]:
-        psarc_file.save_entry(
-            entry, dir, use_package_path=use_package_path, create_directories=create_directories, overwrite=overwrite
-        )
+    psarc_file.extract(
+        dir, jobs=jobs, use_package_path=use_package_path, create_directories=create_directories, overwrite=overwrite,
+        write_queue_depth=write_queue, name_filter=name_filter
+    )
+
+
+@psarc.command()
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.argument('file', type=str)
+@click.option('--compression', default='zlib', type=click.Choice([t.name.lower() for t in CompressionType]),
+              help='block compression type')
+@click.option('--level', default=None, type=int, help='compression level (default = codec default)')
+@click.option('--block-size', default=0x10000, type=click.IntRange(min=1), help='decompressed size of a block')
+@click.option('--path-type', default='relative', type=click.Choice([t.name.lower() for t in ArchivePathType]),
+              help='archive path type (unknown = ignore case and absolute)')
+@click.option('--jobs', '-j', default=1, type=click.IntRange(min=1), help='number of parallel compression workers')
+def create(directory: str, file: str, compression: str, level: int, block_size: int, path_type: str, jobs: int):
+    """
+    Create a Sony Playstation Archive (PSARC) file from a directory
+    """
+    writer: PSARCWriter = PSARCWriter(
+        CompressionType[compression.upper()], block_size, ArchivePathType[path_type.upper()], level
+    )
+    writer.add_directory(directory)
+    writer.write(file, jobs=jobs)
+
+
+@psarc.command()
+@click.argument('file', type=str)
+@click.argument('directory', type=click.Path(exists=True, file_okay=False))
+@click.option('--output', '-o', default=None, type=str,
+              help='write a new, compacted archive instead of patching the file in place')
+@click.option('--remove', multiple=True, type=str, help='name of an entry to remove, can be repeated')
+@click.option('--level', default=None, type=int, help='compression level (default = codec default)')
+@click.option('--mmap/--no-mmap', default=False, help='access the file through a memory map')
+@click.option('--jobs', '-j', default=1, type=click.IntRange(min=1), help='number of parallel compression workers')
+def patch(file: str, directory: str, output: Optional[str], remove: Tuple[str, ...], level: int, mmap: bool,
+          jobs: int):
+    """
+    Patch a Sony Playstation Archive (PSARC) file with the files of a directory, adding or replacing entries.
+    The file is patched in place, only the added and replaced files are written and the tables are rewritten.
+    With --output unchanged entries are copied to a new archive without recompressing them.
+    """
+    writer: PSARCWriter = PSARCWriter.from_psarc(PSARC(file, use_mmap=mmap), level)
+    for name in remove:
+        writer.remove(name)
+    writer.add_directory(directory, replace=True)
+    if output is None:
+        writer.patch(jobs=jobs)
+    else:
+        writer.write(output, jobs=jobs)
+
+
+@psarc.command()
+@click.argument('files', nargs=-1, required=True, type=str)
+@click.option('--mmap/--no-mmap', default=False, help='access the file through a memory map')
+@click.option('--jobs', '-j', default=1, type=click.IntRange(min=1), help='number of parallel decompression workers')
+def verify(files: Tuple[str, ...], mmap: bool, jobs: int):
+    """
+    Verify the integrity of Sony Playstation Archive (PSARC) files without extracting them
+    """
+    damaged: int = 0
+    for file in files:
+        try:
+            psarc_file: PSARC = PSARC(file, use_mmap=mmap, lazy=True)
+            problems: List[str] = [
+                f'#{index} {psarc_file.entries.name(index) or ""}: {problem}'
+                for index, problem in psarc_file.verify(jobs)
+            ]
+        except Exception as e:
+            problems = [f'Could not be read: {e}']
+        click.echo(f'{file}: {"OK" if not problems else "DAMAGED"}')
+        for problem in problems:
+            click.echo(f'    {problem}')
+        damaged += bool(problems)
+    if damaged:
+        raise click.ClickException(f'{damaged} of {len(files)} archive(s) damaged')
 
 
 if __name__ == '__main__':
+    #: PyInstaller builds run this script in the compression worker processes too, they have to stop here
+    multiprocessing.freeze_support()
     pstools()
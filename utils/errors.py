@@ -1,3 +1,10 @@
 class InvalidISODateException(Exception):
     def __init__(self, reason: str):
         super(InvalidISODateException, self).__init__(f"ISO date doesn't match specified format, reason: {reason}")
+
+
+class NativeLibraryNotFoundException(Exception):
+    def __init__(self, path: str):
+        super(NativeLibraryNotFoundException, self).__init__(
+            f"Native library {path} was not found, build it using build.sh"
+        )
@@ -26,11 +26,16 @@ psp_aes_key: bytes = bytes(
 max_int64 = 0xFFFFFFFFFFFFFFFF
 
 xor_lib_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), f'xor.{platform}.lib')
-xor_lib = cdll.LoadLibrary(xor_lib_path)
-xor_lib.generate_xor_key.argtypes = [ctypes.c_char_p, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_char_p]
-xor_lib.generate_debug_xor_key.argtypes = [ctypes.c_char_p, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_char_p]
-xor_lib.add.argtypes = [ctypes.c_char_p, ctypes.c_longlong, ctypes.c_longlong]
-xor_lib.xor.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_longlong, ctypes.c_longlong]
+try:
+    xor_lib = cdll.LoadLibrary(xor_lib_path)
+except OSError:
+    #: Built by build.sh, only the xor key stream decryption needs it, retail PKGs are decrypted with AES-128-CTR
+    xor_lib = None
+else:
+    xor_lib.generate_xor_key.argtypes = [ctypes.c_char_p, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_char_p]
+    xor_lib.generate_debug_xor_key.argtypes = [ctypes.c_char_p, ctypes.c_longlong, ctypes.c_longlong, ctypes.c_char_p]
+    xor_lib.add.argtypes = [ctypes.c_char_p, ctypes.c_longlong, ctypes.c_longlong]
+    xor_lib.xor.argtypes = [ctypes.c_char_p, ctypes.c_char_p, ctypes.c_longlong, ctypes.c_longlong]
 
 setLoggerClass(Logger)
 